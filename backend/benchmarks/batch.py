@@ -0,0 +1,111 @@
+"""
+Throughput of ``/generate-itinerary/batch`` vs. one request at a time.
+
+Builds a batch of itinerary requests over a handful of cities, a share of
+them exact duplicates, and reports itineraries per minute for sequential
+``/generate-itinerary`` calls and for the batch endpoint (submit, then poll
+until done) at several worker-pool sizes, with the fake model's call count.
+
+    cd backend && python -m benchmarks.batch
+"""
+
+from benchmarks.fakes import FakeGenerativeModel
+
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from routers import itinerary
+from services.batch import BatchRunner
+
+CITIES = ["Paris", "Rome", "Tokyo", "Lisbon", "Kyoto", "Berlin", "Prague", "Madrid"]
+INTERESTS = ["museums", "food", "parks", "nightlife", "history", "shopping"]
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(itinerary.router, prefix="/api/v1")
+    return app
+
+
+def build_requests(n: int, duplicate_share: float, seed: int = 0):
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(n):
+        if requests and rng.random() < duplicate_share:
+            requests.append(dict(rng.choice(requests)))
+            continue
+        requests.append({
+            "city": rng.choice(CITIES),
+            "budget": rng.randrange(500, 5000, 50),
+            "days": rng.randint(2, 5),
+            "interests": rng.sample(INTERESTS, 2),
+        })
+    return requests
+
+
+async def sequential(client: httpx.AsyncClient, requests) -> float:
+    start = time.perf_counter()
+    for payload in requests:
+        response = await client.post("/api/v1/generate-itinerary", json=payload)
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def batched(client: httpx.AsyncClient, requests, poll_interval: float):
+    start = time.perf_counter()
+    response = await client.post("/api/v1/generate-itinerary/batch", json={"requests": requests})
+    response.raise_for_status()
+    job = response.json()
+    while job["status"] == "running":
+        await asyncio.sleep(poll_interval)
+        response = await client.get(f"/api/v1/generate-itinerary/batch/{job['job_id']}", params={"results": False})
+        job = response.json()
+    return time.perf_counter() - start, job
+
+
+async def main(args):
+    app = build_app()
+    model = FakeGenerativeModel(latency=args.latency)
+    itinerary.ai_service.model = model
+    # Measure generation, not the itinerary cache or request coalescing
+    itinerary.ai_service.cache = None
+    itinerary.ai_service.inflight = None
+    itinerary.ai_service._llm_semaphore = asyncio.Semaphore(args.llm_concurrency)
+
+    requests = build_requests(args.requests, args.duplicates)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        print(f"{len(requests)} requests, LLM concurrency {args.llm_concurrency}, "
+              f"fake latency {args.latency * 1000:.0f} ms per call")
+        print(f"{'mode':<22} {'itineraries':>11} {'unique':>7} {'llm calls':>10} {'secs':>7} {'per minute':>11}")
+
+        model.calls = 0
+        subset = requests[:args.sequential]
+        elapsed = await sequential(client, subset)
+        print(f"{'sequential':<22} {len(subset):>11} {len(subset):>7} {model.calls:>10} {elapsed:>7.2f} "
+              f"{len(subset) / elapsed * 60:>11.0f}")
+
+        for workers in args.workers:
+            itinerary.batch_runner = BatchRunner(itinerary.planner, max_concurrency=workers)
+            model.calls = 0
+            elapsed, job = await batched(client, requests, args.poll)
+            assert job["completed"] == len(requests), job
+            print(f"{f'batch, {workers} workers':<22} {job['total']:>11} {job['unique']:>7} {model.calls:>10} "
+                  f"{elapsed:>7.2f} {job['total'] / elapsed * 60:>11.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--duplicates", type=float, default=0.3, help="Share of requests repeating an earlier one")
+    parser.add_argument("--sequential", type=int, default=20, help="Requests sent one at a time for the baseline")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--llm-concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake Gemini latency in seconds")
+    parser.add_argument("--poll", type=float, default=0.1, help="Seconds between status polls")
+    asyncio.run(main(parser.parse_args()))
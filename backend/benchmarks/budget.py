@@ -0,0 +1,85 @@
+"""
+Budget fitting: the previous proportional cost scaling vs. the
+keep/drop knapsack solver in ``services.budget``.
+
+For itineraries of 10 to 500 priced items with a budget at a fraction of
+their total cost, reports whether each method ends within budget, the cost
+it ends at, and the solver's runtime and share of value kept.
+
+    cd backend && python -m benchmarks.budget
+"""
+
+from benchmarks.fakes import build_fake_days
+
+import argparse
+import copy
+import random
+import statistics
+import time
+
+from models.itinerary import Day
+from services.budget import fit_columns_to_budget
+from services.itinerary_columns import ItineraryColumns
+
+
+def priced_days(items: int, seed: int):
+    rng = random.Random(seed)
+    days = []
+    for day in build_fake_days(max(1, items // 8), activities_per_day=6, dining_per_day=2):
+        for activity in day["activities"]:
+            activity["cost"] = round(rng.uniform(0, 80), 2)
+            activity["duration_minutes"] = rng.randint(30, 240)
+        for dining in day["dining"]:
+            dining["price_per_person"] = round(rng.uniform(12, 120), 2)
+            dining["rating"] = round(rng.uniform(3, 5), 1)
+        days.append(Day(**day))
+    return days
+
+
+def proportional(days, total_budget):
+    """The previous algorithm, on a deep copy"""
+    days = copy.deepcopy(days)
+    current_total = sum(
+        sum(a.cost or 0 for a in day.activities) + sum(d.price_per_person or 0 for d in day.dining)
+        for day in days
+    )
+    deficit = current_total - total_budget
+    for day in days:
+        for activity in day.activities:
+            if activity.cost and activity.cost > 0:
+                activity.cost = max(activity.cost * (1 - (deficit / current_total) * 0.5), 5)
+        for dining in day.dining:
+            if dining.price_per_person and dining.price_per_person > 0:
+                dining.price_per_person = max(dining.price_per_person * (1 - (deficit / current_total) * 0.5), 10)
+    return sum(
+        sum(a.cost or 0 for a in day.activities) + sum(d.price_per_person or 0 for d in day.dining)
+        for day in days
+    )
+
+
+def main(args):
+    print(f"budget = {args.fraction:.0%} of the itinerary cost, {args.repeat} runs per size")
+    print(f"{'items':>6} {'budget':>9} {'scaled cost':>12} {'fits':>5} {'solver cost':>12} {'fits':>5} "
+          f"{'value kept':>11} {'solver ms':>10}")
+    for items in args.items:
+        days = priced_days(items, seed=items)
+        total = sum(sum(a.cost or 0 for a in d.activities) + sum(m.price_per_person or 0 for m in d.dining) for d in days)
+        budget = total * args.fraction
+
+        scaled = proportional(days, budget)
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            _, summary = fit_columns_to_budget(ItineraryColumns.from_days(days), budget)
+            timings.append((time.perf_counter() - start) * 1000)
+        n = sum(len(d.activities) + len(d.dining) for d in days)
+        print(f"{n:>6} {budget:>9.0f} {scaled:>12.0f} {str(scaled <= budget):>5} {summary['cost_after']:>12.0f} "
+              f"{str(summary['cost_after'] <= budget):>5} {summary['value_kept']:>11.1%} {statistics.median(timings):>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 50, 100, 250, 500])
+    parser.add_argument("--fraction", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,142 @@
+"""
+Record/replay cassettes: recording overhead, file size and replay fidelity.
+
+Builds itineraries (plus a streamed generation of each) through the planner
+against the fake Gemini model and stub Maps while recording a cassette, then
+replays the same requests from the cassette with recorded timings and as fast
+as possible. Reports latency per phase, the upstream calls each phase made,
+whether replayed itineraries match the recorded ones, and the cassette size.
+
+    cd backend && python -m benchmarks.cassette
+"""
+
+from benchmarks.fakes import FakeGenerativeModel
+
+import argparse
+import asyncio
+import gzip
+import os
+import random
+import tempfile
+import time
+
+import httpx
+
+from benchmarks import stub_maps
+from benchmarks.report import print_header, print_row, summarize
+from core.config import settings
+from models.itinerary import ItineraryRequest
+from services.ai_service import AIService
+from services.cassette import Cassette, CassetteMiss
+from services.geocoding import GeocodingStage
+from services.maps_client import MapsGateway
+from services.ml_pipeline import MLPipeline
+from services.planner import ItineraryPlanner
+
+CITIES = ["Paris", "Rome", "Tokyo", "Lisbon", "Kyoto", "Berlin"]
+
+
+def build_planner(model, transport):
+    ai_service = AIService()
+    ai_service.model = model
+    ai_service.cache = ai_service.inflight = None
+    gateway = MapsGateway(base_url="http://stub-maps", transport=transport)
+    gateway.cache = gateway.inflight = None
+    pipeline = MLPipeline(maps_gateway=gateway)
+    return ItineraryPlanner(ai_service, pipeline, GeocodingStage(maps_gateway=gateway)), gateway
+
+
+def stops(day):
+    return sorted((a.place, str(a.coordinates)) for a in day.activities)
+
+
+async def run_phase(planner, requests, concurrency: int):
+    """Build and stream every request; returns the located stops of each and a latency summary"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def build(request):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await planner.build(request)
+            streamed = [day async for day in planner.ai_service.stream_itinerary(request)]
+            latencies.append((time.perf_counter() - start) * 1000)
+            return [stops(day) for day in response.itinerary], [stops(day) for day in streamed]
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(build(request) for request in requests))
+    return results, summarize(latencies, elapsed_s=time.perf_counter() - start)
+
+
+async def main(args):
+    settings.GEOCODE_ITINERARY_PLACES = True
+    settings.TRAVEL_TIME_SOURCE = "distance_matrix"
+    settings.GEOCODE_RATE_PER_SECOND = 0  # Otherwise the geocode rate limit bounds the untimed replay
+    rng = random.Random(args.seed)
+    requests = [
+        ItineraryRequest(city=rng.choice(CITIES), budget=rng.randrange(500, 4000, 50), days=rng.randint(2, 5))
+        for _ in range(args.requests)
+    ]
+    path = os.path.join(tempfile.mkdtemp(), "upstream.jsonl.gz")
+    stub_maps.configure(latency=args.maps_latency, jitter=args.jitter, seed=args.seed)
+    model = FakeGenerativeModel(latency=args.llm_latency, jitter=args.jitter, seed=args.seed)
+
+    phases = [
+        ("record", Cassette(path, "record")),
+        ("replay with timing", None),
+        ("replay, no timing", None),
+    ]
+    print(f"{args.requests} itineraries, {args.concurrency} at a time, Gemini {args.llm_latency * 1000:.0f} ms, "
+          f"Maps {args.maps_latency * 1000:.0f} ms, jitter {args.jitter:.0%}")
+    print_header("phase")
+    recorded, checks = None, []
+    for name, cassette in phases:
+        if cassette is None:
+            cassette = Cassette(path, "replay", replay_timing=name == "replay with timing")
+            planner, gateway = build_planner(cassette.wrap_model(), cassette.transport())
+        else:
+            planner, gateway = build_planner(
+                cassette.wrap_model(model), cassette.transport(httpx.ASGITransport(app=stub_maps.app))
+            )
+        llm_calls, maps_calls = model.calls, stub_maps.app.state.calls
+        results, row = await run_phase(planner, requests, args.concurrency)
+        print_row({"case": name, **row})
+
+        if recorded is None:
+            recorded = results
+        else:
+            matching = sum(a == b for a, b in zip(recorded, results))
+            checks.append(f"{name}: {matching}/{len(results)} itineraries match the recording, "
+                          f"{model.calls - llm_calls} Gemini and {stub_maps.app.state.calls - maps_calls} Maps calls")
+        if name == "record":
+            checks.append(f"record: {model.calls - llm_calls} Gemini and "
+                          f"{stub_maps.app.state.calls - maps_calls} Maps calls recorded")
+        cassette.close()
+        await gateway.aclose()
+        planner.ml_pipeline.close()
+
+    try:
+        await planner.ai_service.model.generate_content_async("Plan 3 days in Atlantis")
+        checks.append("unrecorded request: served (unexpected)")
+    except CassetteMiss as e:
+        checks.append(f"unrecorded request: CassetteMiss ({e})")
+
+    with gzip.open(path, "rb") as f:
+        raw = len(f.read())
+    size = os.path.getsize(path)
+    interactions = cassette.get_stats()["interactions"]
+    print()
+    print("\n".join(checks))
+    print(f"cassette: {interactions} interactions, {size / 1024:.1f} KiB gzipped "
+          f"({raw / 1024:.1f} KiB raw), {size / interactions:.0f} bytes per interaction")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=12)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake Gemini latency in seconds")
+    parser.add_argument("--maps-latency", type=float, default=0.03, help="Stub Maps latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Latency varies by up to this fraction")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,68 @@
+"""
+Attraction clustering: the previous StandardScaler + KMeans fit vs. the
+ClusteringEngine (projected coordinates, MiniBatchKMeans on large inputs,
+per-city warm starts, capacity-constrained balancing).
+
+For each size, reports fit time, mean distance from each attraction to its
+cluster center in kilometers, and the largest/smallest cluster.
+
+    cd backend && python -m benchmarks.clustering
+"""
+
+from benchmarks.fakes import random_points
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+
+from services.clustering import ClusteringEngine, project_local
+
+
+def legacy(lats, lngs, k):
+    coords = StandardScaler().fit_transform(np.column_stack([lats, lngs]))
+    return KMeans(n_clusters=k, random_state=42).fit_predict(coords)
+
+
+def quality(lats, lngs, labels, k):
+    points, _ = project_local(lats, lngs)
+    spread = np.mean([
+        np.linalg.norm(points[labels == c] - points[labels == c].mean(axis=0), axis=1).mean()
+        for c in range(k) if np.any(labels == c)
+    ])
+    sizes = np.bincount(labels, minlength=k)
+    return spread, sizes.max(), sizes.min()
+
+
+def main(args):
+    warnings.simplefilter("ignore", FutureWarning)
+    print(f"{args.clusters} clusters, clustered points around Paris")
+    print(f"{'n':>7} {'method':<18} {'ms':>9} {'km to center':>13} {'largest':>8} {'smallest':>9}")
+    for n in args.sizes:
+        points = random_points(n, seed=n, clustered=True)
+        lats = [p["lat"] for p in points]
+        lngs = [p["lng"] for p in points]
+
+        engine = ClusteringEngine()
+        runs = [
+            ("previous", lambda: legacy(lats, lngs, args.clusters)),
+            ("engine, cold", lambda: engine.fit(lats, lngs, args.clusters, city="Paris")[0]),
+            ("engine, warm", lambda: engine.fit(lats, lngs, args.clusters, city="Paris")[0]),
+            ("balanced", lambda: engine.fit(lats, lngs, args.clusters, algorithm="balanced")[0]),
+        ]
+        for label, run in runs:
+            start = time.perf_counter()
+            labels = run()
+            elapsed = (time.perf_counter() - start) * 1000
+            spread, largest, smallest = quality(lats, lngs, labels, args.clusters)
+            print(f"{n:>7} {label:<18} {elapsed:>9.1f} {spread:>13.2f} {largest:>8} {smallest:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000, 50000])
+    parser.add_argument("--clusters", type=int, default=7)
+    main(parser.parse_args())
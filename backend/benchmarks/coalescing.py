@@ -0,0 +1,115 @@
+"""
+Single-flight request coalescing for identical in-flight calls.
+
+Sends bursts of identical concurrent ``/generate-itinerary`` requests (with
+the itinerary cache off, as on a cold key) and identical geocode calls (Maps
+cache off) with and without coalescing, and reports upstream calls and wall
+time. Then checks that an upstream error reaches every waiting caller and
+that cancelling one caller leaves the others' shared call running.
+
+    cd backend && python -m benchmarks.coalescing
+"""
+
+from benchmarks.fakes import FakeGenerativeModel
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks import stub_maps
+from routers import itinerary
+from services.maps_client import MapsGateway
+from services.single_flight import SingleFlight
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(itinerary.router, prefix="/api/v1")
+    return app
+
+
+async def llm_burst(client, model, callers: int, coalesce: bool):
+    itinerary.ai_service.inflight = SingleFlight() if coalesce else None
+    payload = {"city": "Lisbon", "budget": 1200, "days": 3, "interests": ["food"]}
+    model.calls = 0
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(
+        client.post("/api/v1/generate-itinerary", json=payload) for _ in range(callers)
+    ))
+    assert all(r.status_code == 200 for r in responses)
+    return model.calls, time.perf_counter() - start
+
+
+async def maps_burst(gateway, callers: int, coalesce: bool):
+    gateway.inflight = SingleFlight() if coalesce else None
+    stub_maps.app.state.calls = 0
+    start = time.perf_counter()
+    await asyncio.gather(*(gateway.geocode("Belem Tower, Lisbon") for _ in range(callers)))
+    return stub_maps.app.state.calls, time.perf_counter() - start
+
+
+async def semantics():
+    flight = SingleFlight()
+    runs = 0
+
+    async def failing():
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.05)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(*(flight.do("k", failing) for _ in range(5)), return_exceptions=True)
+    assert runs == 1 and all(isinstance(r, RuntimeError) for r in results)
+
+    async def slow():
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    first = asyncio.create_task(flight.do("s", slow))
+    second = asyncio.create_task(flight.do("s", slow))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    assert await second == ("ok", True)
+
+    lone = asyncio.create_task(flight.do("c", slow))
+    await asyncio.sleep(0.01)
+    lone.cancel()
+    await asyncio.gather(lone, return_exceptions=True)
+    assert len(flight) == 0
+    return flight.get_stats()
+
+
+async def main(args):
+    app = build_app()
+    model = FakeGenerativeModel(latency=args.latency)
+    itinerary.ai_service.model = model
+    itinerary.ai_service.cache = None
+    stub_maps.LATENCY = args.maps_latency
+    gateway = MapsGateway(base_url="http://stub-maps", transport=httpx.ASGITransport(app=stub_maps.app))
+    gateway.cache = None
+
+    print(f"{'call':<20} {'callers':>8} {'coalesce':>9} {'upstream':>9} {'secs':>7}")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        for callers in args.callers:
+            for coalesce in (False, True):
+                calls, elapsed = await llm_burst(client, model, callers, coalesce)
+                print(f"{'/generate-itinerary':<20} {callers:>8} {str(coalesce):>9} {calls:>9} {elapsed:>7.2f}")
+    for callers in args.callers:
+        for coalesce in (False, True):
+            calls, elapsed = await maps_burst(gateway, callers, coalesce)
+            print(f"{'geocode':<20} {callers:>8} {str(coalesce):>9} {calls:>9} {elapsed:>7.2f}")
+    await gateway.aclose()
+
+    stats = await semantics()
+    print(f"error propagation and cancellation: ok {stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--callers", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake Gemini latency in seconds")
+    parser.add_argument("--maps-latency", type=float, default=0.1, help="Stub Maps latency in seconds")
+    asyncio.run(main(parser.parse_args()))
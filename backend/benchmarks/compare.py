@@ -0,0 +1,59 @@
+"""
+Compare two JSON result files written by the suite benchmarks.
+
+Matches rows by ``case`` and prints throughput and p50/p95/p99 for the
+baseline and candidate runs with the relative change; latency increases or
+throughput drops beyond ``--threshold`` are flagged, and ``--fail`` turns
+them into a non-zero exit status.
+
+    cd backend && python -m benchmarks.compare baseline.json candidate.json
+"""
+
+import argparse
+import json
+import sys
+
+METRICS = (("throughput_per_s", 1), ("p50_ms", -1), ("p95_ms", -1), ("p99_ms", -1))
+
+
+def load(path: str):
+    with open(path) as f:
+        document = json.load(f)
+    return document, {row["case"]: row for row in document["results"]}
+
+
+def main(args) -> int:
+    base_doc, base = load(args.baseline)
+    cand_doc, cand = load(args.candidate)
+    if base_doc["benchmark"] != cand_doc["benchmark"]:
+        print(f"warning: comparing {base_doc['benchmark']} with {cand_doc['benchmark']}")
+    print(f"baseline  {base_doc.get('commit')} {base_doc['created_at']}")
+    print(f"candidate {cand_doc.get('commit')} {cand_doc['created_at']}")
+    print(f"{'case':<34} {'metric':<17} {'baseline':>10} {'candidate':>10} {'change':>8}")
+
+    regressions = 0
+    for case, row in base.items():
+        if case not in cand:
+            print(f"{case:<34} missing from candidate")
+            continue
+        for metric, better in METRICS:
+            old, new = row[metric], cand[case][metric]
+            change = (new - old) / old if old else 0.0
+            flag = ""
+            if change * better < -args.threshold:
+                flag = "  <-- regression"
+                regressions += 1
+            print(f"{case:<34} {metric:<17} {old:>10.2f} {new:>10.2f} {change:>+8.1%}{flag}")
+
+    for case in cand.keys() - base.keys():
+        print(f"{case:<34} new in candidate")
+    return 1 if args.fail and regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change flagged as a regression")
+    parser.add_argument("--fail", action="store_true", help="Exit non-zero when a regression is flagged")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,66 @@
+"""
+Summed route distance with the model's day assignment vs. ``plan_days``.
+
+Builds itineraries whose stops are drawn from a few neighbourhoods and
+spread over the days at random (as model output often is), then routes every
+day as generated and after regrouping with ``MLPipeline.plan_days``. Reports
+the summed ``total_distance`` and ``total_travel_time`` of all days, with
+and without time-window scheduling.
+
+    cd backend && python -m benchmarks.day_planning
+"""
+
+from benchmarks.fakes import build_located_days
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from core.config import settings
+from services.ml_pipeline import MLPipeline
+
+
+async def totals(pipeline: MLPipeline, itineraries):
+    distance, minutes = 0.0, 0
+    for days in itineraries:
+        for route in await pipeline.optimize_daily_routes(days):
+            distance += route.total_distance
+            minutes += route.total_travel_time
+    return distance, minutes
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    pipeline = MLPipeline()
+    itineraries = [
+        build_located_days(rng.randint(3, 7), args.stops, seed=i, clustered=True)
+        for i in range(args.itineraries)
+    ]
+
+    planning_ms = []
+    planned = []
+    for days in itineraries:
+        start = time.perf_counter()
+        planned.append(await pipeline.plan_days(days, city=f"city-{len(planned)}"))
+        planning_ms.append((time.perf_counter() - start) * 1000)
+
+    stops = sum(len(d.activities) + len(d.dining) for days in itineraries for d in days)
+    print(f"{args.itineraries} itineraries, {stops} stops, plan_days p50 {statistics.median(planning_ms):.1f} ms")
+    print(f"{'scheduling':<12} {'assignment':<12} {'total km':>10} {'travel min':>11}")
+    for windows in (False, True):
+        settings.SCHEDULE_TIME_WINDOWS = windows
+        before = await totals(pipeline, itineraries)
+        after = await totals(pipeline, planned)
+        label = "windows" if windows else "distance"
+        print(f"{label:<12} {'as generated':<12} {before[0]:>10.1f} {before[1]:>11}")
+        print(f"{label:<12} {'plan_days':<12} {after[0]:>10.1f} {after[1]:>11}  ({after[0] / before[0] - 1:+.1%} km)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--itineraries", type=int, default=40)
+    parser.add_argument("--stops", type=int, default=8, help="Stops per day")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
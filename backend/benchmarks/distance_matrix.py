@@ -0,0 +1,74 @@
+"""
+Per-pair scalar Haversine vs. the vectorized distance matrix.
+
+For 10, 100 and 1,000 locations, times building all pairwise distances with
+the scalar ``haversine_km`` against ``location_distance_matrix``, and a full
+nearest neighbor route both ways (the scalar version is the per-pair
+``_find_nearest`` loop the pipeline used before, against
+``nearest_neighbour_order`` on the matrix). Also checks that both produce the
+same route. The full solver's quality and runtime are measured by
+``benchmarks.route_solver``.
+
+    cd backend && python -m benchmarks.distance_matrix
+"""
+
+from benchmarks.fakes import random_points
+
+import argparse
+import time
+
+import numpy as np
+
+from services.routing import haversine_km, location_distance_matrix, nearest_neighbour_order
+
+
+def scalar_matrix(locations):
+    return [[haversine_km(a["coordinates"], b["coordinates"]) for b in locations] for a in locations]
+
+
+def scalar_nearest_neighbour(locations):
+    unvisited = locations[1:]
+    current = locations[0]
+    route = [current]
+    while unvisited:
+        nearest = min(unvisited, key=lambda c: haversine_km(current["coordinates"], c["coordinates"]))
+        route.append(nearest)
+        unvisited.remove(nearest)
+        current = nearest
+    return route
+
+
+def best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(args):
+    print(f"{'n':>6} {'scalar matrix':>14} {'vector matrix':>14} {'speedup':>8} "
+          f"{'scalar NN':>10} {'matrix NN':>10} {'speedup':>8} {'same':>5}")
+    for n in args.sizes:
+        locations = [{"name": str(i), "coordinates": c} for i, c in enumerate(random_points(n, seed=n))]
+        repeats = 1 if n >= 1000 else 5
+
+        scalar_ms = best_of(lambda: scalar_matrix(locations), repeats)
+        vector_ms = best_of(lambda: location_distance_matrix(locations), repeats)
+        scalar_nn_ms = best_of(lambda: scalar_nearest_neighbour(list(locations)), repeats)
+        matrix_nn_ms = best_of(lambda: nearest_neighbour_order(location_distance_matrix(locations)), repeats)
+
+        same = [loc["name"] for loc in scalar_nearest_neighbour(list(locations))] == \
+               [locations[i]["name"] for i in nearest_neighbour_order(location_distance_matrix(locations))]
+        if n <= 100:
+            assert np.allclose(scalar_matrix(locations), location_distance_matrix(locations))
+
+        print(f"{n:>6} {scalar_ms:>12.2f}ms {vector_ms:>12.3f}ms {scalar_ms / vector_ms:>7.0f}x "
+              f"{scalar_nn_ms:>8.1f}ms {matrix_nn_ms:>8.2f}ms {scalar_nn_ms / matrix_nn_ms:>7.0f}x {str(same):>5}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    main(parser.parse_args())
@@ -0,0 +1,209 @@
+"""
+Deterministic stand-ins for upstream services used by the benchmarks.
+
+Importing this module sets placeholder API keys so that the services can be
+constructed without real credentials, and keeps travel times and geocoding
+offline unless a benchmark supplies its own Maps stub.
+"""
+
+import os
+
+os.environ.setdefault("GEMINI_API_KEY", "fake-gemini-key")
+os.environ.setdefault("GOOGLE_MAPS_API_KEY", "AIzaFakeMapsKeyForBenchmarks0000000000")
+os.environ.setdefault("TRAVEL_TIME_SOURCE", "haversine")
+os.environ.setdefault("GEOCODE_ITINERARY_PLACES", "false")
+
+import asyncio
+import json
+import random
+import re
+import time
+from typing import Any, Dict, List
+
+
+class FakeResponse:
+    """Minimal object exposing the ``text`` attribute of a Gemini response"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeStreamResponse:
+    """Async-iterable response that releases its text in evenly timed chunks"""
+
+    def __init__(self, text: str, latency: float, chunks: int):
+        self.text = text
+        self.latency = latency
+        self.chunks = max(1, chunks)
+
+    async def __aiter__(self):
+        size = -(-len(self.text) // self.chunks)
+        for start in range(0, len(self.text), size):
+            await asyncio.sleep(self.latency / self.chunks)
+            yield FakeResponse(self.text[start:start + size])
+
+
+class FakeUpstreamError(Exception):
+    """Injected upstream failure, shaped like a Gemini quota error"""
+
+    def __init__(self, message: str = "429 Resource has been exhausted (e.g. check quota)."):
+        super().__init__(message)
+
+
+def jittered(latency: float, jitter: float, rng: random.Random) -> float:
+    """``latency`` scaled by a uniform factor in [1 - jitter, 1 + jitter]"""
+    if not jitter:
+        return latency
+    return max(0.0, latency * (1 + rng.uniform(-jitter, jitter)))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+class FakeGenerativeModel:
+    """Stand-in for ``genai.GenerativeModel``
+
+    Each call takes ``latency`` seconds plus ``token_latency`` per output
+    token. Prompts that ask for a "JSON array" get the itinerary as JSON,
+    anything else gets a natural-language plan of similar length.
+    ``json_failure_rate`` is the fraction of single-pass JSON responses (not
+    refinements of a raw itinerary) that come back truncated. Streaming calls spread the latency over ``stream_chunks``.
+    ``jitter`` varies each call's latency by up to that fraction, and
+    ``error_rate`` is the fraction of calls that raise ``FakeUpstreamError``
+    after their latency. All randomness comes from ``seed``.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        stream_chunks: int = 20,
+        token_latency: float = 0.0,
+        json_failure_rate: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.stream_chunks = stream_chunks
+        self.token_latency = token_latency
+        self.json_failure_rate = json_failure_rate
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+    def _respond(self, prompt: str) -> FakeResponse:
+        days = _days_from_prompt(prompt)
+        if "JSON array" in prompt:
+            text = json.dumps(build_fake_days(days), indent=2)
+            if "Raw Itinerary" not in prompt and self.rng.random() < self.json_failure_rate:
+                text = text[: len(text) // 2]
+        else:
+            text = f"Days: {days}\n" + "\n".join(
+                f"Day {d}, {slot}: visit Attraction {d}-{i}, a well-known sight, for about "
+                f"{60 + 15 * i} minutes at roughly ${10 + 5 * i}. Then dinner at Restaurant "
+                f"{d}-{i}, popular with locals, around ${20 + 10 * i} per person."
+                for d in range(1, days + 1)
+                for i, slot in enumerate(("Morning", "Afternoon", "Evening"))
+            )
+
+        self.calls += 1
+        self.prompt_tokens += estimate_tokens(prompt)
+        self.output_tokens += estimate_tokens(text)
+        return FakeResponse(text)
+
+    def _delay(self, response: FakeResponse) -> float:
+        latency = self.latency + self.token_latency * estimate_tokens(response.text)
+        return jittered(latency, self.jitter, self.rng)
+
+    def _maybe_fail(self):
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors += 1
+            raise FakeUpstreamError()
+
+    def generate_content(self, prompt: str, **kwargs) -> FakeResponse:
+        response = self._respond(prompt)
+        time.sleep(self._delay(response))
+        self._maybe_fail()
+        return response
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, **kwargs):
+        response = self._respond(prompt)
+        if stream:
+            self._maybe_fail()
+            return FakeStreamResponse(response.text, self._delay(response), self.stream_chunks)
+        await asyncio.sleep(self._delay(response))
+        self._maybe_fail()
+        return response
+
+
+def _days_from_prompt(prompt: str) -> int:
+    match = re.search(r"Days:\s*(\d+)", prompt)
+    return int(match.group(1)) if match else 3
+
+
+def build_fake_days(days: int, activities_per_day: int = 3, dining_per_day: int = 2) -> List[Dict[str, Any]]:
+    """Build a JSON-ready itinerary in the shape the refiner prompt asks for"""
+    slots = ["morning", "afternoon", "evening"]
+    return [
+        {
+            "day": d,
+            "summary": f"Day {d} around the city",
+            "activities": [
+                {
+                    "time": slots[i % len(slots)],
+                    "place": f"Attraction {d}-{i}",
+                    "description": "A well-known sight",
+                    "cost": 10.0 + 5 * i,
+                    "duration_minutes": 60 + 15 * i,
+                    "category": "attraction",
+                }
+                for i in range(activities_per_day)
+            ],
+            "dining": [
+                {
+                    "name": f"Restaurant {d}-{j}",
+                    "cuisine": "local",
+                    "description": "Popular with locals",
+                    "price_per_person": 20.0 + 10 * j,
+                    "price_range": "$$",
+                }
+                for j in range(dining_per_day)
+            ],
+        }
+        for d in range(1, days + 1)
+    ]
+
+
+def random_points(n: int, seed: int = 0, clustered: bool = False, center=(48.8566, 2.3522)) -> List[Dict[str, float]]:
+    """Coordinates within ~10 km of ``center``, uniform or grouped into a few hot spots"""
+    rng = random.Random(seed)
+    if not clustered:
+        return [
+            {"lat": center[0] + rng.uniform(-0.09, 0.09), "lng": center[1] + rng.uniform(-0.13, 0.13)}
+            for _ in range(n)
+        ]
+    hubs = [(center[0] + rng.uniform(-0.07, 0.07), center[1] + rng.uniform(-0.1, 0.1)) for _ in range(max(1, n // 10))]
+    points = []
+    for _ in range(n):
+        lat, lng = rng.choice(hubs)
+        points.append({"lat": lat + rng.gauss(0, 0.004), "lng": lng + rng.gauss(0, 0.006)})
+    return points
+
+
+def build_located_days(days: int, stops_per_day: int, seed: int = 0, clustered: bool = False):
+    """Build ``Day`` models whose activities and dining all carry coordinates"""
+    from models.itinerary import Day
+
+    data = build_fake_days(days, activities_per_day=stops_per_day - max(1, stops_per_day // 4),
+                           dining_per_day=max(1, stops_per_day // 4))
+    points = iter(random_points(days * stops_per_day, seed=seed, clustered=clustered))
+    for day in data:
+        for item in day["activities"] + day["dining"]:
+            item["coordinates"] = next(points)
+    return [Day(**day) for day in data]
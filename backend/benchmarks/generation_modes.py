@@ -0,0 +1,64 @@
+"""
+Compare the "two_step" and "single_pass" generation modes.
+
+Runs ``AIService.generate_itinerary`` with a fake model whose latency grows
+with output length, and reports model calls, estimated tokens and wall time
+per itinerary. ``--failure-rate`` truncates that fraction of single-pass
+JSON responses so the fallback to prompt chaining is exercised.
+
+    cd backend && python -m benchmarks.generation_modes
+"""
+
+from benchmarks.fakes import FakeGenerativeModel
+
+import argparse
+import asyncio
+import time
+
+from models.itinerary import ItineraryRequest
+from services.ai_service import AIService
+
+
+async def run_mode(mode: str, args) -> dict:
+    service = AIService()
+    service.cache = None
+    service.generation_mode = mode
+    service.model = FakeGenerativeModel(
+        latency=args.latency,
+        token_latency=args.token_latency,
+        json_failure_rate=args.failure_rate,
+        seed=1,
+    )
+
+    start = time.perf_counter()
+    for i in range(args.itineraries):
+        await service.generate_itinerary(ItineraryRequest(city=f"City {i}", budget=2000, days=args.days))
+    elapsed = time.perf_counter() - start
+
+    model = service.model
+    return {
+        "mode": mode,
+        "calls": model.calls / args.itineraries,
+        "prompt_tokens": model.prompt_tokens / args.itineraries,
+        "output_tokens": model.output_tokens / args.itineraries,
+        "seconds": elapsed / args.itineraries,
+    }
+
+
+async def main(args):
+    print(f"per itinerary ({args.days} days, failure rate {args.failure_rate:.0%}):")
+    print(f"{'mode':>12} {'calls':>6} {'prompt tok':>11} {'output tok':>11} {'wall s':>7}")
+    for mode in ("two_step", "single_pass"):
+        r = await run_mode(mode, args)
+        print(f"{r['mode']:>12} {r['calls']:>6.2f} {r['prompt_tokens']:>11.0f} "
+              f"{r['output_tokens']:>11.0f} {r['seconds']:>7.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--itineraries", type=int, default=10)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.3, help="Fixed latency per call in seconds")
+    parser.add_argument("--token-latency", type=float, default=0.0005, help="Seconds per output token")
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    asyncio.run(main(parser.parse_args()))
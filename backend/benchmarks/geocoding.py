@@ -0,0 +1,98 @@
+"""
+Bulk geocoding of generated itineraries.
+
+First compares geocoding every activity and restaurant one after another
+(what a naive per-item lookup would do) with ``GeocodingStage``, which
+dedupes names and geocodes them concurrently under the rate limit. Then runs
+``/generate-itinerary`` end to end with the fake model and the stub Maps
+server, with and without the stage, and prints the per-stage timings and how
+many stops each day's route covers.
+
+    cd backend && python -m benchmarks.geocoding
+"""
+
+from benchmarks.fakes import FakeGenerativeModel, build_fake_days
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks import stub_maps
+from core.config import settings
+from models.itinerary import Day
+from routers import itinerary
+from services.geocoding import GeocodingStage
+from services.maps_client import MapsGateway
+
+
+def repetitive_days(days: int):
+    """Days that revisit a few favourite restaurants, as model output often does"""
+    data = build_fake_days(days, activities_per_day=5, dining_per_day=3)
+    for day in data:
+        for j, dining in enumerate(day["dining"]):
+            dining["name"] = f"Restaurant {(day['day'] + j) % 6}"
+    return [Day(**day) for day in data]
+
+
+async def compare_stage(gateway: MapsGateway, args):
+    days = repetitive_days(args.days)
+    items = [item for day in days for item in day.activities + day.dining]
+
+    gateway.cache = None
+    stub_maps.app.state.calls = 0
+    start = time.perf_counter()
+    for item in items:
+        await gateway.geocode(f"{getattr(item, 'place', None) or item.name}, Paris")
+    naive_ms = (time.perf_counter() - start) * 1000
+    naive_calls = stub_maps.app.state.calls
+
+    stub_maps.app.state.calls = 0
+    stats = await GeocodingStage(gateway).geocode_days(days, "Paris")
+    print(f"{args.days} days, {len(items)} places, {stats['unique_places']} unique names")
+    print(f"{'strategy':<18} {'upstream calls':>15} {'ms':>9}")
+    print(f"{'one by one':<18} {naive_calls:>15} {naive_ms:>9.1f}")
+    print(f"{'GeocodingStage':<18} {stub_maps.app.state.calls:>15} {stats['latency_ms']:>9.1f}")
+    print(f"resolved {stats['resolved']}, unresolved {stats['unresolved']}")
+
+
+async def end_to_end(gateway: MapsGateway, args):
+    app = FastAPI()
+    app.include_router(itinerary.router, prefix="/api/v1")
+    itinerary.ai_service.model = FakeGenerativeModel(latency=args.model_latency)
+    itinerary.ai_service.cache = None
+    itinerary.geocoding_stage.gmaps = gateway
+    payload = {"city": "Paris", "budget": 3000, "days": args.days}
+
+    print()
+    print(f"/generate-itinerary, {args.days} days")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for enabled in (False, True):
+            settings.GEOCODE_ITINERARY_PLACES = enabled
+            body = (await client.post("/api/v1/generate-itinerary", json=payload)).json()
+            located = sum(
+                1 for day in body["itinerary"] for item in day["activities"] + day["dining"] if item["coordinates"]
+            )
+            total = sum(len(day["activities"]) + len(day["dining"]) for day in body["itinerary"])
+            label = "with geocoding" if enabled else "without geocoding"
+            print(f"  {label:<18} located stops {located}/{total}, timings (ms) {body['timings_ms']}")
+
+
+async def main(args):
+    stub_maps.LATENCY = args.latency
+    gateway = MapsGateway(base_url="http://stub-maps", transport=httpx.ASGITransport(app=stub_maps.app))
+    await compare_stage(gateway, args)
+
+    gateway = MapsGateway(base_url="http://stub-maps", transport=httpx.ASGITransport(app=stub_maps.app))
+    await end_to_end(gateway, args)
+    await gateway.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub Maps latency in seconds")
+    parser.add_argument("--model-latency", type=float, default=0.2)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,65 @@
+"""
+Latency of repeated ``generate_itinerary`` calls with the itinerary cache.
+
+Sends a mix of equivalent requests (same city with different casing, interest
+order and budgets in the same band) and reports cold vs. warm latency and the
+cache counters. Pass ``--db`` to also exercise the SQLite tier.
+
+    cd backend && python -m benchmarks.itinerary_cache
+"""
+
+from benchmarks.fakes import FakeGenerativeModel
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from core.config import settings
+from models.itinerary import ItineraryRequest
+from services.ai_service import AIService
+from services.itinerary_cache import ItineraryCache
+
+
+VARIANTS = [
+    {"city": "Paris", "budget": 1500, "days": 3, "interests": ["museums", "food"]},
+    {"city": " paris ", "budget": 1650, "days": 3, "interests": ["Food", "museums"]},
+    {"city": "PARIS", "budget": 1900, "days": 3, "interests": ["food", "Museums"]},
+]
+
+
+async def timed(service: AIService, payload: dict) -> float:
+    start = time.perf_counter()
+    await service.generate_itinerary(ItineraryRequest(**payload))
+    return (time.perf_counter() - start) * 1000
+
+
+async def main(args):
+    if args.db:
+        settings.ITINERARY_CACHE_DB_PATH = os.path.join(tempfile.mkdtemp(), "itinerary_cache.db")
+
+    service = AIService()
+    service.model = FakeGenerativeModel(latency=args.latency)
+    service.cache = ItineraryCache()
+
+    cold = await timed(service, VARIANTS[0])
+    warm = [await timed(service, VARIANTS[i % len(VARIANTS)]) for i in range(args.repeats)]
+    print(f"cold request:      {cold:8.2f} ms ({service.model.calls} model calls)")
+    print(f"warm request mean: {sum(warm) / len(warm):8.2f} ms over {len(warm)} requests")
+
+    if args.db:
+        # A new process would start with an empty memory tier
+        service.cache.store.memory.clear()
+        print(f"disk-tier request: {await timed(service, VARIANTS[1]):8.2f} ms")
+
+    print(f"model calls total: {service.model.calls}")
+    print(f"cache stats:       {service.cache.get_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=1.0, help="Fake Gemini latency in seconds")
+    parser.add_argument("--db", action="store_true", help="Enable the SQLite tier")
+    asyncio.run(main(parser.parse_args()))
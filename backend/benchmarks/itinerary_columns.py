@@ -0,0 +1,152 @@
+"""
+Memory and CPU of the columnar itinerary view vs. walking the Day models.
+
+For large itineraries, compares what the pipeline stages used to do on the
+models (per-location dicts walked from every day as solver input, a distance
+matrix from those dicts, a second dict per stop for the scheduled response,
+nested cost sums) with ``ItineraryColumns`` (one build, then array slices as
+solver input, matrices and totals from the arrays, and one dict per stop
+built only for the response), and checks that both give the same response
+stops and the lossless round trip back to ``Day``. The per-request line
+charges the whole view build to routing and totals, although a request also
+reuses the view for day planning and budgeting.
+
+    cd backend && python -m benchmarks.itinerary_columns
+"""
+
+from benchmarks.fakes import build_located_days
+
+import argparse
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from services.itinerary_columns import ItineraryColumns
+from services.routing import haversine_matrix, location_distance_matrix
+
+
+def extract_locations(day):
+    """The pipeline's previous per-day walk over the models"""
+    locations = []
+    for activity in day.activities:
+        if activity.coordinates:
+            locations.append({
+                'name': activity.place,
+                'type': 'activity',
+                'coordinates': activity.coordinates,
+                'duration': activity.duration_minutes or 60,
+                'time_slot': activity.time
+            })
+    for dining in day.dining:
+        if dining.coordinates:
+            locations.append({
+                'name': dining.name,
+                'type': 'dining',
+                'coordinates': dining.coordinates,
+                'duration': 90,
+                'time_slot': 'meal'
+            })
+    return locations
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return result, best
+
+
+def allocated(fn):
+    tracemalloc.start()
+    result = fn()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main(args):
+    print(f"{'days':>5} {'stops':>7} {'step':<22} {'models ms':>10} {'columns ms':>11} {'models KiB':>11} {'columns KiB':>12}")
+    for n_days in args.days:
+        days = build_located_days(n_days, args.stops, seed=n_days)
+        stops = n_days * args.stops
+
+        # Building the view, once per request
+        columns, build_ms = timed(lambda: ItineraryColumns.from_days(days), args.repeat)
+        assert columns.to_days() == days and all(a is b for a, b in zip(columns.to_days(), days))
+
+        # Per-day solver inputs
+        def model_inputs():
+            return [extract_locations(day) for day in days]
+
+        def column_inputs():
+            inputs = []
+            for d in range(n_days):
+                r = columns.located_rows(d)
+                inputs.append((r, columns.lat[r], columns.lng[r], columns.slot_names(r), columns.duration[r]))
+            return inputs
+
+        (locations, loc_ms), (inputs, col_ms) = timed(model_inputs, args.repeat), timed(column_inputs, args.repeat)
+        _, loc_bytes = allocated(model_inputs)
+        _, input_bytes = allocated(column_inputs)
+        col_bytes = input_bytes + sys.getsizeof(columns.items) + sum(
+            a.nbytes for a in (columns.day, columns.kind, columns.lat, columns.lng, columns.cost,
+                               columns.duration, columns.slot, columns.rating)
+        )
+        print(f"{n_days:>5} {stops:>7} {'solver inputs':<22} {loc_ms:>10.2f} {col_ms:>11.2f} "
+              f"{loc_bytes / 1024:>11.0f} {col_bytes / 1024:>12.0f}")
+
+        # Scheduled stops for the response: the scheduler used to copy each input dict
+        times = {'window': 'morning', 'travel_minutes': 5, 'arrival': '09:00',
+                 'start': '09:00', 'departure': '10:00', 'late_minutes': 0}
+
+        def model_response():
+            return [[{**loc, **times} for loc in day_locations] for day_locations in locations]
+
+        def column_response():
+            route = [columns.locations(r) for r, *_ in inputs]
+            for day_stops in route:
+                for stop in day_stops:
+                    stop.update(times)
+            return route
+
+        (response, response_ms), (route, route_ms) = timed(model_response, args.repeat), timed(column_response, args.repeat)
+        assert route == response
+        _, response_bytes = allocated(model_response)
+        _, route_bytes = allocated(column_response)
+        print(f"{'':>5} {'':>7} {'response stops':<22} {response_ms:>10.2f} {route_ms:>11.2f} "
+              f"{response_bytes / 1024:>11.0f} {route_bytes / 1024:>12.0f}")
+
+        # Distance matrices
+        rows = [columns.located_rows(d) for d in range(n_days)]
+        _, matrix_ms = timed(lambda: [location_distance_matrix(loc) for loc in locations], args.repeat)
+        _, column_matrix_ms = timed(lambda: [haversine_matrix(columns.lat[r], columns.lng[r]) for r in rows], args.repeat)
+        print(f"{'':>5} {'':>7} {'distance matrices':<22} {matrix_ms:>10.2f} {column_matrix_ms:>11.2f}")
+
+        # Totals, as the router and budget stages compute them
+        def model_totals():
+            return sum(
+                sum(a.cost or 0 for a in day.activities) + sum(m.price_per_person or 0 for m in day.dining)
+                for day in days
+            )
+        total, total_ms = timed(model_totals, args.repeat)
+        column_total, column_total_ms = timed(columns.total_cost, args.repeat)
+        assert np.isclose(total, column_total)
+        print(f"{'':>5} {'':>7} {'cost totals':<22} {total_ms:>10.2f} {column_total_ms:>11.2f}")
+        print(f"{'':>5} {'':>7} {'view build (once)':<22} {'':>10} {build_ms:>11.2f}")
+
+        # A request routes every day once and totals costs three times (budget check, response, breakdown)
+        models = loc_ms + matrix_ms + response_ms + 3 * total_ms
+        view = build_ms + col_ms + column_matrix_ms + route_ms + 3 * column_total_ms
+        print(f"{'':>5} {'':>7} {'per request':<22} {models:>10.2f} {view:>11.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, nargs="+", default=[7, 30, 100])
+    parser.add_argument("--stops", type=int, default=100, help="Stops per day")
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
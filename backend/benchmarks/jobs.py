@@ -0,0 +1,117 @@
+"""
+Background job queue: submit latency, throughput and restart recovery.
+
+Submits itinerary jobs through ``POST /jobs`` against a fake model and
+compares the time a client waits for a response with the blocking
+``/generate-itinerary`` call. Halfway through, the queue is stopped and a new
+one is started on the same SQLite store, as after a server restart; every
+job must still complete on its first counted attempt, with no more than
+``--workers`` running at once.
+
+    cd backend && python -m benchmarks.jobs
+"""
+
+from benchmarks.fakes import FakeGenerativeModel
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI
+
+os.environ.setdefault("JOBS_DB_PATH", os.path.join(tempfile.mkdtemp(), "jobs.db"))
+
+from core.config import settings
+from routers import itinerary, jobs
+from services.jobs import JobStore
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(itinerary.router, prefix="/api/v1")
+    app.include_router(jobs.router, prefix="/api/v1")
+    return app
+
+
+def track_concurrency(planner):
+    """Wrap ``planner.build`` to record the most builds in flight at once"""
+    build = planner.build
+    state = {"active": 0, "peak": 0}
+
+    async def tracked(request):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        try:
+            return await build(request)
+        finally:
+            state["active"] -= 1
+
+    planner.build = tracked
+    return state
+
+
+async def main(args):
+    app = build_app()
+    itinerary.ai_service.model = FakeGenerativeModel(latency=args.latency)
+    itinerary.ai_service.cache = None
+    itinerary.ai_service.inflight = None
+    concurrency = track_concurrency(itinerary.planner)
+    payloads = [
+        {"city": "Paris", "budget": 1000 + 10 * i, "days": 3, "interests": ["museums"]}
+        for i in range(args.jobs)
+    ]
+
+    settings.JOBS_MAX_CONCURRENCY = args.workers
+    await jobs.start_job_queue()
+    store = JobStore(settings.JOBS_DB_PATH)  # Second connection to watch progress across the restart
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        await client.post("/api/v1/generate-itinerary", json=payloads[0])
+        blocking_ms = (time.perf_counter() - start) * 1000
+
+        start_all = time.perf_counter()
+        submit_ms, job_ids = [], []
+        for payload in payloads:
+            start = time.perf_counter()
+            response = await client.post("/api/v1/jobs", json=payload)
+            submit_ms.append((time.perf_counter() - start) * 1000)
+            job_ids.append(response.json()["job_id"])
+
+        # Restart: drop the running queue once part of the work is done
+        while store.counts().get("completed", 0) < args.jobs // 2:
+            await asyncio.sleep(0.02)
+        await jobs.stop_job_queue()
+        before_restart = store.counts()
+        await jobs.start_job_queue()
+
+        pending = set(job_ids)
+        while pending:
+            await asyncio.sleep(0.05)
+            for job_id in list(pending):
+                status = (await client.get(f"/api/v1/jobs/{job_id}")).json()
+                if status["status"] in ("completed", "failed"):
+                    assert status["status"] == "completed" and status["attempts"] == 1, status
+                    pending.discard(job_id)
+        elapsed = time.perf_counter() - start_all
+        await jobs.stop_job_queue()
+
+    print(f"{args.jobs} jobs, {args.workers} workers, fake latency {args.latency * 1000:.0f} ms per call")
+    print(f"blocking /generate-itinerary: {blocking_ms:8.1f} ms")
+    print(f"POST /jobs p50 / max:         {statistics.median(submit_ms):8.1f} / {max(submit_ms):.1f} ms")
+    print(f"stopped with {before_restart} -> all {args.jobs} completed after restart")
+    print(f"peak concurrent builds: {concurrency['peak']} (limit {args.workers})")
+    print(f"throughput: {args.jobs / elapsed * 60:.0f} itineraries/min")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--jobs", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake Gemini latency in seconds")
+    asyncio.run(main(parser.parse_args()))
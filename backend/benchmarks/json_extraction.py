@@ -0,0 +1,90 @@
+"""
+Regression corpus and fuzzing for the LLM JSON extractor.
+
+Checks every case in ``fixtures/malformed_llm_outputs.json`` both as a whole
+response and streamed in random chunk sizes, then fuzzes random truncation
+points of valid itineraries (every day closed before the cut must be
+recovered). Reports mismatches and parser throughput; exits non-zero if any
+case regresses.
+
+    cd backend && python -m benchmarks.json_extraction
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from benchmarks.fakes import build_fake_days
+from services.json_stream import DayStreamParser, extract_days
+
+CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "malformed_llm_outputs.json")
+
+
+def parse_chunked(text: str, rng: random.Random):
+    parser = DayStreamParser()
+    objects, pos = [], 0
+    while pos < len(text):
+        size = rng.randint(1, 64)
+        objects += parser.feed(text[pos:pos + size])
+        pos += size
+    return objects, parser.complete
+
+
+def expected_after_truncation(days: list, cut: int) -> list:
+    """Days whose closing brace lies before ``cut`` in ``json.dumps(days, indent=2)``"""
+    # Serializing the first k days yields a prefix of the full text up to the
+    # k-th closing brace, followed by "\n]"
+    return [
+        day["day"] for k, day in enumerate(days)
+        if len(json.dumps(days[:k + 1], indent=2)) - 2 <= cut
+    ]
+
+
+def main(args) -> int:
+    rng = random.Random(args.seed)
+    failures = 0
+
+    with open(CORPUS) as f:
+        cases = json.load(f)
+
+    for case in cases:
+        for mode, (objects, complete) in (
+            ("whole", extract_days(case["text"])),
+            ("chunked", parse_chunked(case["text"], rng)),
+        ):
+            got = [o["day"] for o in objects]
+            if got != case["expected_days"] or complete != case["complete"]:
+                failures += 1
+                print(f"FAIL {case['name']} ({mode}): got {got} complete={complete}, "
+                      f"expected {case['expected_days']} complete={case['complete']}")
+    print(f"corpus: {len(cases)} cases, {failures} failures")
+
+    fuzz_failures = 0
+    for _ in range(args.fuzz):
+        days = build_fake_days(rng.randint(1, 10))
+        text = json.dumps(days, indent=2)
+        cut = rng.randint(0, len(text))
+        got = [o["day"] for o in parse_chunked(text[:cut], rng)[0]]
+        if got != expected_after_truncation(days, cut):
+            fuzz_failures += 1
+    print(f"fuzz: {args.fuzz} random truncations, {fuzz_failures} failures")
+
+    text = json.dumps(build_fake_days(30), indent=2)
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        extract_days(text)
+    elapsed = time.perf_counter() - start
+    print(f"throughput: {len(text) * args.repeats / elapsed / 1e6:.2f} MB/s on a 30-day response")
+
+    return 1 if failures or fuzz_failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fuzz", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+"""
+Load test for the Gemini call path of ``/generate-itinerary``.
+
+Runs N concurrent clients against the itinerary router with a fake model and
+reports completed requests per second, plus ``/health`` latency measured while
+the generations are in flight.
+
+    cd backend && python -m benchmarks.llm_concurrency
+"""
+
+from benchmarks.fakes import FakeGenerativeModel
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from routers import itinerary
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(itinerary.router, prefix="/api/v1")
+    return app
+
+
+async def run_level(app: FastAPI, clients: int, requests_per_client: int) -> dict:
+    payload = {"city": "Paris", "budget": 1500, "days": 3, "interests": ["museums"]}
+    transport = httpx.ASGITransport(app=app)
+    health_latencies = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def worker():
+            for _ in range(requests_per_client):
+                response = await client.post("/api/v1/generate-itinerary", json=payload)
+                response.raise_for_status()
+
+        async def probe(stop: asyncio.Event):
+            while not stop.is_set():
+                start = time.perf_counter()
+                await client.get("/api/v1/health")
+                health_latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.05)
+
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe_task
+
+    total = clients * requests_per_client
+    return {
+        "clients": clients,
+        "requests": total,
+        "seconds": elapsed,
+        "throughput_rps": total / elapsed,
+        "health_p50_ms": statistics.median(health_latencies) if health_latencies else 0.0,
+        "health_max_ms": max(health_latencies) if health_latencies else 0.0,
+    }
+
+
+async def main(args):
+    app = build_app()
+    itinerary.ai_service.model = FakeGenerativeModel(latency=args.latency)
+    # Identical payloads would otherwise be served from the itinerary cache or coalesced
+    itinerary.ai_service.cache = None
+    itinerary.ai_service.inflight = None
+    print(f"{'clients':>8} {'req':>5} {'secs':>7} {'req/s':>7} {'health p50':>11} {'health max':>11}")
+    for clients in args.clients:
+        result = await run_level(app, clients, args.requests)
+        print(
+            f"{result['clients']:>8} {result['requests']:>5} {result['seconds']:>7.2f} "
+            f"{result['throughput_rps']:>7.2f} {result['health_p50_ms']:>9.1f}ms {result['health_max_ms']:>9.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=2, help="Requests per client")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake Gemini latency in seconds")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,131 @@
+"""
+Load test of the FastAPI app against the fake Gemini model and stub Maps.
+
+For each endpoint (``/generate-itinerary``, ``/optimize-route`` and the maps
+endpoints), runs ``--concurrency`` closed-loop clients for ``--duration``
+seconds and reports requests per second, error rate and p50/p95/p99
+latency. Upstream latency, jitter and injected error rates are configurable;
+caches, the POI index and request coalescing are off unless ``--warm`` is
+given, so every request reaches the fakes. ``--json`` saves the rows for
+``python -m benchmarks.compare``.
+
+    cd backend && python -m benchmarks.load --json load.json
+"""
+
+from benchmarks.fakes import FakeGenerativeModel, build_located_days
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks import stub_maps
+from benchmarks.report import print_header, print_row, save_results, summarize
+from services import maps_client
+from services.maps_client import MapsGateway
+
+# Every service that asks for the shared gateway gets one backed by the stub
+maps_client._gateway = MapsGateway(base_url="http://stub-maps", transport=httpx.ASGITransport(app=stub_maps.app))
+
+from core.config import settings
+from routers import itinerary, maps
+
+CITIES = ["Paris", "Rome", "Tokyo", "Lisbon", "Kyoto", "Berlin"]
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(itinerary.router, prefix="/api/v1")
+    app.include_router(maps.router, prefix="/api/v1")
+    return app
+
+
+def build_targets(args):
+    located = [json.loads(day.json()) for day in build_located_days(args.route_days, args.route_stops)]
+    return {
+        "generate-itinerary": lambda rng: ("POST", "/api/v1/generate-itinerary", {"json": {
+            "city": rng.choice(CITIES), "budget": rng.randrange(500, 4000, 50), "days": rng.randint(2, 5),
+        }}),
+        "optimize-route": lambda rng: ("POST", "/api/v1/optimize-route", {"json": located}),
+        "places-search": lambda rng: ("GET", "/api/v1/places/search", {"params": {
+            "query": f"museums {rng.randrange(1000)}", "location": rng.choice(CITIES),
+        }}),
+        "geocode": lambda rng: ("GET", "/api/v1/geocode", {"params": {
+            "address": f"{rng.randrange(1000)} Main Street, {rng.choice(CITIES)}",
+        }}),
+        "nearby-restaurants": lambda rng: ("GET", "/api/v1/nearby-restaurants", {"params": {
+            "lat": 48.85 + rng.uniform(-0.05, 0.05), "lng": 2.35 + rng.uniform(-0.05, 0.05),
+        }}),
+    }
+
+
+async def run_target(client, make_request, concurrency: int, duration: float, seed: int):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(rng):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            method, url, kwargs = make_request(rng)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            if response.status_code < 400:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(random.Random(seed + i)) for i in range(concurrency)))
+    return summarize(latencies, elapsed_s=time.perf_counter() - start, errors=errors)
+
+
+async def main(args):
+    itinerary.ai_service.model = FakeGenerativeModel(
+        latency=args.llm_latency, jitter=args.jitter, error_rate=args.llm_error_rate, seed=args.seed
+    )
+    stub_maps.configure(latency=args.maps_latency, jitter=args.jitter, error_rate=args.maps_error_rate, seed=args.seed)
+    settings.GEOCODE_ITINERARY_PLACES = True
+    if not args.warm:
+        gateway = maps_client.get_maps_gateway()
+        gateway.cache = gateway.inflight = None
+        itinerary.ai_service.cache = itinerary.ai_service.inflight = None
+        maps.poi_index = None
+
+    targets = build_targets(args)
+    selected = args.targets or list(targets)
+    rows = []
+    print(f"{args.concurrency} clients x {args.duration:.0f} s per endpoint, Gemini {args.llm_latency * 1000:.0f} ms "
+          f"({args.llm_error_rate:.0%} errors), Maps {args.maps_latency * 1000:.0f} ms ({args.maps_error_rate:.0%} errors)")
+    print_header("endpoint")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=build_app()), base_url="http://bench", timeout=None) as client:
+        for name in selected:
+            row = {"case": name, **await run_target(client, targets[name], args.concurrency, args.duration, args.seed)}
+            rows.append(row)
+            print_row(row)
+    await maps_client.get_maps_gateway().aclose()
+    itinerary.ml_pipeline.close()
+
+    if args.json:
+        save_results(args.json, "load", args, rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--targets", nargs="+", help="Endpoints to load (default: all)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per endpoint")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake Gemini latency in seconds")
+    parser.add_argument("--maps-latency", type=float, default=0.05, help="Stub Maps latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Latency varies by up to this fraction")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--maps-error-rate", type=float, default=0.0)
+    parser.add_argument("--route-days", type=int, default=3)
+    parser.add_argument("--route-stops", type=int, default=12)
+    parser.add_argument("--warm", action="store_true", help="Keep caches, the POI index and coalescing on")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,62 @@
+"""
+Upstream calls saved by the Maps response cache on repetitive traffic.
+
+Replays a Zipf-distributed mix of geocode lookups and reverse-geocode lookups
+of points scattered around a few landmarks through ``MapsGateway`` and the
+stub server, then prints latency, upstream call counts and cache stats.
+
+    cd backend && python -m benchmarks.maps_cache
+"""
+
+from benchmarks import fakes  # noqa: F401  (sets placeholder API keys)
+
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from benchmarks import stub_maps
+from services.maps_client import MapsGateway
+
+
+async def replay(gateway: MapsGateway, requests: int, seed: int) -> float:
+    rng = random.Random(seed)
+    names = [f"Landmark {i}" for i in range(200)]
+    weights = [1 / (rank + 1) for rank in range(len(names))]
+    anchors = [(48.8584, 2.2945), (48.8606, 2.3376), (48.8530, 2.3499)]
+
+    start = time.perf_counter()
+    for i in range(requests):
+        if i % 4 == 3:
+            lat, lng = rng.choice(anchors)
+            await gateway.reverse_geocode((lat + rng.uniform(-2e-4, 2e-4), lng + rng.uniform(-2e-4, 2e-4)))
+        else:
+            await gateway.geocode(rng.choices(names, weights)[0])
+    return (time.perf_counter() - start) * 1000 / requests
+
+
+async def main(args):
+    stub_maps.LATENCY = args.latency
+    transport = httpx.ASGITransport(app=stub_maps.app)
+
+    for label, enabled in (("uncached", False), ("cached", True)):
+        gateway = MapsGateway(base_url="http://stub-maps", transport=transport)
+        if not enabled:
+            gateway.cache = None
+        stub_maps.app.state.calls = 0
+        mean_ms = await replay(gateway, args.requests, seed=7)
+        print(f"{label:>9}: {mean_ms:7.2f} ms/request, {stub_maps.app.state.calls} upstream calls")
+        if gateway.cache is not None:
+            stats = gateway.cache.get_stats()
+            print(f"           hit rate {stats['hit_rate']:.1%}, saved {stats['upstream_calls_saved']} calls, "
+                  f"{stats['memory_bytes'] / 1024:.1f} KiB cached")
+        await gateway.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.01, help="Stub latency in seconds")
+    asyncio.run(main(parser.parse_args()))
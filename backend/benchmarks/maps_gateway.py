@@ -0,0 +1,39 @@
+"""
+Concurrency benchmark for ``MapsGateway`` against the local stub server.
+
+Fires batches of concurrent geocode calls and reports calls per second. The
+event loop stays free while requests are in flight, so throughput is bounded
+by the per-endpoint concurrency limit rather than by request latency.
+
+    cd backend && python -m benchmarks.maps_gateway
+"""
+
+from benchmarks import fakes  # noqa: F401  (sets placeholder API keys)
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks import stub_maps
+from services.maps_client import MapsGateway
+
+
+async def main(args):
+    stub_maps.LATENCY = args.latency
+    gateway = MapsGateway(base_url="http://stub-maps", transport=httpx.ASGITransport(app=stub_maps.app))
+    print(f"{'concurrent':>10} {'calls':>6} {'secs':>7} {'calls/s':>8}")
+    for concurrent in args.concurrency:
+        start = time.perf_counter()
+        await asyncio.gather(*(gateway.geocode(f"Landmark {i}") for i in range(concurrent)))
+        elapsed = time.perf_counter() - start
+        print(f"{concurrent:>10} {concurrent:>6} {elapsed:>7.2f} {concurrent / elapsed:>8.1f}")
+    await gateway.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 5, 10, 20, 40])
+    parser.add_argument("--latency", type=float, default=0.1, help="Stub latency in seconds")
+    asyncio.run(main(parser.parse_args()))
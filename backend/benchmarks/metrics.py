@@ -0,0 +1,91 @@
+"""
+Overhead of the stage and upstream instrumentation in ``core.metrics``.
+
+Times a ``span`` enter/exit, a histogram observation and rendering the
+registry, then compares ``/generate-itinerary`` latency (fake model with no
+latency, so the pipeline's own CPU time dominates) with the spans and
+upstream timers in place and with them swapped for no-ops.
+
+    cd backend && python -m benchmarks.metrics
+"""
+
+from benchmarks.fakes import FakeGenerativeModel
+
+import argparse
+import asyncio
+import statistics
+import time
+import timeit
+
+import httpx
+from fastapi import FastAPI
+
+from core import metrics
+from routers import itinerary
+from services import ai_service, maps_client, planner
+
+
+class NoOp:
+    elapsed_ms = 0.0
+
+    def __init__(self, *args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def instrument(enabled: bool):
+    planner.span = metrics.span if enabled else NoOp
+    ai_service.span = metrics.span if enabled else NoOp
+    ai_service.upstream_call = metrics.upstream_call if enabled else NoOp
+    maps_client.upstream_call = metrics.upstream_call if enabled else NoOp
+
+
+async def request_latency(client, requests: int):
+    payload = {"city": "Paris", "budget": 1500, "days": 3}
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.post("/api/v1/generate-itinerary", json=payload)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+async def main(args):
+    n = 200_000
+
+    def timed_span():
+        with metrics.span("bench"):
+            pass
+
+    histogram = metrics.STAGE_SECONDS.labels("bench")
+    print(f"span enter/exit:       {timeit.timeit(timed_span, number=n) / n * 1e9:8.0f} ns")
+    print(f"histogram observe:     {timeit.timeit(lambda: histogram.observe(0.01), number=n) / n * 1e9:8.0f} ns")
+
+    app = FastAPI()
+    app.include_router(itinerary.router, prefix="/api/v1")
+    itinerary.ai_service.model = FakeGenerativeModel(latency=0)
+    itinerary.ai_service.cache = None
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await request_latency(client, 5)  # warm up
+        results = {}
+        for enabled in (False, True, False, True):
+            instrument(enabled)
+            results.setdefault(enabled, []).append(await request_latency(client, args.requests))
+
+    rendered = metrics.REGISTRY.render()
+    render_ms = timeit.timeit(metrics.REGISTRY.render, number=100) / 100 * 1000
+    print(f"render /metrics:       {render_ms:8.2f} ms ({len(rendered.splitlines())} lines)")
+    off, on = min(results[False]), min(results[True])
+    print(f"/generate-itinerary p50 without instrumentation {off:.2f} ms, with {on:.2f} ms ({on - off:+.3f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,76 @@
+"""
+Micro-benchmarks of the ``MLPipeline`` stages at several sizes.
+
+Times route optimization, day planning, attraction clustering and budget
+fitting on synthetic located itineraries, reporting calls per second and
+p50/p95/p99 latency per stage and size. ``--json`` saves the rows for
+``python -m benchmarks.compare``.
+
+    cd backend && python -m benchmarks.pipeline --json pipeline.json
+"""
+
+from benchmarks.fakes import build_located_days, random_points
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.budget import priced_days
+from benchmarks.report import print_header, print_row, save_results, summarize
+from services.itinerary_columns import ItineraryColumns
+from services.ml_pipeline import MLPipeline
+
+
+async def measure(fn, repeat: int):
+    await fn()  # warm up
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def main(args):
+    pipeline = MLPipeline()
+    rows = []
+
+    async def run(case, fn):
+        row = {"case": case, **summarize(await measure(fn, args.repeat))}
+        rows.append(row)
+        print_row(row)
+
+    print_header()
+    for stops in args.stops:
+        days = build_located_days(args.days, stops, seed=stops)
+        columns = ItineraryColumns.from_days(days)
+        await run(f"routing {args.days}d x {stops} stops", lambda: pipeline.optimize_daily_routes(days, columns))
+
+    for n_days in args.plan_days:
+        columns = ItineraryColumns.from_days(build_located_days(n_days, 8, seed=n_days))
+        await run(f"day planning {n_days}d x 8 stops", lambda: pipeline.plan_columns(columns, "Paris"))
+
+    for n in args.attractions:
+        attractions = [{"name": f"Attraction {i}", "coordinates": c} for i, c in enumerate(random_points(n, seed=n))]
+        await run(f"clustering {n} attractions", lambda: pipeline.cluster_attractions(attractions, 5, "Paris"))
+
+    for items in args.items:
+        columns = ItineraryColumns.from_days(priced_days(items, seed=items))
+        budget = columns.total_cost() * 0.5
+        await run(f"budget {len(columns)} items", lambda: pipeline.optimize_budget_columns(columns, budget))
+
+    pipeline.close()
+    if args.json:
+        save_results(args.json, "pipeline", args, rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, default=3, help="Days per itinerary for routing")
+    parser.add_argument("--stops", type=int, nargs="+", default=[10, 25, 50], help="Stops per day for routing")
+    parser.add_argument("--plan-days", type=int, nargs="+", default=[3, 7, 14])
+    parser.add_argument("--attractions", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--items", type=int, nargs="+", default=[50, 250, 500])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    asyncio.run(main(parser.parse_args()))
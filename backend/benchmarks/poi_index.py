@@ -0,0 +1,122 @@
+"""
+p50/p99 latency of nearby-restaurant and place searches with and without the
+local POI index.
+
+Replays random searches around central Paris (random centers, radii and
+price levels, with the Maps response cache off) against the stub Maps
+server, first straight through the gateway, then through a ``POIIndex``
+seeded either from an imported dataset or from one wide upstream search.
+Like the Places API, the stub returns at most 20 results a page, and only
+searches that returned every match let the index answer for their circle,
+so the wide search adds places but no coverage.
+
+    cd backend && python -m benchmarks.poi_index
+"""
+
+from benchmarks import fakes  # noqa: F401  (sets placeholder API keys)
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from benchmarks import stub_maps
+from benchmarks.fakes import random_points
+from services.maps_client import MapsGateway
+from services.poi_index import POIIndex
+
+CENTER = (48.8566, 2.3522)
+
+
+def write_dataset(path: str, n: int, seed: int):
+    rng = random.Random(seed)
+    places = []
+    for i, point in enumerate(random_points(n, seed=seed, center=CENTER)):
+        kind = rng.choice(["restaurant", "cafe", "museum", "park"])
+        places.append({
+            "place_id": f"dataset-{i}",
+            "name": f"{kind.title()} {i}",
+            "rating": round(rng.uniform(3, 5), 1),
+            "price_level": rng.randint(0, 4),
+            "types": [kind, "point_of_interest"],
+            "vicinity": "Paris",
+            "geometry": {"location": point},
+        })
+    with open(path, "w") as f:
+        json.dump({"city": "Paris", "center": {"lat": CENTER[0], "lng": CENTER[1]},
+                   "radius": 15000, "places": places}, f)
+
+
+def workload(n: int, seed: int):
+    rng = random.Random(seed)
+    for point in random_points(n, seed=seed, center=CENTER):
+        if rng.random() < 0.8:
+            price = rng.choice([None, None, 1, 2, 3])
+            yield "nearby", dict(location=(point["lat"], point["lng"]), radius=rng.choice([500, 1000, 2000]),
+                                 type="restaurant", price_level=price)
+        else:
+            yield "search", dict(query=rng.choice(["museum", "cafe", "park"]), location=point, radius=5000)
+
+
+async def replay(client, requests):
+    if isinstance(client, MapsGateway):
+        methods = {"nearby": client.places_nearby, "search": client.places}
+    else:
+        methods = {"nearby": client.nearby, "search": client.search}
+    timings = []
+    for kind, params in requests:
+        start = time.perf_counter()
+        await methods[kind](**params)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings, calls):
+    q = statistics.quantiles(timings, n=100)
+    print(f"{label:<28} {q[49]:>8.2f} {q[98]:>8.2f} {calls:>15}")
+
+
+async def main(args):
+    stub_maps.LATENCY = args.latency
+    requests = list(workload(args.requests, seed=11))
+    print(f"{args.requests} searches, {args.latency * 1000:.0f} ms upstream latency")
+    print(f"{'strategy':<28} {'p50 ms':>8} {'p99 ms':>8} {'upstream calls':>15}")
+
+    gateway = MapsGateway(base_url="http://stub-maps", transport=httpx.ASGITransport(app=stub_maps.app))
+    gateway.cache = None  # Count every upstream search
+
+    stub_maps.app.state.calls = 0
+    timings = await replay(gateway, requests)
+    report("gateway only", timings, stub_maps.app.state.calls)
+
+    with tempfile.NamedTemporaryFile(suffix=".json") as dataset:
+        write_dataset(dataset.name, args.places, seed=5)
+        index = POIIndex(gateway)
+        start = time.perf_counter()
+        index.load_dataset(dataset.name)
+        load_ms = (time.perf_counter() - start) * 1000
+    stub_maps.app.state.calls = 0
+    timings = await replay(index, requests)
+    report(f"index, {args.places} imported places", timings, stub_maps.app.state.calls)
+    print(f"  dataset import {load_ms:.0f} ms, {index.get_stats()}")
+
+    index = POIIndex(gateway)
+    stub_maps.app.state.calls = 0
+    await index.nearby(CENTER, 20000, type="restaurant")
+    timings = await replay(index, requests)
+    report("index, seeded by upstream", timings, stub_maps.app.state.calls)
+    print(f"  {index.get_stats()}")
+    await gateway.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--places", type=int, default=20000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,89 @@
+"""
+Per-request profiling: overhead, and what a captured profile shows.
+
+Sends ``/generate-itinerary`` requests (fake model with no latency) without
+profiling, with profiling enabled but not requested, and with the profiling
+token, then lists the stored profiles and prints the hottest functions of
+the last one from the admin report endpoint.
+
+    cd backend && python -m benchmarks.profiling
+"""
+
+from benchmarks.fakes import FakeGenerativeModel
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from core import profiling
+from core.config import settings
+from routers import admin, itinerary
+
+TOKEN = "bench-profiling-token"
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.middleware("http")(profiling.profile_request)
+    app.include_router(itinerary.router, prefix="/api/v1")
+    app.include_router(admin.router, prefix="/api/v1")
+    return app
+
+
+async def median_latency(client, payload, requests: int, headers=None):
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.post("/api/v1/generate-itinerary", json=payload, headers=headers)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies), response
+
+
+async def main(args):
+    profiling._store = profiling.ProfileStore(tempfile.mkdtemp())
+    app = build_app()
+    itinerary.ai_service.model = FakeGenerativeModel(latency=0)
+    itinerary.ai_service.cache = None
+    payload = {"city": "Paris", "budget": 3000, "days": args.days}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await median_latency(client, payload, 3)
+
+        settings.PROFILING_ENABLED = False
+        off, _ = await median_latency(client, payload, args.requests)
+        settings.PROFILING_ENABLED, settings.PROFILING_TOKEN = True, TOKEN
+        idle, _ = await median_latency(client, payload, args.requests)
+        profiled, response = await median_latency(client, payload, args.requests, headers={"X-Profile": TOKEN})
+        profile_id = response.headers["X-Profile-Id"]
+
+        admin_headers = {"X-Admin-Token": TOKEN}
+        listed = (await client.get("/api/v1/admin/profiles", headers=admin_headers)).json()
+        download = await client.get(f"/api/v1/admin/profiles/{profile_id}", headers=admin_headers)
+        report = await client.get(
+            f"/api/v1/admin/profiles/{profile_id}/report",
+            params={"sort": "tottime", "limit": args.top}, headers=admin_headers
+        )
+        forbidden = await client.get("/api/v1/admin/profiles", headers={"X-Admin-Token": "wrong"})
+
+    print(f"/generate-itinerary, {args.days} days, p50 of {args.requests} requests")
+    print(f"profiling disabled:              {off:8.2f} ms")
+    print(f"enabled, not requested:          {idle:8.2f} ms")
+    print(f"profiled (X-Profile header):     {profiled:8.2f} ms")
+    print(f"stored profiles: {len(listed)}, last {download.headers['content-length']} bytes, "
+          f"wrong admin token -> {forbidden.status_code}")
+    print()
+    print(report.text)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--top", type=int, default=15, help="Functions shown from the report")
+    asyncio.run(main(parser.parse_args()))
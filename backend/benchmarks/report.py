@@ -0,0 +1,80 @@
+"""
+Latency summaries and JSON result files shared by the suite benchmarks.
+
+``summarize`` turns a list of latencies into throughput and p50/p95/p99;
+``save_results`` writes them with enough context (commit, Python, machine,
+arguments) to compare runs later with ``python -m benchmarks.compare``.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(latencies_ms: List[float], elapsed_s: Optional[float] = None, errors: int = 0) -> Dict[str, float]:
+    """Count, error rate, throughput and latency percentiles in milliseconds
+
+    Throughput is per second of ``elapsed_s`` when given (concurrent runs),
+    otherwise per second of summed latency (sequential runs).
+    """
+    values = sorted(latencies_ms)
+    total = len(values) + errors
+    seconds = elapsed_s if elapsed_s is not None else sum(values) / 1000
+    return {
+        "count": total,
+        "errors": errors,
+        "error_rate": errors / total if total else 0.0,
+        "throughput_per_s": len(values) / seconds if seconds else 0.0,
+        "mean_ms": sum(values) / len(values) if values else 0.0,
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+        "max_ms": values[-1] if values else 0.0,
+    }
+
+
+def print_header(label: str = "case"):
+    print(f"{label:<34} {'n':>6} {'err':>5} {'per s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+
+
+def print_row(row: Dict[str, Any]):
+    print(f"{row['case']:<34} {row['count']:>6} {row['errors']:>5} {row['throughput_per_s']:>9.1f} "
+          f"{row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f}")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def save_results(path: str, benchmark: str, args: Any, rows: List[Dict[str, Any]]):
+    """Write one benchmark's rows, keyed by ``case``, with the run's context"""
+    document = {
+        "benchmark": benchmark,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "args": {k: v for k, v in vars(args).items() if k != "json"},
+        "results": rows,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+    print(f"results written to {path}")
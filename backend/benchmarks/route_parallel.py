@@ -0,0 +1,67 @@
+"""
+Serial vs. concurrent ``MLPipeline.optimize_daily_routes``.
+
+Optimizes itineraries of 1-30 days three ways: one day after another, all
+days gathered with solving in threads, and all days gathered with a process pool
+(``--workers``). Checks that all three produce identical routes and exits
+non-zero if they do not.
+
+    cd backend && python -m benchmarks.route_parallel --stops 200
+"""
+
+from benchmarks.fakes import build_located_days
+
+import argparse
+import asyncio
+import sys
+import time
+
+from core.config import settings
+from services.itinerary_columns import ItineraryColumns
+from services.ml_pipeline import MLPipeline
+
+
+async def timed(coro) -> tuple:
+    start = time.perf_counter()
+    result = await coro
+    return result, (time.perf_counter() - start) * 1000
+
+
+async def serial(pipeline: MLPipeline, days):
+    columns = ItineraryColumns.from_days(days)
+    return [await pipeline._optimize_day(day, columns, d) for d, day in enumerate(days)]
+
+
+async def main(args):
+    settings.ROUTE_PARALLEL_MIN_STOPS = 0
+    inline = MLPipeline()
+    settings.ROUTE_OPTIMIZER_WORKERS = args.workers
+    pooled = MLPipeline()
+
+    # Warm up the worker processes so spawn cost is not counted
+    await pooled.optimize_daily_routes(build_located_days(args.workers, args.stops))
+
+    mismatches = 0
+    print(f"{args.stops} stops per day, {args.workers} workers")
+    print(f"{'days':>5} {'serial ms':>10} {'gather ms':>10} {'pool ms':>9} {'identical':>10}")
+    for n in args.days:
+        days = build_located_days(n, args.stops, seed=n)
+        serial_result, serial_ms = await timed(serial(inline, days))
+        gather_result, gather_ms = await timed(inline.optimize_daily_routes(days))
+        pool_result, pool_ms = await timed(pooled.optimize_daily_routes(days))
+        identical = serial_result == gather_result == pool_result
+        mismatches += not identical
+        print(f"{n:>5} {serial_ms:>10.1f} {gather_ms:>10.1f} {pool_ms:>9.1f} {str(identical):>10}")
+
+    pooled.close()
+    if mismatches:
+        print(f"{mismatches} itinerary sizes gave different routes")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 2, 5, 10, 20, 30])
+    parser.add_argument("--stops", type=int, default=100, help="Stops per day")
+    parser.add_argument("--workers", type=int, default=4)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,70 @@
+"""
+Tour quality vs. runtime of the route solver.
+
+For uniform and clustered point sets of several sizes, compares the plain
+nearest neighbor route from the first location (the pipeline's previous
+behavior) with the full solver (multi-start nearest neighbor + 2-opt +
+Or-opt). Up to 10 points the exact optimum (Held-Karp) is also reported.
+
+    cd backend && python -m benchmarks.route_solver
+"""
+
+from benchmarks.fakes import random_points
+
+import argparse
+import itertools
+import statistics
+import time
+
+import numpy as np
+
+from services.routing import haversine_matrix, nearest_neighbour_order, route_length, solve_route
+
+
+def held_karp_open(matrix: np.ndarray) -> float:
+    """Length of the shortest open path through all points (exponential, small n only)"""
+    n = len(matrix)
+    best = {(1 << i, i): 0.0 for i in range(n)}
+    for size in range(2, n + 1):
+        for subset in itertools.combinations(range(n), size):
+            mask = sum(1 << i for i in subset)
+            for last in subset:
+                prev_mask = mask & ~(1 << last)
+                best[(mask, last)] = min(
+                    best[(prev_mask, k)] + matrix[k, last] for k in subset if k != last
+                )
+    full = (1 << n) - 1
+    return min(best[(full, i)] for i in range(n))
+
+
+def main(args):
+    print(f"{args.passes} local search passes, {args.trials} trials per row")
+    print(f"{'points':>8} {'n':>5} {'NN km':>8} {'solver km':>10} {'gain':>6} {'vs opt':>7} {'solver ms':>10}")
+    for clustered in (False, True):
+        for n in args.sizes:
+            nn, solved, optimal, runtimes = [], [], [], []
+            for trial in range(args.trials):
+                points = random_points(n, seed=1000 * n + trial, clustered=clustered)
+                matrix = haversine_matrix([p["lat"] for p in points], [p["lng"] for p in points])
+
+                nn.append(route_length(nearest_neighbour_order(matrix, 0), matrix))
+                start = time.perf_counter()
+                order = solve_route(matrix, args.passes)
+                runtimes.append((time.perf_counter() - start) * 1000)
+                assert sorted(order) == list(range(n))
+                solved.append(route_length(order, matrix))
+                if n <= 10:
+                    optimal.append(held_karp_open(matrix))
+
+            gain = 1 - sum(solved) / sum(nn)
+            vs_opt = f"{sum(solved) / sum(optimal) - 1:+.1%}" if optimal else "-"
+            print(f"{'cluster' if clustered else 'uniform':>8} {n:>5} {statistics.mean(nn):>8.2f} "
+                  f"{statistics.mean(solved):>10.2f} {gain:>6.1%} {vs_opt:>7} {statistics.mean(runtimes):>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 10, 15, 25, 50, 100, 200])
+    parser.add_argument("--trials", type=int, default=10)
+    parser.add_argument("--passes", type=int, default=40, help="2-opt/Or-opt sweeps per route")
+    main(parser.parse_args())
@@ -0,0 +1,83 @@
+"""
+Latency and window compliance of the time-window scheduler.
+
+Schedules random 15-stop days (default) and reports p50/p99 scheduling time
+per day against the 50 ms interactive target, together with how much
+lateness the scheduler leaves compared with the plain distance-optimal route
+from ``solve_route``, and the travel time it saves by routing each window's
+stops with 2-opt/Or-opt rather than nearest neighbor alone.
+
+    cd backend && python -m benchmarks.scheduling
+"""
+
+from benchmarks.fakes import build_located_days
+
+import argparse
+import random
+import statistics
+import time
+
+from core.config import settings
+from services.itinerary_columns import ItineraryColumns
+from services.ml_pipeline import MLPipeline
+from services.routing import haversine_matrix, solve_route
+from services.scheduler import _Evaluator, assign_windows, schedule_day
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main(args):
+    pipeline = MLPipeline()
+    rng = random.Random(args.seed)
+    timings, tsp_late, sched_late, feasible = [], [], [], 0
+    nn_travel, sched_travel, nn_late = [], [], []
+
+    for day in build_located_days(args.days, args.stops, seed=args.seed, clustered=True):
+        columns = ItineraryColumns.from_days([day])
+        rows = columns.located_rows(0)
+        slots = columns.slot_names(rows)
+        # Short visits, so that a 15-stop day can fit between breakfast and late evening
+        durations = [
+            duration if slot == "meal" else rng.randint(20, 45)
+            for slot, duration in zip(slots, columns.duration[rows].tolist())
+        ]
+        matrix = haversine_matrix(columns.lat[rows], columns.lng[rows])
+        travel = pipeline.travel_times.estimate_minutes(matrix)
+
+        start = time.perf_counter()
+        schedule = schedule_day(slots, durations, travel, settings.SCHEDULE_WINDOWS, settings.SCHEDULE_MAX_EVALUATIONS)
+        timings.append((time.perf_counter() - start) * 1000)
+
+        windows = assign_windows(slots, durations, settings.SCHEDULE_WINDOWS)
+        evaluator = _Evaluator(travel, [w[0] for w in windows], [w[1] for w in windows], durations)
+        tsp_late.append(evaluator.score(solve_route(matrix))[0])
+        late, _, moving = evaluator.score(schedule["order"])
+        sched_late.append(late)
+        sched_travel.append(moving)
+        nn_schedule = schedule_day(slots, durations, travel, settings.SCHEDULE_WINDOWS, settings.SCHEDULE_MAX_EVALUATIONS, 0)
+        late, _, moving = evaluator.score(nn_schedule["order"])
+        nn_late.append(late)
+        nn_travel.append(moving)
+        feasible += not schedule["late"]
+
+    print(f"{args.days} days x {args.stops} stops")
+    print(f"schedule time p50 {percentile(timings, 0.5):.2f} ms, p99 {percentile(timings, 0.99):.2f} ms, "
+          f"max {max(timings):.2f} ms (target < 50 ms)")
+    print(f"mean lateness: distance-only route {statistics.mean(tsp_late):.0f} min, "
+          f"scheduled {statistics.mean(sched_late):.0f} min")
+    print(f"feasible days: {feasible}/{args.days}")
+    print(f"window groups by nearest neighbor only: lateness {statistics.mean(nn_late):.0f} min, "
+          f"travel {statistics.mean(nn_travel):.1f} min/day")
+    print(f"window groups by 2-opt/Or-opt:          lateness {statistics.mean(sched_late):.0f} min, "
+          f"travel {statistics.mean(sched_travel):.1f} min/day")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=200)
+    parser.add_argument("--stops", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
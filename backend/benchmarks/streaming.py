@@ -0,0 +1,68 @@
+"""
+Time-to-first-day of ``/generate-itinerary/stream`` vs. ``/generate-itinerary``.
+
+Both endpoints run against the same fake model; the streaming endpoint should
+deliver its first day after the first step plus roughly 1/N of the refinement.
+
+    cd backend && python -m benchmarks.streaming
+"""
+
+from benchmarks.fakes import FakeGenerativeModel
+
+import argparse
+import asyncio
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+from routers import itinerary
+
+
+async def main(args):
+    app = FastAPI()
+    app.include_router(itinerary.router, prefix="/api/v1")
+    itinerary.ai_service.model = FakeGenerativeModel(latency=args.latency, stream_chunks=args.chunks)
+    itinerary.ai_service.cache = None
+    payload = {"city": "Paris", "budget": 3000, "days": args.days}
+
+    # httpx.ASGITransport buffers whole responses, so serve over a real socket
+    server = uvicorn.Server(uvicorn.Config(app, port=args.port, log_level="warning"))
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=None) as client:
+        start = time.perf_counter()
+        response = await client.post("/api/v1/generate-itinerary", json=payload)
+        response.raise_for_status()
+        blocking_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        first_day_ms = None
+        days = 0
+        async with client.stream("POST", "/api/v1/generate-itinerary/stream", json=payload) as response:
+            async for line in response.aiter_lines():
+                if line == "event: day":
+                    days += 1
+                    if first_day_ms is None:
+                        first_day_ms = (time.perf_counter() - start) * 1000
+        streaming_ms = (time.perf_counter() - start) * 1000
+
+    server.should_exit = True
+    await serve_task
+
+    print(f"{args.days}-day itinerary, {args.latency:.1f}s per model call")
+    print(f"blocking endpoint, full response: {blocking_ms:8.1f} ms")
+    print(f"streaming endpoint, first day:    {first_day_ms:8.1f} ms")
+    print(f"streaming endpoint, all {days} days:  {streaming_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--latency", type=float, default=2.0, help="Fake Gemini latency in seconds")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--chunks", type=int, default=40, help="Chunks per streamed response")
+    asyncio.run(main(parser.parse_args()))
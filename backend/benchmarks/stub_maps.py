@@ -0,0 +1,148 @@
+"""
+Local stub of the Google Maps web service.
+
+Serves deterministic, correctly shaped responses for the endpoints used by
+``MapsGateway``, with configurable latency, jitter and a rate of injected
+``OVER_QUERY_LIMIT`` errors (see ``configure``). Use it in-process through ``httpx.ASGITransport`` or run it as
+a real HTTP server and point ``MAPS_BASE_URL`` at it:
+
+    cd backend && uvicorn benchmarks.stub_maps:app --port 9100
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+from typing import Tuple
+
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+# Artificial per-request latency in seconds, varied by up to JITTER (a fraction)
+LATENCY = float(os.environ.get("STUB_MAPS_LATENCY", "0.05"))
+JITTER = float(os.environ.get("STUB_MAPS_JITTER", "0"))
+# Fraction of requests answered with ERROR_STATUS instead of results
+ERROR_RATE = float(os.environ.get("STUB_MAPS_ERROR_RATE", "0"))
+ERROR_STATUS = "OVER_QUERY_LIMIT"
+RNG = random.Random(0)
+
+app = FastAPI(title="Stub Google Maps")
+app.state.calls = 0
+app.state.errors = 0
+
+class InjectedError(Exception):
+    pass
+
+@app.exception_handler(InjectedError)
+async def injected_error(request, exc):
+    return JSONResponse({"status": ERROR_STATUS, "error_message": "Injected by the stub", "results": []})
+
+def configure(latency: float = None, jitter: float = None, error_rate: float = None, seed: int = None):
+    """Set the stub's latency, jitter and error rate; reseeds when ``seed`` is given"""
+    global LATENCY, JITTER, ERROR_RATE, RNG
+    LATENCY = LATENCY if latency is None else latency
+    JITTER = JITTER if jitter is None else jitter
+    ERROR_RATE = ERROR_RATE if error_rate is None else error_rate
+    if seed is not None:
+        RNG = random.Random(seed)
+
+def fake_coordinates(text: str, center: Tuple[float, float] = (48.8566, 2.3522)) -> dict:
+    """Map a string to a stable coordinate within ~10 km of ``center``"""
+    digest = hashlib.sha1(text.lower().encode()).digest()
+    dlat = (digest[0] / 255 - 0.5) * 0.18
+    dlng = (digest[1] / 255 - 0.5) * 0.26
+    return {"lat": round(center[0] + dlat, 6), "lng": round(center[1] + dlng, 6)}
+
+def _place(name: str, index: int = 0) -> dict:
+    location = fake_coordinates(f"{name}-{index}")
+    digest = hashlib.sha1(f"{name}-{index}".encode()).digest()
+    return {
+        "place_id": f"stub-{digest.hex()[:16]}",
+        "name": f"{name} {index}".strip(),
+        "formatted_address": f"{index} Stub Street",
+        "vicinity": "Stub City",
+        "rating": round(3 + digest[2] / 128, 1),
+        "price_level": digest[3] % 5,
+        "types": ["restaurant" if "restaurant" in name.lower() else "tourist_attraction"],
+        "geometry": {"location": location},
+    }
+
+async def _tick():
+    app.state.calls += 1
+    if LATENCY:
+        await asyncio.sleep(max(0.0, LATENCY * (1 + RNG.uniform(-JITTER, JITTER))) if JITTER else LATENCY)
+    if ERROR_RATE and RNG.random() < ERROR_RATE:
+        app.state.errors += 1
+        raise InjectedError()
+
+@app.get("/maps/api/geocode/json")
+async def geocode(address: str = Query(None), latlng: str = Query(None)):
+    await _tick()
+    if latlng:
+        return {"status": "OK", "results": [{
+            "formatted_address": f"Near {latlng}",
+            "address_components": [],
+            "geometry": {"location": dict(zip(("lat", "lng"), map(float, latlng.split(","))))},
+        }]}
+    location = fake_coordinates(address)
+    return {"status": "OK", "results": [{
+        "place_id": f"stub-{hashlib.sha1(address.encode()).hexdigest()[:16]}",
+        "formatted_address": address,
+        "geometry": {
+            "location": location,
+            "viewport": {
+                "southwest": {"lat": location["lat"] - 0.1, "lng": location["lng"] - 0.15},
+                "northeast": {"lat": location["lat"] + 0.1, "lng": location["lng"] + 0.15},
+            },
+        },
+        "address_components": [],
+    }]}
+
+@app.get("/maps/api/place/textsearch/json")
+async def places(query: str):
+    await _tick()
+    return {"status": "OK", "results": [_place(query, i) for i in range(10)]}
+
+@app.get("/maps/api/place/nearbysearch/json")
+async def places_nearby(location: str, radius: int, type: str = None):
+    await _tick()
+    # Like the Places API: up to 20 results a page, with a next page token when there are more
+    matches = max(1, radius // 100)
+    body = {"status": "OK", "results": [_place(f"{type or 'place'} {location}", i) for i in range(min(matches, 20))]}
+    if matches > 20:
+        body["next_page_token"] = f"page-2-{location}-{radius}"
+    return body
+
+@app.get("/maps/api/place/details/json")
+async def place(place_id: str):
+    await _tick()
+    return {"status": "OK", "result": _place(place_id)}
+
+@app.get("/maps/api/directions/json")
+async def directions(origin: str, destination: str, mode: str = "driving"):
+    await _tick()
+    return {"status": "OK", "routes": [{"legs": [{
+        "start_address": origin,
+        "end_address": destination,
+        "distance": {"text": "1.0 km", "value": 1000},
+        "duration": {"text": "5 mins", "value": 300},
+        "steps": [],
+    }]}]}
+
+@app.get("/maps/api/distancematrix/json")
+async def distance_matrix(origins: str, destinations: str, mode: str = "driving"):
+    await _tick()
+    rows = []
+    for origin in origins.split("|"):
+        elements = []
+        for destination in destinations.split("|"):
+            same = origin == destination
+            digest = hashlib.sha1(f"{origin}|{destination}|{mode}".encode()).digest()
+            meters = 0 if same else 500 + digest[0] * 40
+            elements.append({
+                "status": "OK",
+                "distance": {"value": meters},
+                "duration": {"value": 0 if same else int(meters / 6)},
+            })
+        rows.append({"elements": elements})
+    return {"status": "OK", "rows": rows}
@@ -0,0 +1,89 @@
+"""
+Distance Matrix batching and the per-pair travel-time cache.
+
+Builds travel-time matrices for a set of days against the stub Maps server
+and compares one request per stop pair with the batched provider, cold and
+warm. Also times the offline path, where the API fails and the haversine
+estimate is used instead.
+
+    cd backend && python -m benchmarks.travel_time
+"""
+
+from benchmarks.fakes import build_located_days
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks import stub_maps
+from services.itinerary_columns import ItineraryColumns
+from services.maps_client import MapsGateway
+from services.routing import haversine_matrix
+from services.travel_time import TravelTimeProvider
+
+
+def day_inputs(args):
+    inputs = []
+    for day in build_located_days(args.days, args.stops, seed=args.seed, clustered=True):
+        columns = ItineraryColumns.from_days([day])
+        rows = columns.located_rows(0)
+        lat, lng = columns.lat[rows], columns.lng[rows]
+        inputs.append((lat, lng, haversine_matrix(lat, lng)))
+    return inputs
+
+
+async def per_pair(gateway: MapsGateway, inputs) -> None:
+    for lat, lng, _ in inputs:
+        coordinates = [{"lat": a, "lng": b} for a, b in zip(lat.tolist(), lng.tolist())]
+        await asyncio.gather(*(
+            gateway.distance_matrix([a], [b])
+            for a in coordinates for b in coordinates if a is not b
+        ))
+
+
+async def batched(provider: TravelTimeProvider, inputs) -> None:
+    await asyncio.gather(*(provider.matrix(lat, lng, matrix) for lat, lng, matrix in inputs))
+
+
+async def main(args):
+    stub_maps.LATENCY = args.latency
+    inputs = day_inputs(args)
+    pairs = sum(len(lat) * (len(lat) - 1) for lat, _, _ in inputs)
+    print(f"{args.days} days x {args.stops} stops, {pairs} stop pairs, {args.latency * 1000:.0f} ms upstream latency")
+    print(f"{'strategy':<22} {'upstream calls':>15} {'secs':>7}")
+
+    transport = httpx.ASGITransport(app=stub_maps.app)
+    gateway = MapsGateway(base_url="http://stub-maps", transport=transport)
+
+    stub_maps.app.state.calls = 0
+    start = time.perf_counter()
+    await per_pair(gateway, inputs)
+    print(f"{'one call per pair':<22} {stub_maps.app.state.calls:>15} {time.perf_counter() - start:>7.2f}")
+
+    provider = TravelTimeProvider(gateway)
+    for label in ("batched, cold cache", "batched, warm cache"):
+        stub_maps.app.state.calls = 0
+        start = time.perf_counter()
+        await batched(provider, inputs)
+        print(f"{label:<22} {stub_maps.app.state.calls:>15} {time.perf_counter() - start:>7.2f}")
+    await gateway.aclose()
+
+    # Upstream down: the first failure switches to the estimate for a while
+    offline = MapsGateway(base_url="http://127.0.0.1:9", transport=httpx.AsyncHTTPTransport(retries=0))
+    provider = TravelTimeProvider(offline)
+    start = time.perf_counter()
+    await batched(provider, inputs)
+    print(f"{'offline estimate':<22} {'-':>15} {time.perf_counter() - start:>7.2f}")
+    print(f"pairs estimated offline: {provider.stats['fallback_pairs']}")
+    await offline.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--stops", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
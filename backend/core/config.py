@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Dict, List
 import os
 
 class Settings(BaseSettings):
@@ -24,15 +24,132 @@ class Settings(BaseSettings):
     GEMINI_MODEL: str = "gemini-pro"
     MAX_TOKENS: int = 4000
     TEMPERATURE: float = 0.7
+    LLM_MAX_CONCURRENCY: int = 4  # Max in-flight Gemini calls per process
+    LLM_TIMEOUT_SECONDS: float = 120.0
+    LLM_REQUESTS_PER_MINUTE: float = 0  # Process-wide Gemini call rate; 0 disables
+    LLM_RATE_BURST: int = 4
+    LLM_COALESCE_REQUESTS: bool = True  # Identical in-flight generations share one Gemini chain
+    LLM_MAX_REPAIR_ATTEMPTS: int = 1  # Follow-up calls to regenerate days missing from truncated output
+    GENERATION_MODE: str = "two_step"  # "two_step" (plan, then refine to JSON) or "single_pass"
+    GEMINI_JSON_MODE: bool = True  # Ask for JSON output when the SDK supports response_mime_type
+    
+    # Batch Generation Configuration
+    BATCH_MAX_REQUESTS: int = 500  # Itineraries accepted per batch
+    BATCH_MAX_CONCURRENCY: int = 8  # Itineraries built at once across all batches
+    BATCH_JOB_TTL_SECONDS: int = 3600  # How long finished batches stay pollable
+    
+    # Job Queue Configuration
+    JOBS_DB_PATH: str = "jobs.db"  # Queued jobs and results, kept across restarts
+    JOBS_MAX_CONCURRENCY: int = 2  # Jobs run at once by the in-process workers
+    JOBS_MAX_ATTEMPTS: int = 3  # Starts before a job interrupted by restarts is failed
+    JOBS_RESULT_TTL_SECONDS: int = 7 * 24 * 3600  # Finished jobs older than this are purged at startup
+    
+    # Profiling Configuration
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: Optional[str] = None  # X-Profile header value; also required by /admin/profiles
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_PROFILES: int = 50
+    
+    # Record/Replay Configuration
+    CASSETTE_MODE: str = "off"  # "record" captures Gemini and Maps traffic, "replay" serves it back without network access
+    CASSETTE_PATH: str = "cassettes/upstream.jsonl.gz"
+    CASSETTE_REPLAY_TIMING: bool = False  # Wait out the recorded upstream latencies when replaying
+    CASSETTE_TIMING_SCALE: float = 1.0  # Multiplier on replayed latencies
+    
+    # Itinerary Cache Configuration
+    ITINERARY_CACHE_ENABLED: bool = True
+    ITINERARY_CACHE_TTL_SECONDS: int = 24 * 3600
+    ITINERARY_CACHE_MAX_ENTRIES: int = 512
+    ITINERARY_CACHE_DB_PATH: Optional[str] = None  # e.g. "itinerary_cache.db"
+    ITINERARY_CACHE_BUDGET_BANDS: List[float] = [250, 500, 1000, 1500, 2000, 3000, 5000, 10000]
+    CACHE_PURGE_INTERVAL_SECONDS: int = 3600  # Expired rows are deleted from the SQLite cache tiers at startup and this often; 0 only at startup
     
     # Maps Configuration
     MAPS_LANGUAGE: str = "en"
     MAPS_REGION: str = "US"
+    MAPS_BASE_URL: str = "https://maps.googleapis.com"
+    MAPS_TIMEOUT_SECONDS: float = 10.0
+    MAPS_MAX_CONNECTIONS: int = 20
+    MAPS_DEFAULT_CONCURRENCY: int = 8
+    MAPS_REQUESTS_PER_SECOND: float = 0  # Process-wide rate of uncached Maps calls; 0 disables
+    MAPS_RATE_BURST: int = 10
+    MAPS_COALESCE_REQUESTS: bool = True  # Identical in-flight Maps calls share one upstream request
+    MAPS_CONCURRENCY_LIMITS: Dict[str, int] = {
+        "geocode": 10,
+        "places": 5,
+        "places_nearby": 5,
+        "directions": 5,
+        "distance_matrix": 2,
+    }
+    MAPS_CACHE_ENABLED: bool = True
+    MAPS_CACHE_MAX_ENTRIES: int = 50_000
+    MAPS_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    MAPS_CACHE_DB_PATH: Optional[str] = None  # e.g. "maps_cache.db"
+    MAPS_CACHE_TTLS: Dict[str, int] = {  # Seconds; 0 disables caching for that API
+        "geocode": 30 * 24 * 3600,
+        "places": 24 * 3600,
+        "places_nearby": 24 * 3600,
+        "place": 24 * 3600,
+        "directions": 3600,
+        "distance_matrix": 0,
+    }
+    MAPS_REVERSE_GEOCODE_GRID_DEGREES: float = 0.0005  # ~55 m at the equator
+    POI_INDEX_ENABLED: bool = True  # Answer nearby/place searches from the local POI index when covered
+    POI_INDEX_TTL_SECONDS: int = 7 * 24 * 3600
+    POI_INDEX_CELL_DEGREES: float = 0.02  # Grid bucket size, ~2 km
+    POI_INDEX_MAX_RESULTS: int = 20  # Same page size as the Places API
+    POI_INDEX_TEXT_RADIUS_METERS: int = 50_000
+    POI_INDEX_DB_PATH: Optional[str] = None  # e.g. "poi_index.db"
+    POI_INDEX_DATASETS: List[str] = []  # JSON files of places to import at startup
+    POI_INDEX_MAX_COVERED_AREAS: int = 10_000  # Covered search circles kept, oldest dropped first
+    GEOCODE_ITINERARY_PLACES: bool = True  # Fill in coordinates of generated places before routing
+    GEOCODE_RATE_PER_SECOND: float = 40.0  # Uncached geocode calls; the Geocoding API allows 50 QPS per project
+    GEOCODE_RATE_BURST: int = 10
+    GEOCODE_MAX_CITY_DISTANCE_KM: float = 50.0  # Results farther from the city center are rejected
     
     # ML Pipeline Configuration
-    CLUSTERING_ALGORITHM: str = "kmeans"
+    CLUSTERING_ALGORITHM: str = "kmeans"  # "kmeans", "minibatch" or "balanced" (capacity-constrained)
+    CLUSTERING_N_INIT: int = 4
+    CLUSTERING_MINIBATCH_MIN_POINTS: int = 5000  # Larger inputs use MiniBatchKMeans
+    CLUSTERING_BATCH_SIZE: int = 1024
+    CLUSTERING_CENTROID_CACHE_ENTRIES: int = 256
+    CLUSTERING_CENTROID_TTL_SECONDS: int = 7 * 24 * 3600
     MAX_DAILY_ACTIVITIES: int = 8
     MAX_DAILY_DINING: int = 3
+    BUDGET_ACTIVITY_VALUE: float = 1.0
+    BUDGET_DINING_VALUE: float = 0.8
+    BUDGET_MAX_STEPS: int = 20_000  # Cost resolution of the budget solver (whole dollars up to this budget)
+    PLAN_DAYS_BY_LOCATION: bool = True  # Regroup generated activities into compact days before routing
+    ROUTE_SOLVER_MAX_PASSES: int = 40  # 2-opt/Or-opt sweeps per route or schedule window; a fixed budget (not a time limit) keeps routes reproducible
+    SCHEDULE_TIME_WINDOWS: bool = True  # Order stops by TimeOfDay/meal windows and timestamp them
+    SCHEDULE_MAX_EVALUATIONS: int = 5_000  # Candidate visit orders scored per day
+    SCHEDULE_WINDOWS: Dict[str, List[str]] = {  # Earliest start, end of window
+        "morning": ["09:00", "12:00"],
+        "afternoon": ["12:00", "18:00"],
+        "evening": ["18:00", "22:30"],
+        "breakfast": ["07:30", "09:30"],
+        "lunch": ["12:00", "14:30"],
+        "dinner": ["19:00", "21:30"],
+    }
+    ROUTE_OPTIMIZER_WORKERS: int = 0  # Worker processes for route solving; 0 solves in threads
+    ROUTE_PARALLEL_MIN_STOPS: int = 12  # Smaller days are solved inline even with workers
+    
+    # Travel Time Configuration
+    TRAVEL_TIME_SOURCE: str = "distance_matrix"  # "distance_matrix" or "haversine" (offline estimate only)
+    TRAVEL_MODE: str = "driving"
+    TRAVEL_TIME_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    TRAVEL_TIME_CACHE_MAX_ENTRIES: int = 200_000
+    TRAVEL_TIME_CACHE_DB_PATH: Optional[str] = None  # e.g. "travel_times.db"
+    TRAVEL_TIME_COORD_PRECISION: int = 4  # Decimal places of the cache key, ~11 m
+    TRAVEL_TIME_OFFLINE_RETRY_SECONDS: float = 60.0  # Estimate only for this long after an API failure
+    TRAVEL_TIME_MIN_CALIBRATION_SAMPLES: int = 20  # API results needed before the estimate is recalibrated
+    TRAVEL_DETOUR_FACTOR: float = 1.3  # Road distance per straight-line km
+    TRAVEL_FALLBACK_SPEEDS_KMH: Dict[str, float] = {
+        "driving": 30,
+        "transit": 20,
+        "bicycling": 14,
+        "walking": 4.5,
+    }
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,263 @@
+"""
+In-process metrics rendered in the Prometheus text format.
+
+Counters, gauges and histograms with labels, a registry the ``/metrics``
+endpoint renders, and two timers: ``span`` for pipeline stages and
+``upstream_call`` for Gemini and Maps requests. An update is a dict lookup
+and a short lock, cheap enough to leave on in production.
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+# Seconds; wide enough for 30 s Gemini calls and sub-millisecond stages
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+class Registry:
+    """Metrics exposed together at one endpoint"""
+
+    def __init__(self):
+        self._metrics: Dict[str, "_Metric"] = {}
+
+    def register(self, metric: "_Metric"):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+class _Value:
+    """Counter or gauge value for one set of labels"""
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = float(value)
+
+class _Buckets:
+    """Histogram state for one set of labels"""
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _new_child(self):
+        return _Value()
+
+    def labels(self, *values: Any, **labels: Any):
+        """The series for these label values, created on first use"""
+        if labels:
+            values = tuple(labels[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _series(self, suffix: str, key: Tuple[str, ...], value: float, extra: Sequence[Tuple[str, str]] = ()) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        labels = "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+        return f"{self.name}{suffix}{labels} {_format(value)}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key: Tuple[str, ...], child: Any) -> List[str]:
+        return [self._series("", key, child.value)]
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    type = "counter"
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. requests in flight"""
+    type = "gauge"
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Registry = REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _Buckets(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _render_child(self, key: Tuple[str, ...], child: _Buckets) -> List[str]:
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (math.inf,), child.counts):
+            cumulative += count
+            lines.append(self._series("_bucket", key, cumulative, [("le", _format(bound))]))
+        lines.append(self._series("_sum", key, child.sum))
+        lines.append(self._series("_count", key, cumulative))
+        return lines
+
+STAGE_SECONDS = Histogram(
+    "atlasmind_stage_duration_seconds", "Time spent in each itinerary pipeline stage", ["stage"]
+)
+STAGE_IN_PROGRESS = Gauge(
+    "atlasmind_stage_in_progress", "Pipeline stages currently running", ["stage"]
+)
+STAGE_ERRORS = Counter(
+    "atlasmind_stage_errors_total", "Pipeline stages that raised", ["stage"]
+)
+UPSTREAM_SECONDS = Histogram(
+    "atlasmind_upstream_duration_seconds", "Latency of Gemini and Google Maps calls", ["service", "operation"]
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "atlasmind_upstream_in_flight", "Gemini and Google Maps calls awaiting a response", ["service"]
+)
+UPSTREAM_ERRORS = Counter(
+    "atlasmind_upstream_errors_total", "Failed Gemini and Google Maps calls", ["service", "operation", "error"]
+)
+UPSTREAM_RETRIES = Counter(
+    "atlasmind_upstream_retries_total", "Follow-up calls made because an earlier one failed", ["service", "reason"]
+)
+LLM_TOKENS = Counter(
+    "atlasmind_llm_tokens_total", "Gemini tokens by direction (prompt or output)", ["operation", "direction"]
+)
+HTTP_SECONDS = Histogram(
+    "atlasmind_http_request_duration_seconds", "Time to the response headers of each API route", ["method", "route"]
+)
+HTTP_REQUESTS = Counter(
+    "atlasmind_http_requests_total", "Handled API requests", ["method", "route", "status"]
+)
+HTTP_IN_FLIGHT = Gauge(
+    "atlasmind_http_requests_in_flight", "API requests being handled"
+)
+
+class span:
+    """Time a block as a pipeline stage
+
+    Records the stage's duration histogram, in-progress gauge and error
+    counter; ``elapsed_ms`` holds the duration once the block exits.
+    Cancellation is not counted as an error.
+    """
+    __slots__ = ("_seconds", "_in_progress", "_errors", "_start", "elapsed_ms")
+    _series: Dict[str, tuple] = {}
+
+    def __init__(self, stage: str):
+        series = self._series.get(stage)
+        if series is None:
+            series = self._series[stage] = (
+                STAGE_SECONDS.labels(stage), STAGE_IN_PROGRESS.labels(stage), STAGE_ERRORS.labels(stage)
+            )
+        self._seconds, self._in_progress, self._errors = series
+        self.elapsed_ms = 0.0
+
+    def __enter__(self) -> "span":
+        self._in_progress.inc()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        elapsed = time.perf_counter() - self._start
+        self.elapsed_ms = round(elapsed * 1000, 1)
+        self._in_progress.dec()
+        self._seconds.observe(elapsed)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self._errors.inc()
+        return False
+
+class upstream_call:
+    """Time one Gemini or Maps request, counting failures by error type
+
+    The error label is the exception's ``status`` (e.g. a Maps status code)
+    when it has one, else its class name.
+    """
+    __slots__ = ("service", "operation", "_seconds", "_in_flight", "_start")
+    _series: Dict[Tuple[str, str], tuple] = {}
+
+    def __init__(self, service: str, operation: str):
+        self.service = service
+        self.operation = operation
+        series = self._series.get((service, operation))
+        if series is None:
+            series = self._series[(service, operation)] = (
+                UPSTREAM_SECONDS.labels(service, operation), UPSTREAM_IN_FLIGHT.labels(service)
+            )
+        self._seconds, self._in_flight = series
+
+    def __enter__(self) -> "upstream_call":
+        self._in_flight.inc()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._seconds.observe(time.perf_counter() - self._start)
+        self._in_flight.dec()
+        if exc_type is not None and issubclass(exc_type, Exception):
+            error = getattr(exc, "status", None) or exc_type.__name__
+            UPSTREAM_ERRORS.labels(self.service, self.operation, error).inc()
+        return False
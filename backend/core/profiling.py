@@ -0,0 +1,205 @@
+"""
+Opt-in cProfile capture of single requests.
+
+When PROFILING_ENABLED is set, a request carrying PROFILING_TOKEN in the
+``X-Profile`` header runs under cProfile, and the profile is saved as a
+pstats file under PROFILING_DIR for the admin endpoints to list and
+download. The token is not accepted in the query string, where access logs
+would record it.
+
+cProfile follows the event loop thread, so coroutines of other requests that
+run while the profiled one awaits show up as well; only one request is
+profiled at a time. Work the request hands to ``to_thread`` is profiled in
+its worker thread and merged in. Streaming responses are profiled up to
+their headers.
+"""
+
+import asyncio
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict, List, Mapping, Optional
+
+from core.config import settings
+
+PROFILE_HEADER = "X-Profile"
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+_active: ContextVar[Optional["RequestProfile"]] = ContextVar("active_profile", default=None)
+_running = threading.Lock()
+
+def profiling_requested(headers: Mapping[str, str]) -> bool:
+    """Whether profiling is enabled and the request carries the profiling token"""
+    token = settings.PROFILING_TOKEN
+    if not settings.PROFILING_ENABLED or not token:
+        return False
+    supplied = headers.get(PROFILE_HEADER) or ""
+    return hmac.compare_digest(supplied.encode(), token.encode())
+
+def is_profiling() -> bool:
+    """Whether the current request is being profiled"""
+    return _active.get() is not None
+
+class RequestProfile:
+    """cProfile data of one request, including the worker threads it used"""
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self.elapsed_ms: Optional[float] = None
+        self.profiler = cProfile.Profile()
+        self.thread_profilers: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def start(cls, method: str, path: str) -> Optional["RequestProfile"]:
+        """A new profile, or None while another request is being profiled"""
+        if not _running.acquire(blocking=False):
+            return None
+        return cls(method, path)
+
+    def __enter__(self) -> "RequestProfile":
+        self._token = _active.set(self)
+        self._start = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.profiler.disable()
+        self.elapsed_ms = round((time.perf_counter() - self._start) * 1000, 1)
+        _active.reset(self._token)
+        _running.release()
+        return False
+
+    def add_thread_profiler(self, profiler: cProfile.Profile):
+        with self._lock:
+            self.thread_profilers.append(profiler)
+
+    def stats(self) -> pstats.Stats:
+        stats = pstats.Stats(self.profiler)
+        for profiler in self.thread_profilers:
+            stats.add(profiler)
+        return stats
+
+def _run_profiled(profile: RequestProfile, fn, *args, **kwargs):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        profiler.disable()
+        profile.add_thread_profiler(profiler)
+
+async def to_thread(fn, *args, **kwargs):
+    """``asyncio.to_thread`` that profiles ``fn`` in its worker thread when the request is profiled"""
+    profile = _active.get()
+    if profile is None:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return await asyncio.to_thread(_run_profiled, profile, fn, *args, **kwargs)
+
+class ProfileStore:
+    """Saved request profiles: a pstats file and a JSON summary per profile id
+
+    Only the newest PROFILING_MAX_PROFILES are kept.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_profiles: Optional[int] = None):
+        self.directory = directory or settings.PROFILING_DIR
+        self.max_profiles = max_profiles or settings.PROFILING_MAX_PROFILES
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _file(self, profile_id: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.{extension}")
+
+    def save(self, profile: RequestProfile, status_code: int) -> Dict[str, Any]:
+        stats = profile.stats()
+        stats.dump_stats(self._file(profile.id, "prof"))
+        meta = {
+            "id": profile.id,
+            "method": profile.method,
+            "path": profile.path,
+            "status_code": status_code,
+            "started_at": profile.started_at,
+            "elapsed_ms": profile.elapsed_ms,
+            "total_calls": stats.total_calls,
+        }
+        with open(self._file(profile.id, "json"), "w") as f:
+            json.dump(meta, f)
+        self._prune()
+        return meta
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries of the stored profiles, newest first"""
+        profiles = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        profiles.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return sorted(profiles, key=lambda meta: meta["started_at"], reverse=True)
+
+    def path(self, profile_id: str) -> Optional[str]:
+        """The pstats file of a profile, or None for unknown or malformed ids"""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = self._file(profile_id, "prof")
+        return path if os.path.exists(path) else None
+
+    def report(self, profile_id: str, sort: str = "cumulative", limit: int = 40) -> Optional[str]:
+        """``pstats`` listing of a profile's top functions"""
+        path = self.path(profile_id)
+        if path is None:
+            return None
+        out = io.StringIO()
+        pstats.Stats(path, stream=out).strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def _prune(self):
+        for meta in self.list()[self.max_profiles:]:
+            for extension in ("prof", "json"):
+                try:
+                    os.remove(self._file(meta["id"], extension))
+                except FileNotFoundError:
+                    pass
+
+async def profile_request(request: Any, call_next) -> Any:
+    """HTTP middleware body: profile the request if it asks to be, and save the profile
+
+    The response carries the profile id in ``X-Profile-Id``, or
+    ``X-Profile-Status: busy`` when another request was being profiled.
+    """
+    if not profiling_requested(request.headers):
+        return await call_next(request)
+
+    profile = RequestProfile.start(request.method, request.url.path)
+    if profile is None:
+        response = await call_next(request)
+        response.headers["X-Profile-Status"] = "busy"
+        return response
+
+    with profile:
+        response = await call_next(request)
+    await asyncio.to_thread(get_profile_store().save, profile, response.status_code)
+    response.headers["X-Profile-Id"] = profile.id
+    return response
+
+_store: Optional[ProfileStore] = None
+
+def get_profile_store() -> ProfileStore:
+    """Shared store of saved profiles"""
+    global _store
+    if _store is None:
+        _store = ProfileStore()
+    return _store
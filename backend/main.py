@@ -1,12 +1,19 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
 from dotenv import load_dotenv
+import asyncio
 import os
+import time
 
-from routers import itinerary, maps, export
+from routers import itinerary, maps, export, jobs, admin
 from core.config import settings
+from core.metrics import REGISTRY, HTTP_IN_FLIGHT, HTTP_REQUESTS, HTTP_SECONDS
+from core.profiling import profile_request
+from services.cache import purge_expired_periodically
+from services.cassette import get_cassette
+from services.maps_client import get_maps_gateway
 
 # Load environment variables
 load_dotenv()
@@ -29,10 +36,66 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests and time them per route template, keeping label cardinality bounded"""
+    HTTP_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        HTTP_SECONDS.labels(request.method, path).observe(time.perf_counter() - start)
+        HTTP_REQUESTS.labels(request.method, path, status).inc()
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """Run requests carrying the profiling token under cProfile and save the profile"""
+    return await profile_request(request, call_next)
+
 # Include routers
 app.include_router(itinerary.router, prefix="/api/v1", tags=["Itinerary"])
 app.include_router(maps.router, prefix="/api/v1", tags=["Maps"])
 app.include_router(export.router, prefix="/api/v1", tags=["Export"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["Jobs"])
+app.include_router(admin.router, prefix="/api/v1", tags=["Admin"])
+
+@app.on_event("startup")
+async def start_job_workers():
+    """Open the job store, resume stored jobs and start the background workers"""
+    await jobs.start_job_queue()
+
+@app.on_event("startup")
+async def start_cache_purge():
+    """Delete expired rows from the persistent itinerary, Maps and travel time caches"""
+    caches = [itinerary.ml_pipeline.travel_times.cache]
+    if itinerary.ai_service.cache is not None:
+        caches.append(itinerary.ai_service.cache.store)
+    if get_maps_gateway().cache is not None:
+        caches.append(get_maps_gateway().cache.store)
+    caches = [cache for cache in caches if cache.disk is not None]
+    if caches:
+        app.state.cache_purge = asyncio.create_task(
+            purge_expired_periodically(caches, settings.CACHE_PURGE_INTERVAL_SECONDS)
+        )
+
+@app.on_event("shutdown")
+async def close_upstream_clients():
+    """Stop job workers and the cache purge, release pooled Google Maps connections and route solver workers, and flush the cassette"""
+    await jobs.stop_job_queue()
+    cache_purge = getattr(app.state, "cache_purge", None)
+    if cache_purge is not None:
+        cache_purge.cancel()
+    await get_maps_gateway().aclose()
+    itinerary.ml_pipeline.close()
+    cassette = get_cassette()
+    if cassette is not None:
+        cassette.close()
 
 @app.get("/")
 async def root():
@@ -49,6 +112,11 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "AtlasMind API"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Stage latencies, upstream calls, tokens and in-flight gauges in the Prometheus text format"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Custom HTTP exception handler"""
@@ -50,6 +50,17 @@ class ItineraryRequest(BaseModel):
     travel_style: Optional[str] = Field(default="balanced", description="Travel style: budget, luxury, balanced")
     group_size: Optional[int] = Field(default=1, description="Number of travelers")
 
+class RouteOptimization(BaseModel):
+    """Route optimization request/response"""
+    day: int
+    activities: List[Activity]
+    dining: List[Dining]
+    optimized_route: List[Dict[str, Any]]
+    total_travel_time: int
+    total_distance: float
+    feasible: Optional[bool] = None  # Whether every stop fits its time window
+    schedule_violations: Optional[List[str]] = None
+
 class ItineraryResponse(BaseModel):
     """Response model for generated itineraries"""
     id: str
@@ -62,15 +73,8 @@ class ItineraryResponse(BaseModel):
     total_cost: float
     savings: Optional[float] = None
     recommendations: Optional[List[str]] = None
-
-class RouteOptimization(BaseModel):
-    """Route optimization request/response"""
-    day: int
-    activities: List[Activity]
-    dining: List[Dining]
-    optimized_route: List[Dict[str, Any]]
-    total_travel_time: int
-    total_distance: float
+    timings_ms: Optional[Dict[str, float]] = None  # Latency of each pipeline stage
+    routes: Optional[List[RouteOptimization]] = None  # Optimized route of each day in itinerary
 
 class BudgetBreakdown(BaseModel):
     """Budget breakdown model"""
@@ -82,3 +86,36 @@ class BudgetBreakdown(BaseModel):
     remaining_budget: float
     cost_per_day: float
 
+class BatchItineraryRequest(BaseModel):
+    """Many itinerary requests generated as one job"""
+    requests: List[ItineraryRequest] = Field(..., description="Itineraries to generate")
+
+class BatchItineraryResult(BaseModel):
+    """Outcome of one request in a batch"""
+    index: int
+    status: str  # "pending", "completed" or "failed"
+    result: Optional[ItineraryResponse] = None
+    error: Optional[str] = None
+
+class BatchJobStatus(BaseModel):
+    """Progress and partial results of a batch job"""
+    job_id: str
+    status: str  # "running", "completed" or "failed"
+    total: int
+    unique: int
+    completed: int
+    failed: int
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    results: Optional[List[BatchItineraryResult]] = None
+
+class JobStatus(BaseModel):
+    """State of a background itinerary job"""
+    job_id: str
+    status: str  # "queued", "running", "completed" or "failed"
+    attempts: int = 0
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[ItineraryResponse] = None
+    error: Optional[str] = None
@@ -0,0 +1,52 @@
+import asyncio
+import hmac
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+from typing import Optional
+
+from core.config import settings
+from core.profiling import get_profile_store
+
+router = APIRouter()
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints exist only while profiling is enabled, and need the profiling token"""
+    if not settings.PROFILING_ENABLED or not settings.PROFILING_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), settings.PROFILING_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@router.get("/admin/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """
+    Saved request profiles, newest first
+    """
+    return await asyncio.to_thread(get_profile_store().list)
+
+@router.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def download_profile(profile_id: str):
+    """
+    Download a profile as a pstats file (open with pstats, snakeviz or similar)
+    """
+    path = get_profile_store().path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
+@router.get("/admin/profiles/{profile_id}/report", response_class=PlainTextResponse,
+            dependencies=[Depends(require_admin)])
+async def profile_report(
+    profile_id: str,
+    sort: str = Query("cumulative", description="pstats sort key, e.g. cumulative, tottime, ncalls"),
+    limit: int = Query(40, description="Functions to list")
+):
+    """
+    Text listing of a profile's hottest functions
+    """
+    try:
+        report = await asyncio.to_thread(get_profile_store().report, profile_id, sort, limit)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown sort key: {sort}")
+    if report is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return report
@@ -1,23 +1,34 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-import uuid
-from datetime import datetime
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any
+import json
 
 from models.itinerary import (
     ItineraryRequest, 
     ItineraryResponse, 
     Day, 
     RouteOptimization,
-    BudgetBreakdown
+    BudgetBreakdown,
+    BatchItineraryRequest,
+    BatchJobStatus
 )
 from services.ai_service import AIService
 from services.ml_pipeline import MLPipeline
+from services.maps_client import get_maps_gateway
+from services.geocoding import GeocodingStage
+from services.itinerary_columns import ACTIVITY, DINING, ItineraryColumns
+from services.planner import ItineraryPlanner
+from services.batch import BatchRunner
+from core.config import settings
 
 router = APIRouter()
 
 # Initialize services
 ai_service = AIService()
-ml_pipeline = MLPipeline()
+ml_pipeline = MLPipeline(maps_gateway=get_maps_gateway())
+geocoding_stage = GeocodingStage(maps_gateway=get_maps_gateway())
+planner = ItineraryPlanner(ai_service, ml_pipeline, geocoding_stage)
+batch_runner = BatchRunner(planner)
 
 @router.post("/generate-itinerary", response_model=ItineraryResponse)
 async def generate_itinerary(request: ItineraryRequest):
@@ -27,46 +38,96 @@ async def generate_itinerary(request: ItineraryRequest):
     Uses Gemini API with prompt chaining to create personalized travel plans
     """
     try:
-        # Generate itinerary using AI service
-        days = await ai_service.generate_itinerary(request)
+        return await planner.build(request)
         
-        # Optimize routes using ML pipeline
-        optimized_routes = await ml_pipeline.optimize_daily_routes(days)
-        
-        # Optimize budget allocation
-        optimized_days = await ml_pipeline.optimize_budget_allocation(days, request.budget)
-        
-        # Calculate total cost
-        total_cost = sum(
-            sum(activity.cost or 0 for activity in day.activities) +
-            sum(dining.price_per_person or 0 for dining in day.dining)
-            for day in optimized_days
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to generate itinerary: {str(e)}"
         )
-        
-        # Create response
-        response = ItineraryResponse(
-            id=str(uuid.uuid4()),
-            city=request.city,
-            total_budget=request.budget,
-            days=request.days,
-            generated_at=datetime.utcnow(),
-            itinerary=optimized_days,
-            summary=f"AI-generated {request.days}-day itinerary for {request.city}",
-            total_cost=total_cost,
-            savings=max(0, request.budget - total_cost),
-            recommendations=await ml_pipeline.get_travel_recommendations(
-                request.city, request.budget, request.days
-            )
+
+@router.post("/generate-itinerary/batch", response_model=BatchJobStatus, status_code=202)
+async def generate_itinerary_batch(batch: BatchItineraryRequest):
+    """
+    Generate many itineraries as one background job
+    
+    Identical requests are generated once; poll the returned job id for progress and partial results
+    """
+    if not batch.requests:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one request")
+    if len(batch.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch exceeds the limit of {settings.BATCH_MAX_REQUESTS} requests"
         )
-        
-        return response
+    
+    try:
+        job = batch_runner.submit(batch.requests)
+        return job.status(include_results=False)
         
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to generate itinerary: {str(e)}"
+            detail=f"Failed to start batch: {str(e)}"
         )
 
+@router.get("/generate-itinerary/batch/{job_id}", response_model=BatchJobStatus)
+async def get_itinerary_batch(job_id: str, results: bool = True):
+    """
+    Progress of a batch job, with the itineraries finished so far
+    """
+    job = batch_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Batch {job_id} not found")
+    return job.status(include_results=results)
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.post("/generate-itinerary/stream")
+async def stream_itinerary(request: ItineraryRequest):
+    """
+    Stream an AI-powered itinerary as Server-Sent Events
+    
+    Emits a `day` event (the day plus its optimized route) as soon as each day
+    has been generated, then a `complete` event with totals. Failures are
+    reported as an `error` event.
+    """
+    async def event_stream():
+        total_cost = 0.0
+        day_count = 0
+        try:
+            async for day in ai_service.stream_itinerary(request):
+                if settings.GEOCODE_ITINERARY_PLACES:
+                    await geocoding_stage.geocode_days([day], request.city)
+                route = (await ml_pipeline.optimize_daily_routes([day]))[0]
+                total_cost += (
+                    sum(activity.cost or 0 for activity in day.activities) +
+                    sum(dining.price_per_person or 0 for dining in day.dining)
+                )
+                day_count += 1
+                yield _sse_event("day", {"day": day.dict(), "route": route.dict()})
+            
+            yield _sse_event("complete", {
+                "city": request.city,
+                "days": day_count,
+                "total_budget": request.budget,
+                "total_cost": total_cost,
+                "savings": max(0, request.budget - total_cost),
+                "recommendations": await ml_pipeline.get_travel_recommendations(
+                    request.city, request.budget, request.days
+                )
+            })
+        except Exception as e:
+            yield _sse_event("error", {"error": f"Failed to generate itinerary: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/optimize-route", response_model=List[RouteOptimization])
 async def optimize_route(days: List[Day]):
     """
@@ -103,15 +164,9 @@ async def get_budget_breakdown(days: List[Day], total_budget: float):
     Get detailed budget breakdown for the itinerary
     """
     try:
-        activities_cost = sum(
-            sum(activity.cost or 0 for activity in day.activities)
-            for day in days
-        )
-        
-        dining_cost = sum(
-            sum(dining.price_per_person or 0 for dining in day.dining)
-            for day in days
-        )
+        columns = ItineraryColumns.from_days(days)
+        activities_cost = columns.total_cost(ACTIVITY)
+        dining_cost = columns.total_cost(DINING)
         
         # Estimate transportation cost (10% of total budget)
         transportation_cost = total_budget * 0.1
@@ -157,6 +212,22 @@ async def get_recommendations(city: str, budget: float, days: int):
             detail=f"Failed to get recommendations: {str(e)}"
         )
 
+@router.get("/itinerary-cache/stats")
+async def get_itinerary_cache_stats():
+    """Hit/miss counters for the generated itinerary cache"""
+    if ai_service.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **ai_service.cache.get_stats()}
+
+@router.get("/single-flight/stats")
+async def get_single_flight_stats():
+    """How many Gemini generations and Maps calls were coalesced with an identical in-flight call"""
+    gateway = get_maps_gateway()
+    return {
+        "llm": ai_service.inflight.get_stats() if ai_service.inflight is not None else {"enabled": False},
+        "maps": gateway.inflight.get_stats() if gateway.inflight is not None else {"enabled": False},
+    }
+
 @router.get("/health")
 async def health_check():
     """Health check for itinerary service"""
@@ -0,0 +1,64 @@
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+
+from core.config import settings
+from models.itinerary import ItineraryRequest, JobStatus
+from services.jobs import JobQueue, JobStore
+from routers.itinerary import planner
+
+router = APIRouter()
+
+# Background generation, sharing the itinerary router's planner; opened at startup
+job_queue: Optional[JobQueue] = None
+
+async def start_job_queue():
+    """Open the job store at JOBS_DB_PATH, resume stored jobs and start the workers"""
+    global job_queue
+    if job_queue is None:
+        job_queue = JobQueue(planner, JobStore(settings.JOBS_DB_PATH))
+    await job_queue.start()
+
+async def stop_job_queue():
+    """Stop the workers and close the job store"""
+    global job_queue
+    if job_queue is not None:
+        await job_queue.stop()
+        job_queue.store.close()
+        job_queue = None
+
+def get_job_queue() -> JobQueue:
+    if job_queue is None:
+        raise HTTPException(status_code=503, detail="Job queue is not running")
+    return job_queue
+
+@router.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(request: ItineraryRequest):
+    """
+    Queue an itinerary for background generation
+    
+    Returns a job id at once; poll GET /jobs/{job_id} for the status and result
+    """
+    queue = get_job_queue()
+    try:
+        return await queue.submit(request)
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to queue itinerary: {str(e)}"
+        )
+
+@router.get("/jobs/stats")
+async def get_job_stats():
+    """Worker count, waiting jobs and stored jobs by status"""
+    return get_job_queue().get_stats()
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """
+    Status of a background job, with the itinerary once it is completed
+    """
+    job = await get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
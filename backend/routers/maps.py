@@ -1,12 +1,16 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Dict, Any, Optional
-import googlemaps
 from core.config import settings
+from services.maps_client import get_maps_gateway
+from services.poi_index import get_poi_index
 
 router = APIRouter()
 
-# Initialize Google Maps client
-gmaps = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
+# Shared async Google Maps client
+gmaps = get_maps_gateway()
+
+# Local POI index, consulted before the Places API
+poi_index = get_poi_index(gmaps) if settings.POI_INDEX_ENABLED else None
 
 @router.get("/places/search")
 async def search_places(
@@ -27,7 +31,7 @@ async def search_places(
         
         if location:
             # Geocode the location for bias
-            geocode_result = gmaps.geocode(location)
+            geocode_result = await gmaps.geocode(location)
             if geocode_result:
                 search_params['location'] = geocode_result[0]['geometry']['location']
         
@@ -35,7 +39,10 @@ async def search_places(
             search_params['type'] = type
         
         # Perform search
-        places_result = gmaps.places(**search_params)
+        if poi_index is not None:
+            places_result = await poi_index.search(**search_params)
+        else:
+            places_result = await gmaps.places(**search_params)
         
         # Format results
         places = []
@@ -69,7 +76,7 @@ async def get_place_details(place_id: str):
     Get detailed information about a specific place
     """
     try:
-        place_details = gmaps.place(
+        place_details = await gmaps.place(
             place_id,
             fields=['name', 'formatted_address', 'geometry', 'rating', 'types', 
                    'photos', 'price_level', 'opening_hours', 'website', 'formatted_phone_number']
@@ -93,7 +100,7 @@ async def get_directions(
     Get directions between two locations
     """
     try:
-        directions_result = gmaps.directions(origin, destination, mode=mode)
+        directions_result = await gmaps.directions(origin, destination, mode=mode)
         
         if not directions_result:
             raise HTTPException(
@@ -131,7 +138,7 @@ async def geocode_address(address: str = Query(..., description="Address to geoc
     Convert address to coordinates
     """
     try:
-        geocode_result = gmaps.geocode(address)
+        geocode_result = await gmaps.geocode(address)
         
         if not geocode_result:
             raise HTTPException(
@@ -162,7 +169,7 @@ async def reverse_geocode(
     Convert coordinates to address
     """
     try:
-        reverse_result = gmaps.reverse_geocode((lat, lng))
+        reverse_result = await gmaps.reverse_geocode((lat, lng))
         
         if not reverse_result:
             raise HTTPException(
@@ -200,9 +207,12 @@ async def get_nearby_restaurants(
         }
         
         if price_level is not None:
-            search_params['price'] = price_level
+            search_params['price_level'] = price_level
         
-        places_result = gmaps.places_nearby(**search_params)
+        if poi_index is not None:
+            places_result = await poi_index.nearby(**search_params)
+        else:
+            places_result = await gmaps.places_nearby(**search_params)
         
         restaurants = []
         for place in places_result.get('results', []):
@@ -243,7 +253,7 @@ async def get_map_embed_url(
         if ',' in center and all(c.replace('.', '').replace('-', '').isdigit() for c in center.split(',')):
             center_coords = center
         else:
-            geocode_result = gmaps.geocode(center)
+            geocode_result = await gmaps.geocode(center)
             if not geocode_result:
                 raise HTTPException(status_code=400, detail="Invalid center location")
             location = geocode_result[0]['geometry']['location']
@@ -270,6 +280,20 @@ async def get_map_embed_url(
             detail=f"Failed to generate map embed URL: {str(e)}"
         )
 
+@router.get("/maps/cache/stats")
+async def get_maps_cache_stats():
+    """Hit rate and upstream calls saved by the Maps response cache"""
+    if gmaps.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **gmaps.cache.get_stats()}
+
+@router.get("/maps/poi-index/stats")
+async def get_poi_index_stats():
+    """Size and hit rate of the local POI index"""
+    if poi_index is None:
+        return {"enabled": False}
+    return {"enabled": True, **poi_index.get_stats()}
+
 @router.get("/health")
 async def health_check():
     """Health check for maps service"""
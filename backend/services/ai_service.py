@@ -1,47 +1,284 @@
 import google.generativeai as genai
-from typing import Dict, Any, List
+import asyncio
+from typing import Dict, Any, List, AsyncIterator, Callable, Optional, Iterable
 import json
 import logging
 from core.config import settings
+from core.metrics import LLM_TOKENS, UPSTREAM_RETRIES, span, upstream_call
 from models.itinerary import ItineraryRequest, Day, Activity, Dining
+from services.cassette import get_cassette
+from services.itinerary_cache import ItineraryCache, itinerary_cache_key
+from services.json_stream import DayStreamParser, extract_days
+from services.rate_limit import AsyncRateLimiter
+from services.single_flight import SingleFlight
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# JSON shape of one day, shared by the refiner and single-pass prompts
+DAY_JSON_SCHEMA = """{
+    "day": <day_number>,
+    "summary": "<brief summary of the day>",
+    "activities": [
+        {
+            "time": "<morning|afternoon|evening>",
+            "place": "<location name>",
+            "description": "<brief description>",
+            "cost": <estimated_cost_in_usd>,
+            "duration_minutes": <estimated_duration>,
+            "category": "<attraction|museum|park|shopping|etc>"
+        }
+    ],
+    "dining": [
+        {
+            "name": "<restaurant name>",
+            "cuisine": "<cuisine type>",
+            "description": "<brief description>",
+            "price_per_person": <estimated_price_per_person>,
+            "price_range": "<$|$$|$$$>"
+        }
+    ]
+}"""
+
+GENERATION_MODES = ("two_step", "single_pass")
+
+def _count_tokens(operation: str, prompt: str, response: Any = None, output_chars: Optional[int] = None):
+    """Record a call's prompt and output tokens, estimated at ~4 characters per token when the SDK reports no usage"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        prompt_tokens, output_tokens = usage.prompt_token_count, usage.candidates_token_count
+    else:
+        if output_chars is None:
+            try:
+                output_chars = len(response.text)
+            except Exception:
+                output_chars = 0
+        prompt_tokens, output_tokens = len(prompt) // 4, output_chars // 4
+    LLM_TOKENS.labels(operation, "prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(operation, "output").inc(output_tokens)
+
 class AIService:
     """Service for AI-powered itinerary generation using Gemini API"""
     
     def __init__(self):
         """Initialize the AI service with Gemini"""
-        if not settings.GEMINI_API_KEY:
-            raise ValueError("GEMINI_API_KEY is required")
+        cassette = get_cassette()
+        if cassette is not None and cassette.replaying:
+            # Recorded responses only; no key or network access needed
+            self.model = cassette.wrap_model()
+        else:
+            if not settings.GEMINI_API_KEY:
+                raise ValueError("GEMINI_API_KEY is required")
+            
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+            if cassette is not None:
+                self.model = cassette.wrap_model(self.model)
+        self._llm_semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        self._llm_rate = AsyncRateLimiter(settings.LLM_REQUESTS_PER_MINUTE / 60, settings.LLM_RATE_BURST)
+        self.cache = ItineraryCache() if settings.ITINERARY_CACHE_ENABLED else None
+        self.inflight = SingleFlight() if settings.LLM_COALESCE_REQUESTS else None
+        
+        if settings.GENERATION_MODE not in GENERATION_MODES:
+            raise ValueError(f"GENERATION_MODE must be one of {GENERATION_MODES}")
+        self.generation_mode = settings.GENERATION_MODE
+    
+    async def _generate_content(self, prompt: str, operation: str = "generate", **kwargs) -> Any:
+        """Run a Gemini call on the SDK's async API, bounded by LLM_MAX_CONCURRENCY and the rate limit"""
+        async with self._llm_semaphore, self._llm_rate:
+            with upstream_call("gemini", operation):
+                response = await asyncio.wait_for(
+                    self.model.generate_content_async(prompt, **kwargs),
+                    timeout=settings.LLM_TIMEOUT_SECONDS
+                )
+        _count_tokens(operation, prompt, response)
+        return response
+    
+    async def _stream_content(self, prompt: str, operation: str = "stream", **kwargs) -> AsyncIterator[str]:
+        """Stream the text of a Gemini call
+        
+        A background task reads the upstream stream into a queue while holding
+        a concurrency slot, with LLM_TIMEOUT_SECONDS covering the whole call,
+        so the slot is released when Gemini finishes rather than when a slow
+        client has read everything. Closing the stream early cancels the call.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        
+        async def read():
+            response = await self.model.generate_content_async(prompt, stream=True, **kwargs)
+            output_chars = 0
+            async for chunk in response:
+                output_chars += len(chunk.text)
+                queue.put_nowait(chunk.text)
+            return response, output_chars
+        
+        async def pump():
+            try:
+                async with self._llm_semaphore, self._llm_rate:
+                    with upstream_call("gemini", operation):
+                        response, output_chars = await asyncio.wait_for(read(), timeout=settings.LLM_TIMEOUT_SECONDS)
+                _count_tokens(operation, prompt, response, output_chars)
+            finally:
+                queue.put_nowait(finished)
         
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+        task = asyncio.ensure_future(pump())
+        try:
+            while (text := await queue.get()) is not finished:
+                yield text
+            await task  # Raise the upstream error or timeout, if any
+        finally:
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
         
+    def _json_generation_kwargs(self) -> Dict[str, Any]:
+        """Request schema-constrained JSON output when the installed SDK supports it"""
+        if settings.GEMINI_JSON_MODE and "response_mime_type" in genai.types.GenerationConfig.__annotations__:
+            return {"generation_config": genai.types.GenerationConfig(response_mime_type="application/json")}
+        return {}
+    
     async def generate_itinerary(self, request: ItineraryRequest) -> List[Day]:
+        """
+        Generate a complete itinerary, sharing one generation between
+        identical concurrent requests
+        
+        Requests are identical when their itinerary cache keys match. Callers
+        of a shared generation each get their own copy of the days, since
+        later stages modify them in place.
+        """
+        if self.inflight is None:
+            return await self._generate_itinerary(request)
+        
+        days, shared = await self.inflight.do(
+            itinerary_cache_key(request), lambda: self._generate_itinerary(request)
+        )
+        return [day.copy(deep=True) for day in days] if shared else days
+    
+    async def _generate_itinerary(self, request: ItineraryRequest) -> List[Day]:
         """
         Generate a complete itinerary using prompt chaining
         
         Step 1: Generate raw itinerary
         Step 2: Refine into structured JSON
+        
+        In "single_pass" mode the structured JSON is requested directly, and
+        the two-step chain only runs if that output fails validation.
         """
         try:
+            if self.cache is not None:
+                cached = await self.cache.get(request)
+                if cached is not None:
+                    logger.info(f"Itinerary cache hit for {request.city}")
+                    return cached
+            
+            if self.generation_mode == "single_pass":
+                try:
+                    with span("single_pass"):
+                        structured_itinerary = await self._generate_single_pass(request)
+                    logger.info(f"Generated structured itinerary for {request.city} in a single pass")
+                    
+                    if self.cache is not None:
+                        await self.cache.set(request, structured_itinerary)
+                    
+                    return structured_itinerary
+                except Exception as e:
+                    logger.warning(f"Single-pass output failed validation, falling back to prompt chaining: {str(e)}")
+                    UPSTREAM_RETRIES.labels("gemini", "single_pass_fallback").inc()
+            
             # Step 1: Generate raw itinerary
-            raw_itinerary = await self._generate_raw_itinerary(request)
+            with span("raw_itinerary"):
+                raw_itinerary = await self._generate_raw_itinerary(request)
             logger.info(f"Generated raw itinerary for {request.city}")
             
             # Step 2: Refine into structured JSON
-            structured_itinerary = await self._refine_to_json(raw_itinerary, request)
+            with span("refine_to_json"):
+                structured_itinerary = await self._refine_to_json(raw_itinerary, request)
             logger.info(f"Refined itinerary to structured format")
             
+            if self.cache is not None:
+                await self.cache.set(request, structured_itinerary)
+            
             return structured_itinerary
             
         except Exception as e:
             logger.error(f"Error generating itinerary: {str(e)}")
             raise Exception(f"Failed to generate itinerary: {str(e)}")
     
+    async def stream_itinerary(self, request: ItineraryRequest) -> AsyncIterator[Day]:
+        """
+        Generate an itinerary, yielding each Day as soon as it is complete
+        
+        Step 1 runs as usual; the Step 2 refinement is streamed and parsed
+        incrementally, so the first day is available before the last one has
+        been generated.
+        """
+        if self.cache is not None:
+            cached = await self.cache.get(request)
+            if cached is not None:
+                logger.info(f"Itinerary cache hit for {request.city}")
+                for day in cached:
+                    yield day
+                return
+        
+        days = []
+        if self.generation_mode == "single_pass":
+            parser = DayStreamParser()
+            seen = set()
+            try:
+                async for text in self._stream_content(
+                    self._build_single_pass_prompt(request), operation="single_pass", **self._json_generation_kwargs()
+                ):
+                    for day in self._parse_days(parser.feed(text), seen=seen):
+                        days.append(day)
+                        yield day
+            except Exception as e:
+                # Days already sent cannot be withdrawn, so only fall back if none were
+                if days:
+                    raise
+                logger.warning(f"Single-pass stream failed, falling back to prompt chaining: {str(e)}")
+                UPSTREAM_RETRIES.labels("gemini", "single_pass_fallback").inc()
+            
+            if days:
+                for day in await self._request_missing_days(
+                    request, days,
+                    lambda missing: self._build_single_pass_prompt(request, only_days=missing),
+                    **self._json_generation_kwargs()
+                ):
+                    days.append(day)
+                    yield day
+        
+        if not days:
+            raw_itinerary = await self._generate_raw_itinerary(request)
+            logger.info(f"Generated raw itinerary for {request.city}")
+            
+            parser = DayStreamParser()
+            seen = set()
+            async for text in self._stream_content(self._build_refiner_prompt(raw_itinerary), operation="refine"):
+                for day in self._parse_days(parser.feed(text), seen=seen):
+                    days.append(day)
+                    yield day
+            
+            for day in await self._request_missing_days(
+                request, days, lambda missing: self._build_refiner_prompt(raw_itinerary, only_days=missing)
+            ):
+                days.append(day)
+                yield day
+        
+        if not days:
+            raise Exception("Failed to parse AI response into JSON format")
+        
+        missing = self._missing_days(days, request)
+        if missing:
+            logger.warning(f"Streamed itinerary for {request.city} is still missing days {missing}")
+        logger.info(f"Streamed {len(days)} structured days for {request.city}")
+        if self.cache is not None:
+            await self.cache.set(request, sorted(days, key=lambda day: day.day))
+    
     async def _generate_raw_itinerary(self, request: ItineraryRequest) -> str:
         """Step 1: Generate raw day-by-day itinerary using Gemini"""
         
@@ -72,45 +309,27 @@ class AIService:
         """
         
         try:
-            response = self.model.generate_content(planner_prompt)
+            response = await self._generate_content(planner_prompt, operation="raw_itinerary")
             return response.text
         except Exception as e:
             logger.error(f"Error in raw itinerary generation: {str(e)}")
             raise Exception(f"Failed to generate raw itinerary: {str(e)}")
     
-    async def _refine_to_json(self, raw_itinerary: str, request: ItineraryRequest) -> List[Day]:
-        """Step 2: Convert raw itinerary to structured JSON format"""
+    def _build_refiner_prompt(self, raw_itinerary: str, only_days: Optional[List[int]] = None) -> str:
+        """Prompt that converts a raw itinerary (or only some of its days) into the Day JSON schema"""
+        
+        scope = ""
+        if only_days:
+            scope = f"- Only include days {', '.join(str(d) for d in only_days)}; omit every other day\n"
         
-        refiner_prompt = f"""
+        return f"""
         Take the following travel itinerary and convert it into structured JSON format.
         
         Raw Itinerary:
         {raw_itinerary}
         
         Convert this into a JSON array where each day has the following structure:
-        {{
-            "day": <day_number>,
-            "summary": "<brief summary of the day>",
-            "activities": [
-                {{
-                    "time": "<morning|afternoon|evening>",
-                    "place": "<location name>",
-                    "description": "<brief description>",
-                    "cost": <estimated_cost_in_usd>,
-                    "duration_minutes": <estimated_duration>,
-                    "category": "<attraction|museum|park|shopping|etc>"
-                }}
-            ],
-            "dining": [
-                {{
-                    "name": "<restaurant name>",
-                    "cuisine": "<cuisine type>",
-                    "description": "<brief description>",
-                    "price_per_person": <estimated_price_per_person>,
-                    "price_range": "<$|$$|$$$>"
-                }}
-            ]
-        }}
+        {DAY_JSON_SCHEMA}
         
         Important:
         - Ensure all costs are in USD
@@ -118,48 +337,155 @@ class AIService:
         - Include realistic durations and costs
         - Make sure each day has activities for all three time periods
         - Include at least 2-3 activities per day and 1-2 dining options
+        {scope}- Return ONLY the JSON array, no additional text
+        """
+    
+    def _build_single_pass_prompt(self, request: ItineraryRequest, only_days: Optional[List[int]] = None) -> str:
+        """Prompt that plans the trip (or only some of its days) and returns the Day JSON schema in one call"""
+        
+        elements = f"exactly {request.days} elements"
+        if only_days:
+            elements = f"one element for each of days {', '.join(str(d) for d in only_days)} only"
+        
+        return f"""
+        You are an expert travel planner AI with deep knowledge of destinations worldwide.
+        
+        Plan a travel itinerary for the following request:
+        
+        City: {request.city}
+        Budget: ${request.budget}
+        Days: {request.days}
+        Interests: {', '.join(request.interests) if request.interests else 'General sightseeing'}
+        Dietary Restrictions: {', '.join(request.dietary_restrictions) if request.dietary_restrictions else 'None'}
+        Travel Style: {request.travel_style}
+        Group Size: {request.group_size}
+        
+        Requirements:
+        - Create a balanced itinerary for each day (morning, afternoon, evening)
+        - Include must-visit attractions and hidden gems
+        - Suggest local dining options within budget
+        - Consider travel time between locations
+        - Include estimated costs for activities and dining
+        
+        Return a JSON array with {elements}, where each day has the following structure:
+        {DAY_JSON_SCHEMA}
+        
+        Important:
+        - Ensure all costs are in USD
+        - Include at least 2-3 activities per day and 1-2 dining options
         - Return ONLY the JSON array, no additional text
         """
+    
+    async def _generate_single_pass(self, request: ItineraryRequest) -> List[Day]:
+        """Generate structured days in one call and validate them against the request"""
+        response = await self._generate_content(
+            self._build_single_pass_prompt(request), operation="single_pass", **self._json_generation_kwargs()
+        )
+        days = self._parse_itinerary_text(response.text)
         
-        try:
-            response = self.model.generate_content(refiner_prompt)
-            json_text = response.text.strip()
-            
-            # Clean up the response to extract just the JSON
-            if json_text.startswith("```json"):
-                json_text = json_text[7:]
-            if json_text.endswith("```"):
-                json_text = json_text[:-3]
+        if len(days) != request.days:
+            raise ValueError(f"expected {request.days} days, got {len(days)}")
+        
+        return days
+    
+    def _parse_itinerary_text(self, text: str) -> List[Day]:
+        """
+        Parse a model response containing the JSON array of days
+        
+        Surrounding prose, code fences and a truncated tail are tolerated;
+        every complete, valid day object is returned.
+        """
+        objects, complete = extract_days(text)
+        if not complete:
+            logger.warning(f"Model output was truncated after {len(objects)} day objects")
+        return self._parse_days(objects)
+    
+    def _parse_days(self, objects: Iterable[Dict[str, Any]], seen: Optional[set] = None) -> List[Day]:
+        """Convert day objects to Day models, skipping invalid and duplicate days"""
+        seen = set() if seen is None else seen
+        days = []
+        for day_data in objects:
+            try:
+                day = self._parse_day(day_data)
+            except Exception as e:
+                logger.warning(f"Skipping invalid day object: {str(e)}")
+                continue
+            if day.day in seen:
+                continue
+            seen.add(day.day)
+            days.append(day)
+        return days
+    
+    def _missing_days(self, days: List[Day], request: ItineraryRequest) -> List[int]:
+        """Day numbers from 1 to ``request.days`` that ``days`` does not contain"""
+        have = {day.day for day in days}
+        return [d for d in range(1, request.days + 1) if d not in have]
+    
+    async def _request_missing_days(
+        self,
+        request: ItineraryRequest,
+        days: List[Day],
+        build_prompt: Callable[[List[int]], str],
+        **kwargs
+    ) -> List[Day]:
+        """Regenerate the days absent from a partial result; returns only the new days
+        
+        ``build_prompt`` turns the missing day numbers into the prompt that
+        produced ``days``, scoped to those days.
+        """
+        recovered = []
+        for attempt in range(settings.LLM_MAX_REPAIR_ATTEMPTS):
+            missing = self._missing_days(days + recovered, request)
+            if not missing:
+                break
             
-            json_text = json_text.strip()
+            logger.warning(f"Re-requesting missing days {missing} for {request.city}")
+            UPSTREAM_RETRIES.labels("gemini", "missing_days").inc()
+            response = await self._generate_content(build_prompt(missing), operation="repair", **kwargs)
+            objects, _ = extract_days(response.text)
+            seen = {day.day for day in days + recovered}
+            recovered += self._parse_days(
+                (o for o in objects if o.get("day") in missing), seen=seen
+            )
+        
+        return recovered
+    
+    def _parse_day(self, day_data: Dict[str, Any]) -> Day:
+        """Convert one day of model JSON output into a Day object"""
+        activities = [
+            Activity(**activity) for activity in day_data.get("activities", [])
+        ]
+        dining = [
+            Dining(**dining) for dining in day_data.get("dining", [])
+        ]
+        
+        return Day(
+            day=day_data["day"],
+            summary=day_data["summary"],
+            activities=activities,
+            dining=dining
+        )
+    
+    async def _refine_to_json(self, raw_itinerary: str, request: ItineraryRequest) -> List[Day]:
+        """Step 2: Convert raw itinerary to structured JSON format"""
+        
+        refiner_prompt = self._build_refiner_prompt(raw_itinerary)
+        
+        try:
+            response = await self._generate_content(refiner_prompt, operation="refine")
+            days = self._parse_itinerary_text(response.text)
             
-            # Parse the JSON response
-            itinerary_data = json.loads(json_text)
+            # Only the days lost to truncation or invalid output are regenerated
+            days += await self._request_missing_days(
+                request, days, lambda missing: self._build_refiner_prompt(raw_itinerary, only_days=missing)
+            )
             
-            # Convert to Day objects
-            days = []
-            for day_data in itinerary_data:
-                activities = [
-                    Activity(**activity) for activity in day_data.get("activities", [])
-                ]
-                dining = [
-                    Dining(**dining) for dining in day_data.get("dining", [])
-                ]
-                
-                day = Day(
-                    day=day_data["day"],
-                    summary=day_data["summary"],
-                    activities=activities,
-                    dining=dining
-                )
-                days.append(day)
+            if not days:
+                logger.error(f"Raw response: {response.text}")
+                raise Exception("Failed to parse AI response into JSON format")
             
-            return days
+            return sorted(days, key=lambda day: day.day)
             
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parsing error: {str(e)}")
-            logger.error(f"Raw response: {response.text}")
-            raise Exception("Failed to parse AI response into JSON format")
         except Exception as e:
             logger.error(f"Error in JSON refinement: {str(e)}")
             raise Exception(f"Failed to refine itinerary: {str(e)}")
@@ -189,7 +515,7 @@ class AIService:
         """
         
         try:
-            response = self.model.generate_content(enhancement_prompt)
+            response = await self._generate_content(enhancement_prompt, operation="enhance")
             # Process enhancement response and update days
             # This would parse the response and merge with existing data
             return days
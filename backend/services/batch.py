@@ -0,0 +1,129 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+from core.config import settings
+from models.itinerary import (
+    ItineraryRequest,
+    ItineraryResponse,
+    BatchItineraryResult,
+    BatchJobStatus
+)
+from services.itinerary_cache import itinerary_cache_key
+from services.planner import ItineraryPlanner
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def request_key(request: ItineraryRequest) -> str:
+    """Identity of a request within a batch
+
+    The normalized cache key plus the exact budget, since the budget stage
+    fits each itinerary to its own budget.
+    """
+    return f"{itinerary_cache_key(request)}:{request.budget}"
+
+class BatchJob:
+    """One submitted batch: its requests, their dedupe keys and the results so far"""
+
+    def __init__(self, requests: List[ItineraryRequest]):
+        self.id = str(uuid.uuid4())
+        self.requests = requests
+        self.keys = [request_key(r) for r in requests]
+        self.unique: Dict[str, ItineraryRequest] = {}
+        for key, request in zip(self.keys, requests):
+            self.unique.setdefault(key, request)
+        self.results: Dict[str, ItineraryResponse] = {}
+        self.errors: Dict[str, str] = {}
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self.finished_monotonic: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def status(self, include_results: bool = True) -> BatchJobStatus:
+        completed = sum(1 for key in self.keys if key in self.results)
+        failed = sum(1 for key in self.keys if key in self.errors)
+        if not self.done:
+            state = "running"
+        else:
+            state = "failed" if completed == 0 and failed else "completed"
+
+        results = None
+        if include_results:
+            results = []
+            for index, key in enumerate(self.keys):
+                if key in self.results:
+                    results.append(BatchItineraryResult(index=index, status="completed", result=self.results[key]))
+                elif key in self.errors:
+                    results.append(BatchItineraryResult(index=index, status="failed", error=self.errors[key]))
+                else:
+                    results.append(BatchItineraryResult(index=index, status="pending"))
+
+        return BatchJobStatus(
+            job_id=self.id,
+            status=state,
+            total=len(self.keys),
+            unique=len(self.unique),
+            completed=completed,
+            failed=failed,
+            created_at=self.created_at,
+            finished_at=self.finished_at,
+            results=results
+        )
+
+class BatchRunner:
+    """Runs batches of itinerary requests in the background
+
+    Identical requests in a batch are generated once. Every batch shares one
+    pool of BATCH_MAX_CONCURRENCY slots, so a large batch cannot starve the
+    process; Gemini and Maps calls are further bounded by the services' own
+    concurrency and rate limits.
+    """
+
+    def __init__(self, planner: ItineraryPlanner, max_concurrency: Optional[int] = None):
+        self.planner = planner
+        self.jobs: Dict[str, BatchJob] = {}
+        self._slots = asyncio.Semaphore(max_concurrency or settings.BATCH_MAX_CONCURRENCY)
+
+    def submit(self, requests: List[ItineraryRequest]) -> BatchJob:
+        """Start generating ``requests`` and return the job to poll"""
+        self._prune()
+        job = BatchJob(requests)
+        self.jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job))
+        logger.info(f"Batch {job.id}: {len(job.keys)} requests, {len(job.unique)} unique")
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        return self.jobs.get(job_id)
+
+    async def _run(self, job: BatchJob):
+        await asyncio.gather(*(self._build(job, key, request) for key, request in job.unique.items()))
+        job.finished_at = datetime.utcnow()
+        job.finished_monotonic = time.monotonic()
+        logger.info(f"Batch {job.id} finished: {len(job.results)} built, {len(job.errors)} failed")
+
+    async def _build(self, job: BatchJob, key: str, request: ItineraryRequest):
+        async with self._slots:
+            try:
+                job.results[key] = await self.planner.build(request)
+            except Exception as e:
+                logger.warning(f"Batch {job.id}: itinerary for {request.city} failed: {e}")
+                job.errors[key] = str(e)
+
+    def _prune(self):
+        """Forget finished jobs older than BATCH_JOB_TTL_SECONDS"""
+        cutoff = time.monotonic() - settings.BATCH_JOB_TTL_SECONDS
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.done and job.finished_monotonic < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
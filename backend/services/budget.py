@@ -0,0 +1,88 @@
+"""
+Budget fitting for itineraries.
+
+Every priced activity and dining option is either kept at its own price or
+dropped; prices of real places are never changed. Choosing which items to
+keep to maximize the value kept without exceeding the budget is a 0/1
+knapsack, solved exactly by dynamic programming over whole-dollar (or
+coarser) cost steps, vectorized across the budget axis with NumPy.
+"""
+
+import math
+import numpy as np
+from typing import Any, Dict, Tuple
+
+from core.config import settings
+from services.itinerary_columns import ACTIVITY, ItineraryColumns
+
+def item_values(columns: ItineraryColumns) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Cost and value of every priced row
+
+    Returns the row indices, their costs and their values. Rows without a
+    cost are free to keep and are left out.
+    """
+    rows = np.flatnonzero(columns.cost > 0)
+    is_activity = columns.kind[rows] == ACTIVITY
+
+    # Longer visits are the ones the plan is built around; better rated meals are worth more
+    value = np.where(
+        is_activity,
+        settings.BUDGET_ACTIVITY_VALUE * (1 + columns.duration[rows] / 120),
+        settings.BUDGET_DINING_VALUE * np.nan_to_num(columns.rating[rows], nan=4.0) / 4.0
+    )
+    return rows, columns.cost[rows], value
+
+def solve_knapsack(costs: np.ndarray, values: np.ndarray, capacity: float) -> np.ndarray:
+    """Mask of the items to keep, maximizing total value with total cost <= capacity
+
+    Costs are rounded up to a step of at least one unit, chosen so the
+    table has at most BUDGET_MAX_STEPS columns, so the kept items always
+    fit.
+    """
+    n = len(costs)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    step = max(1.0, capacity / settings.BUDGET_MAX_STEPS)
+    steps = int(math.floor(capacity / step))
+    weights = np.ceil(costs / step - 1e-9).astype(int)
+
+    # best[b]: best value with cost at most b steps
+    best = np.zeros(steps + 1)
+    taken = np.zeros((n, steps + 1), dtype=bool)
+    for i in range(n):
+        w = weights[i]
+        if w > steps:
+            continue
+        with_item = best[:steps + 1 - w] + values[i]
+        taken[i, w:] = with_item > best[w:]
+        best[w:] = np.maximum(best[w:], with_item)
+
+    # Walk back from the full budget
+    b = steps
+    for i in range(n - 1, -1, -1):
+        if taken[i, b]:
+            keep[i] = True
+            b -= weights[i]
+    return keep
+
+def fit_columns_to_budget(columns: ItineraryColumns, total_budget: float) -> Tuple[ItineraryColumns, Dict[str, Any]]:
+    """Fit the itinerary's activity and dining costs into ``total_budget``
+
+    Returns new columns without the dropped rows (kept items are unchanged)
+    and a summary of what was kept and dropped.
+    """
+    rows, cost, value = item_values(columns)
+    keep = solve_knapsack(cost, value, max(0.0, total_budget))
+    full_value = value.sum()
+    summary = {
+        'keep': int(keep.sum()),
+        'drop': int(len(keep) - keep.sum()),
+        'cost_before': float(cost.sum()),
+        'cost_after': float(cost[keep].sum()),
+        'value_kept': float(value[keep].sum() / full_value) if full_value else 1.0,
+    }
+
+    selected = np.ones(len(columns), dtype=bool)
+    selected[rows[~keep]] = False
+    return columns.select(selected), summary
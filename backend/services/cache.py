@@ -0,0 +1,273 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Keys per query, below SQLite's default limit on host parameters
+_MAX_QUERY_KEYS = 900
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after a TTL
+
+    When ``max_bytes`` is set, least recently used entries are also evicted
+    to keep the estimated size of the stored values under that budget.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value, size = entry
+            if expires_at < time.monotonic():
+                self._pop(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None, size: Optional[int] = None):
+        """Store a value, evicting the least recently used entries when full"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if self.max_bytes is not None and size is None:
+            size = len(json.dumps(value, default=str))
+        size = size or 0
+
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (time.monotonic() + ttl, value, size)
+            self.total_bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or
+                (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+            ):
+                self._pop(next(iter(self._entries)))
+
+    def _pop(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self.total_bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SQLiteStore:
+    """Persistent key/value store for JSON-serializable values with per-entry expiry"""
+
+    def __init__(self, path: str, table: str = "cache"):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the stored value, or None if missing or expired"""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return the stored value and its remaining TTL in seconds"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        remaining = row[1] - time.time()
+        if remaining <= 0:
+            return None
+        return json.loads(row[0]), remaining
+
+    def get_entries(self, keys: List[str]) -> Dict[str, Tuple[Any, float]]:
+        """``get_entry`` for many keys at once; missing and expired keys are left out"""
+        rows = []
+        with self._lock:
+            for start in range(0, len(keys), _MAX_QUERY_KEYS):
+                chunk = keys[start:start + _MAX_QUERY_KEYS]
+                rows += self._conn.execute(
+                    f"SELECT key, value, expires_at FROM {self.table} "
+                    f"WHERE key IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall()
+        now = time.time()
+        return {key: (json.loads(value), expires_at - now) for key, value, expires_at in rows if expires_at > now}
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ttl_seconds)
+            )
+            self._conn.commit()
+
+    def set_many(self, items: List[Tuple[str, Any]], ttl_seconds: float):
+        """Store several values in one transaction"""
+        expires_at = time.time() + ttl_seconds
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(value), expires_at) for key, value in items]
+            )
+            self._conn.commit()
+
+    def delete_many(self, keys: List[str]):
+        with self._lock:
+            self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", [(key,) for key in keys])
+            self._conn.commit()
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """Return every unexpired key and value"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, value FROM {self.table} WHERE expires_at >= ?", (time.time(),)
+            ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed"""
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM {self.table} WHERE expires_at < ?", (time.time(),)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class TieredCache:
+    """In-process LRU tier backed by an optional SQLite tier, with hit/miss counters"""
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        db_path: Optional[str] = None,
+        table: str = "cache",
+        max_bytes: Optional[int] = None
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.memory = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds, max_bytes=max_bytes)
+        self.disk = SQLiteStore(db_path, table=table) if db_path else None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats["memory_hits"] += 1
+            return value
+
+        if self.disk is not None:
+            entry = await asyncio.to_thread(self.disk.get_entry, key)
+            if entry is not None:
+                value, remaining = entry
+                self.stats["disk_hits"] += 1
+                self.memory.set(key, value, ttl_seconds=remaining)
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Cached values for ``keys``: one pass over memory, then one SQLite lookup for the rest"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        pending = []
+        for key in keys:
+            value = self.memory.get(key)
+            if value is None:
+                pending.append(key)
+            else:
+                found[key] = value
+        self.stats["memory_hits"] += len(found)
+
+        if pending and self.disk is not None:
+            entries = await asyncio.to_thread(self.disk.get_entries, pending)
+            for key, (value, remaining) in entries.items():
+                self.memory.set(key, value, ttl_seconds=remaining)
+                found[key] = value
+            self.stats["disk_hits"] += len(entries)
+
+        self.stats["misses"] += len(keys) - len(found)
+        return found
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None, size: Optional[int] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.stats["writes"] += 1
+        self.memory.set(key, value, ttl_seconds=ttl, size=size)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value, ttl)
+
+    async def set_many(self, items: List[Tuple[str, Any]], ttl_seconds: Optional[float] = None):
+        """``set`` for many values, written to SQLite in one transaction"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.stats["writes"] += len(items)
+        for key, value in items:
+            self.memory.set(key, value, ttl_seconds=ttl)
+        if self.disk is not None and items:
+            await asyncio.to_thread(self.disk.set_many, items, ttl)
+
+    async def purge_expired(self) -> int:
+        """Delete expired rows from the SQLite tier and return how many were removed"""
+        if self.disk is None:
+            return 0
+        return await asyncio.to_thread(self.disk.purge_expired)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return counters plus the overall hit rate"""
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self.memory),
+            "memory_bytes": self.memory.total_bytes,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+async def purge_expired_periodically(caches: List[TieredCache], interval_seconds: float):
+    """Purge expired rows from ``caches`` now, then every ``interval_seconds`` (0: once only)
+
+    Lookups skip expired rows without deleting them, so without this the
+    SQLite files keep every entry ever written.
+    """
+    while True:
+        for cache in caches:
+            try:
+                removed = await cache.purge_expired()
+                if removed:
+                    logger.info(f"Purged {removed} expired rows from {cache.disk.path}:{cache.disk.table}")
+            except Exception as e:
+                logger.warning(f"Failed to purge expired cache rows: {str(e)}")
+        if interval_seconds <= 0:
+            return
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,304 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+import httpx
+from core.config import settings
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode for a request the cassette has no recording of"""
+
+    def __init__(self, kind: str, key: str, request: Optional[str] = None):
+        super().__init__(f"No recorded {kind} interaction for {request or key}")
+        self.kind = kind
+        self.key = key
+
+class RecordedUpstreamError(Exception):
+    """Replays an upstream failure captured while recording"""
+
+def _describe(value: Any) -> Any:
+    """JSON stand-in for SDK objects (e.g. GenerationConfig) passed as call arguments"""
+    return getattr(value, "__dict__", None) or repr(value)
+
+def _usage(response: Any) -> Optional[List[int]]:
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None
+    return [usage.prompt_token_count, usage.candidates_token_count]
+
+def _error(exc: Exception) -> str:
+    return f"{type(exc).__name__}: {exc}"
+
+class Cassette:
+    """Recorded Gemini and Maps traffic, kept as one JSON line per interaction
+
+    Each line holds the interaction kind, a hash of the request, the upstream
+    latency in milliseconds and the response (text, stream chunks with their
+    arrival times, or the HTTP status and body); files ending in ``.gz`` are
+    gzip-compressed. In record mode interactions are appended as they
+    complete. In replay mode requests are matched by hash; a request recorded
+    several times gets its responses in turn, and with ``replay_timing`` each
+    response waits out its recorded latency times ``timing_scale``.
+    """
+
+    def __init__(self, path: str, mode: str, replay_timing: bool = False, timing_scale: float = 1.0):
+        if mode not in CASSETTE_MODES[1:]:
+            raise ValueError(f"Cassette mode must be one of {CASSETTE_MODES[1:]}")
+        self.path = path
+        self.mode = mode
+        self.replay_timing = replay_timing
+        self.timing_scale = timing_scale
+        self._file = None
+        self._entries: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._cursors: Dict[Tuple[str, str], int] = {}
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+        if self.replaying:
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _open(self, mode: str):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, mode + "t", encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def _load(self):
+        with self._open("r") as f:
+            try:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault((entry["kind"], entry["key"]), []).append(entry)
+            except (EOFError, json.JSONDecodeError):
+                pass  # A recording cut short keeps everything before the last flush
+
+    @staticmethod
+    def make_key(payload: Any) -> str:
+        encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=_describe)
+        return hashlib.sha1(encoded.encode()).hexdigest()
+
+    def record(self, kind: str, key: str, start: float, response: Dict[str, Any], request: Optional[str] = None):
+        """Append an interaction that started at ``start`` (``time.perf_counter()``)"""
+        entry = {"kind": kind, "key": key, "ms": round((time.perf_counter() - start) * 1000, 1)}
+        if request is not None:
+            entry["request"] = request
+        entry["response"] = response
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = self._open("a")
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self.stats["recorded"] += 1
+
+    def next(self, kind: str, key: str, request: Optional[str] = None) -> Dict[str, Any]:
+        """The next recorded interaction for a request, cycling through repeats"""
+        entries = self._entries.get((kind, key))
+        if not entries:
+            self.stats["misses"] += 1
+            raise CassetteMiss(kind, key, request)
+        cursor = self._cursors.get((kind, key), 0)
+        self._cursors[(kind, key)] = cursor + 1
+        self.stats["replayed"] += 1
+        return entries[cursor % len(entries)]
+
+    async def wait(self, start: float, ms: float):
+        """Sleep until ``ms`` recorded milliseconds after ``start`` when replaying timings"""
+        if self.replay_timing:
+            delay = start + ms * self.timing_scale / 1000 - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    def wrap_model(self, model: Any = None, model_name: Optional[str] = None) -> "CassetteModel":
+        return CassetteModel(self, model, model_name or settings.GEMINI_MODEL)
+
+    def transport(self, transport: Optional[httpx.AsyncBaseTransport] = None) -> "CassetteTransport":
+        return CassetteTransport(self, transport)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "mode": self.mode,
+            "path": self.path,
+            "interactions": sum(len(entries) for entries in self._entries.values()),
+        }
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class _ReplayResponse:
+    """Recorded Gemini response exposing ``text`` and ``usage_metadata`` like the SDK's"""
+
+    def __init__(self, payload: Dict[str, Any]):
+        self._payload = payload
+        usage = payload.get("usage")
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=usage[0], candidates_token_count=usage[1]
+        ) if usage else None
+
+    @property
+    def text(self) -> str:
+        if "text_error" in self._payload:
+            raise ValueError(self._payload["text_error"])
+        if "chunks" in self._payload:
+            return "".join(text for _, text in self._payload["chunks"])
+        return self._payload["text"]
+
+class _ReplayStream(_ReplayResponse):
+    """Recorded streaming response releasing its chunks at their recorded offsets"""
+
+    def __init__(self, cassette: Cassette, payload: Dict[str, Any], start: float):
+        super().__init__(payload)
+        self._cassette = cassette
+        self._start = start
+
+    async def __aiter__(self):
+        for offset, text in self._payload["chunks"]:
+            await self._cassette.wait(self._start, offset)
+            yield _ReplayResponse({"text": text})
+        if "error" in self._payload:
+            raise RecordedUpstreamError(self._payload["error"])
+
+class _RecordingStream:
+    """Passes a streaming response through, recording its chunks once it is exhausted"""
+
+    def __init__(self, cassette: Cassette, key: str, start: float, response: Any):
+        self._cassette = cassette
+        self._key = key
+        self._start = start
+        self._response = response
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+    async def __aiter__(self):
+        chunks = []
+        try:
+            async for chunk in self._response:
+                chunks.append([round((time.perf_counter() - self._start) * 1000, 1), chunk.text])
+                yield chunk
+        except Exception as e:
+            self._cassette.record("gemini", self._key, self._start, {"chunks": chunks, "error": _error(e)})
+            raise
+        self._cassette.record(
+            "gemini", self._key, self._start, {"chunks": chunks, "usage": _usage(self._response)}
+        )
+
+class CassetteModel:
+    """Stand-in for ``genai.GenerativeModel`` that records or replays ``generate_content_async``"""
+
+    def __init__(self, cassette: Cassette, model: Any, model_name: str):
+        if model is None and not cassette.replaying:
+            raise ValueError("Recording needs the model to record")
+        self.cassette = cassette
+        self.model = model
+        self.model_name = model_name
+
+    async def generate_content_async(self, prompt: Any, stream: bool = False, **kwargs) -> Any:
+        key = Cassette.make_key({"model": self.model_name, "prompt": prompt, "stream": stream, "kwargs": kwargs})
+        start = time.perf_counter()
+        if self.cassette.replaying:
+            entry = self.cassette.next("gemini", key)
+            payload = entry["response"]
+            if stream:
+                return _ReplayStream(self.cassette, payload, start)
+            await self.cassette.wait(start, entry["ms"])
+            if "error" in payload:
+                raise RecordedUpstreamError(payload["error"])
+            return _ReplayResponse(payload)
+
+        try:
+            response = await self.model.generate_content_async(prompt, stream=stream, **kwargs)
+        except Exception as e:
+            self.cassette.record("gemini", key, start, {"error": _error(e)})
+            raise
+        if stream:
+            return _RecordingStream(self.cassette, key, start, response)
+
+        try:
+            payload = {"text": response.text, "usage": _usage(response)}
+        except ValueError as e:  # Blocked or empty candidates
+            payload = {"text_error": str(e), "usage": _usage(response)}
+        self.cassette.record("gemini", key, start, payload)
+        return response
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records or replays Maps web-service responses
+
+    Requests are matched on method, path and query string without the API
+    key, which is never written to the cassette.
+    """
+
+    def __init__(self, cassette: Cassette, transport: Optional[httpx.AsyncBaseTransport] = None):
+        if transport is None and not cassette.replaying:
+            raise ValueError("Recording needs the transport to record")
+        self.cassette = cassette
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        params = sorted((k, v) for k, v in request.url.params.multi_items() if k != "key")
+        described = f"{request.method} {request.url.path}?{urlencode(params)}"
+        key = Cassette.make_key(described)
+        start = time.perf_counter()
+
+        if self.cassette.replaying:
+            entry = self.cassette.next("maps", key, described)
+            await self.cassette.wait(start, entry["ms"])
+            payload = entry["response"]
+            if "error" in payload:
+                raise httpx.TransportError(payload["error"], request=request)
+            return httpx.Response(
+                payload["status"],
+                headers={"content-type": payload["content_type"]},
+                content=payload["body"].encode(),
+                request=request
+            )
+
+        try:
+            response = await self.transport.handle_async_request(request)
+            try:
+                content = await response.aread()
+            finally:
+                await response.aclose()
+        except httpx.TransportError as e:
+            self.cassette.record("maps", key, start, {"error": _error(e)}, described)
+            raise
+        content_type = response.headers.get("content-type", "application/json")
+        self.cassette.record("maps", key, start, {
+            "status": response.status_code,
+            "content_type": content_type,
+            "body": content.decode(response.encoding or "utf-8"),
+        }, described)
+        return httpx.Response(
+            response.status_code, headers={"content-type": content_type}, content=content, request=request
+        )
+
+    async def aclose(self):
+        if self.transport is not None:
+            await self.transport.aclose()
+
+_cassette: Optional[Cassette] = None
+
+def get_cassette() -> Optional[Cassette]:
+    """Return the process-wide cassette, or None when CASSETTE_MODE is "off" """
+    global _cassette
+    if settings.CASSETTE_MODE not in CASSETTE_MODES:
+        raise ValueError(f"CASSETTE_MODE must be one of {CASSETTE_MODES}")
+    if _cassette is None and settings.CASSETTE_MODE != "off":
+        _cassette = Cassette(
+            settings.CASSETTE_PATH,
+            settings.CASSETTE_MODE,
+            replay_timing=settings.CASSETTE_REPLAY_TIMING,
+            timing_scale=settings.CASSETTE_TIMING_SCALE
+        )
+    return _cassette
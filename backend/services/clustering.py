@@ -0,0 +1,169 @@
+"""
+Geographic clustering of attractions.
+
+Coordinates are projected to a local plane in kilometers before clustering,
+so distances mean the same thing north-south and east-west. The engine keeps
+no per-call state on the instance (estimators are created per call and the
+centroid cache is locked), so one engine can serve concurrent requests from
+any thread.
+"""
+
+import math
+import re
+import numpy as np
+from typing import Optional, Sequence, Tuple
+from sklearn.cluster import KMeans, MiniBatchKMeans
+
+from core.config import settings
+from services.cache import TTLCache
+from services.routing import EARTH_RADIUS_KM
+
+ALGORITHMS = ("kmeans", "minibatch", "balanced")
+
+def project_local(lats: Sequence[float], lngs: Sequence[float], origin: Optional[Tuple[float, float]] = None):
+    """Equirectangular projection to kilometers around ``origin`` (default: the mean point)
+
+    Returns the (n, 2) array of x/y kilometers and the origin used.
+    """
+    lats = np.radians(np.asarray(lats, dtype=float))
+    lngs = np.radians(np.asarray(lngs, dtype=float))
+    if origin is None:
+        origin = (float(np.degrees(lats.mean())), float(np.degrees(lngs.mean())))
+    lat0, lng0 = np.radians(origin[0]), np.radians(origin[1])
+    x = (lngs - lng0) * np.cos(lat0) * EARTH_RADIUS_KM
+    y = (lats - lat0) * EARTH_RADIUS_KM
+    return np.column_stack([x, y]), origin
+
+def unproject_local(points: np.ndarray, origin: Tuple[float, float]) -> np.ndarray:
+    """Inverse of ``project_local``: (n, 2) kilometers back to (n, 2) lat/lng"""
+    lat0 = np.radians(origin[0])
+    lats = origin[0] + np.degrees(points[:, 1] / EARTH_RADIUS_KM)
+    lngs = origin[1] + np.degrees(points[:, 0] / (EARTH_RADIUS_KM * np.cos(lat0)))
+    return np.column_stack([lats, lngs])
+
+def balanced_assign(points: np.ndarray, centers: np.ndarray, capacity: int) -> np.ndarray:
+    """Assign each point to its nearest center that still has room
+
+    Points that lose most by not getting their first choice (largest regret)
+    are placed first.
+    """
+    n, k = len(points), len(centers)
+    distances = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+    preferences = np.argsort(distances, axis=1)
+    rows = np.arange(n)
+    if k > 1:
+        regret = distances[rows, preferences[:, 1]] - distances[rows, preferences[:, 0]]
+    else:
+        regret = np.zeros(n)
+
+    labels = np.empty(n, dtype=int)
+    counts = [0] * k
+    preferences = preferences.tolist()
+    for i in np.argsort(-regret, kind="stable").tolist():
+        for cluster in preferences[i]:
+            if counts[cluster] < capacity:
+                labels[i] = cluster
+                counts[cluster] += 1
+                break
+    return labels
+
+def balanced_kmeans(
+    points: np.ndarray,
+    n_clusters: int,
+    capacity: int,
+    init: np.ndarray,
+    max_iter: int = 10
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Capacity-constrained k-means: alternate balanced assignment and center updates"""
+    centers = init.copy()
+    labels = None
+    for _ in range(max_iter):
+        new_labels = balanced_assign(points, centers, capacity)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for cluster in range(n_clusters):
+            members = points[labels == cluster]
+            if len(members):
+                centers[cluster] = members.mean(axis=0)
+    return labels, centers
+
+def _city_key(city: str, n_clusters: int) -> str:
+    city = re.sub(r"\s+", " ", city).strip().casefold()
+    return f"{city}:{n_clusters}"
+
+class ClusteringEngine:
+    """k-means over projected coordinates, with per-city warm starts
+
+    ``kmeans`` is full k-means, ``minibatch`` trades a little quality for
+    speed on large inputs, and ``balanced`` caps the size of every cluster
+    (by default at an even share) so each day gets a similar load.
+    Centroids found for a city seed the next clustering of that city.
+    """
+
+    def __init__(self, algorithm: Optional[str] = None, random_state: int = 42):
+        self.algorithm = algorithm or settings.CLUSTERING_ALGORITHM
+        if self.algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown clustering algorithm: {self.algorithm}")
+        self.random_state = random_state
+        self.centroids = TTLCache(
+            max_entries=settings.CLUSTERING_CENTROID_CACHE_ENTRIES,
+            ttl_seconds=settings.CLUSTERING_CENTROID_TTL_SECONDS
+        )
+
+    def fit(
+        self,
+        lats: Sequence[float],
+        lngs: Sequence[float],
+        n_clusters: int,
+        city: Optional[str] = None,
+        capacity: Optional[int] = None,
+        algorithm: Optional[str] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Cluster points; returns labels and the (k, 2) lat/lng centroids"""
+        algorithm = algorithm or self.algorithm
+        if capacity is not None:
+            algorithm = "balanced"
+        points, origin = project_local(lats, lngs)
+        n = len(points)
+        n_clusters = min(n_clusters, n)
+        # Full k-means gets slow on large inputs; mini-batches scale linearly
+        minibatch = algorithm == "minibatch" or n >= settings.CLUSTERING_MINIBATCH_MIN_POINTS
+
+        # Warm start from the last centroids found for this city
+        init = None
+        key = _city_key(city, n_clusters) if city else None
+        if key is not None:
+            cached = self.centroids.get(key)
+            if cached is not None:
+                init, _ = project_local([c[0] for c in cached], [c[1] for c in cached], origin)
+
+        if minibatch:
+            model = MiniBatchKMeans(
+                n_clusters=n_clusters,
+                init=init if init is not None else "k-means++",
+                n_init=1 if init is not None else 3,
+                batch_size=settings.CLUSTERING_BATCH_SIZE,
+                random_state=self.random_state
+            )
+        else:
+            model = KMeans(
+                n_clusters=n_clusters,
+                init=init if init is not None else "k-means++",
+                n_init=1 if init is not None else settings.CLUSTERING_N_INIT,
+                random_state=self.random_state
+            )
+        labels = model.fit_predict(points)
+        centers = model.cluster_centers_
+
+        if algorithm == "balanced":
+            capacity = capacity or math.ceil(n / n_clusters)
+            if capacity * n_clusters < n:
+                raise ValueError(f"{n} points do not fit in {n_clusters} clusters of {capacity}")
+            if np.bincount(labels, minlength=n_clusters).max() > capacity:
+                labels, centers = balanced_kmeans(points, n_clusters, capacity, centers)
+
+        centroids = unproject_local(centers, origin)
+        if key is not None:
+            self.centroids.set(key, centroids.tolist())
+        return labels, centroids
@@ -0,0 +1,115 @@
+import asyncio
+import re
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
+import logging
+from models.itinerary import Day
+from core.config import settings
+from services.maps_client import MapsGateway, get_maps_gateway
+from services.routing import haversine_km
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def normalize_place_name(name: str) -> str:
+    """Key used to geocode a place once however the model spelled its case and spacing"""
+    return re.sub(r"\s+", " ", name).strip().casefold()
+
+def map_link(name: str, coordinates: Dict[str, float], place_id: Optional[str] = None) -> str:
+    """Google Maps URL for a place"""
+    params = {'api': 1, 'query': f"{coordinates['lat']},{coordinates['lng']}"}
+    if place_id:
+        params = {'api': 1, 'query': name, 'query_place_id': place_id}
+    return f"https://www.google.com/maps/search/?{urlencode(params)}"
+
+class GeocodingStage:
+    """Fills in coordinates and map links for the places in generated days
+
+    The model names places but never locates them. Every distinct name is
+    geocoded once, concurrently, biased to the viewport of the destination
+    city. Results outside the city are discarded rather than routing the
+    traveller to a namesake elsewhere. Repeated lookups are served by the
+    Maps gateway cache; only the ones that reach the API count against the
+    gateway's geocode rate limit.
+    """
+
+    def __init__(self, maps_gateway: Optional[MapsGateway] = None):
+        self.gmaps = maps_gateway or get_maps_gateway()
+
+    async def geocode_days(self, days: List[Day], city: str) -> Dict[str, Any]:
+        """Write coordinates and map links into the days in place
+
+        Returns counts of unique, resolved and unresolved names and the
+        stage latency in milliseconds.
+        """
+        start = time.perf_counter()
+
+        # Every item still missing coordinates, grouped by place name
+        pending: Dict[str, List[Any]] = {}
+        for day in days:
+            for item in list(day.activities) + list(day.dining):
+                name = getattr(item, 'place', None) or getattr(item, 'name', None)
+                if name and not item.coordinates:
+                    pending.setdefault(normalize_place_name(name), []).append(item)
+
+        resolved = 0
+        if pending:
+            center, bounds = await self._locate_city(city)
+            names = list(pending)
+            results = await asyncio.gather(*(
+                self._geocode_place(pending[key][0], city, center, bounds) for key in names
+            ))
+            for key, result in zip(names, results):
+                if result is None:
+                    continue
+                resolved += 1
+                coordinates, place_id = result
+                for item in pending[key]:
+                    name = getattr(item, 'place', None) or item.name
+                    item.coordinates = coordinates
+                    if not item.map_link:
+                        item.map_link = map_link(name, coordinates, place_id)
+
+        stats = {
+            'unique_places': len(pending),
+            'resolved': resolved,
+            'unresolved': len(pending) - resolved,
+            'latency_ms': round((time.perf_counter() - start) * 1000, 1),
+        }
+        logger.info(f"Geocoded places for {city}: {stats}")
+        return stats
+
+    async def _locate_city(self, city: str):
+        """Center and 'south,west|north,east' viewport of the destination city"""
+        try:
+            results = await self.gmaps.geocode(city)
+        except Exception as e:
+            logger.warning(f"Could not geocode city {city}: {str(e)}")
+            return None, None
+        if not results:
+            return None, None
+
+        geometry = results[0]['geometry']
+        viewport = geometry.get('viewport')
+        bounds = None
+        if viewport:
+            sw, ne = viewport['southwest'], viewport['northeast']
+            bounds = f"{sw['lat']},{sw['lng']}|{ne['lat']},{ne['lng']}"
+        return geometry['location'], bounds
+
+    async def _geocode_place(self, item: Any, city: str, center, bounds):
+        """Coordinates and place id for one item, or None if not found in the city"""
+        name = getattr(item, 'place', None) or item.name
+        try:
+            results = await self.gmaps.geocode(f"{name}, {city}", bounds=bounds)
+        except Exception as e:
+            logger.warning(f"Could not geocode {name}: {str(e)}")
+            return None
+
+        for result in results:
+            location = result['geometry']['location']
+            if center is None or haversine_km(center, location) <= settings.GEOCODE_MAX_CITY_DISTANCE_KM:
+                return {'lat': location['lat'], 'lng': location['lng']}, result.get('place_id')
+        return None
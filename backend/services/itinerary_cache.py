@@ -0,0 +1,63 @@
+import bisect
+import hashlib
+import json
+import unicodedata
+from typing import Any, Dict, List, Optional
+from core.config import settings
+from models.itinerary import ItineraryRequest, Day
+from services.cache import TieredCache
+
+def _normalize_text(value: str) -> str:
+    """Casefold, strip accents and collapse whitespace"""
+    value = unicodedata.normalize("NFKD", value)
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    return " ".join(value.casefold().split())
+
+def _normalize_list(values: Optional[List[str]]) -> List[str]:
+    return sorted({_normalize_text(v) for v in values or [] if v and v.strip()})
+
+def budget_band(budget: float, bands: Optional[List[float]] = None) -> int:
+    """Return the index of the configured budget band that contains ``budget``"""
+    return bisect.bisect_right(bands or settings.ITINERARY_CACHE_BUDGET_BANDS, budget)
+
+def itinerary_cache_key(request: ItineraryRequest) -> str:
+    """Content hash of the fields of a request that shape the generated itinerary"""
+    canonical = {
+        "city": _normalize_text(request.city),
+        "days": request.days,
+        "budget_band": budget_band(request.budget),
+        "interests": _normalize_list(request.interests),
+        "dietary_restrictions": _normalize_list(request.dietary_restrictions),
+        "travel_style": _normalize_text(request.travel_style or "balanced"),
+        "group_size": request.group_size or 1,
+        "model": settings.GEMINI_MODEL,
+    }
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ItineraryCache:
+    """Cache of generated itineraries keyed on the normalized request"""
+
+    def __init__(self):
+        self.store = TieredCache(
+            max_entries=settings.ITINERARY_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.ITINERARY_CACHE_TTL_SECONDS,
+            db_path=settings.ITINERARY_CACHE_DB_PATH,
+            table="itineraries"
+        )
+
+    async def get(self, request: ItineraryRequest) -> Optional[List[Day]]:
+        """Return a fresh copy of the cached days, so callers can mutate them freely"""
+        data = await self.store.get(itinerary_cache_key(request))
+        if data is None:
+            return None
+        return [Day(**day) for day in data]
+
+    async def set(self, request: ItineraryRequest, days: List[Day]):
+        await self.store.set(
+            itinerary_cache_key(request),
+            [json.loads(day.json()) for day in days]
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self.store.get_stats()
@@ -0,0 +1,187 @@
+"""
+Columnar (struct-of-arrays) view of an itinerary.
+
+The pipeline stages need the same few numbers for every activity and dining
+option: where it is, what it costs, how long it takes and which day it is
+on. ``ItineraryColumns`` holds them as one NumPy array per field, built once
+from the ``Day`` models, so routing, clustering, budgeting and totals work on
+arrays instead of walking the models again. Rows stay grouped by day
+(activities first, then dining, each in their original order) and keep a
+reference to their model, so ``to_days`` gives back the exact input when
+nothing changed.
+"""
+
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+from models.itinerary import Day
+
+ACTIVITY, DINING = 0, 1
+SLOTS = ("morning", "afternoon", "evening", "meal")
+
+# Durations assumed when the model gives none
+DEFAULT_ACTIVITY_MINUTES = 60
+DEFAULT_DINING_MINUTES = 90
+
+class ItineraryColumns:
+    """One row per activity or dining option, one array per field
+
+    ``day`` is the position of the row's day in ``days``; ``lat``/``lng``,
+    ``cost`` and ``rating`` are NaN where the model has no value. Cost and
+    coordinates are the columns stages may change; ``to_days`` writes them
+    back.
+    """
+
+    def __init__(self, days: List[Day], items: List[Any], day: np.ndarray, kind: np.ndarray,
+                 lat: np.ndarray, lng: np.ndarray, cost: np.ndarray, duration: np.ndarray,
+                 slot: np.ndarray, rating: np.ndarray):
+        self.days = days
+        self.items = items
+        self.day = day
+        self.kind = kind
+        self.lat = lat
+        self.lng = lng
+        self.cost = cost
+        self.duration = duration
+        self.slot = slot
+        self.rating = rating
+
+    @classmethod
+    def from_days(cls, days: List[Day]) -> "ItineraryColumns":
+        items, day, kind = [], [], []
+        for d, entry in enumerate(days):
+            items.extend(entry.activities)
+            items.extend(entry.dining)
+            day.extend([d] * (len(entry.activities) + len(entry.dining)))
+            kind.extend([ACTIVITY] * len(entry.activities) + [DINING] * len(entry.dining))
+
+        nan = np.nan
+        coordinates = [item.coordinates for item in items]
+        lat = np.array([c['lat'] if c else nan for c in coordinates], dtype=float)
+        lng = np.array([c['lng'] if c else nan for c in coordinates], dtype=float)
+        cost = np.array([
+            (item.cost if k == ACTIVITY else item.price_per_person)
+            for item, k in zip(items, kind)
+        ], dtype=float)
+        duration = np.array([
+            (item.duration_minutes or DEFAULT_ACTIVITY_MINUTES) if k == ACTIVITY else DEFAULT_DINING_MINUTES
+            for item, k in zip(items, kind)
+        ], dtype=np.int32)
+        slot_index = {value: i for i, value in enumerate(SLOTS)}
+        slot = np.array([
+            slot_index[item.time.value] if k == ACTIVITY else len(SLOTS) - 1
+            for item, k in zip(items, kind)
+        ], dtype=np.int8)
+        rating = np.array([
+            item.rating if k == DINING else None
+            for item, k in zip(items, kind)
+        ], dtype=float)
+
+        return cls(
+            days, items, np.array(day, dtype=np.int32), np.array(kind, dtype=np.int8),
+            lat, lng, cost, duration, slot, rating
+        )
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def located(self) -> np.ndarray:
+        """Mask of rows with coordinates"""
+        return ~np.isnan(self.lat)
+
+    def day_rows(self, d: int) -> np.ndarray:
+        """Row indices of the day at position ``d``"""
+        return np.arange(*np.searchsorted(self.day, [d, d + 1]))
+
+    def located_rows(self, d: int) -> np.ndarray:
+        """Row indices of the day at position ``d`` that have coordinates"""
+        rows = self.day_rows(d)
+        return rows[~np.isnan(self.lat[rows])]
+
+    def slot_names(self, rows: np.ndarray) -> List[str]:
+        """TimeOfDay value of each of ``rows``, or 'meal' for dining, as the scheduler takes them"""
+        return [SLOTS[s] for s in self.slot[rows].tolist()]
+
+    def locations(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        """Route stops for ``rows``, in that order, as a route response lists them"""
+        stops = []
+        fields = (self.kind[rows] == ACTIVITY, self.lat[rows], self.lng[rows], self.duration[rows])
+        for i, activity, lat, lng, duration in zip(rows.tolist(), *(f.tolist() for f in fields)):
+            item = self.items[i]
+            # The model's own coordinates, unless a stage moved the row
+            coordinates = item.coordinates
+            if not coordinates or coordinates['lat'] != lat or coordinates['lng'] != lng:
+                coordinates = {'lat': lat, 'lng': lng}
+            stops.append({
+                'name': item.place if activity else item.name,
+                'type': 'activity' if activity else 'dining',
+                'coordinates': coordinates,
+                'duration': duration,
+                'time_slot': item.time if activity else 'meal'
+            })
+        return stops
+
+    def total_cost(self, kind: Optional[int] = None) -> float:
+        """Summed cost of all rows, or of one kind"""
+        cost = self.cost if kind is None else self.cost[self.kind == kind]
+        return float(np.nansum(cost))
+
+    def _take(self, rows: np.ndarray, day: Optional[np.ndarray] = None) -> "ItineraryColumns":
+        return ItineraryColumns(
+            self.days, [self.items[i] for i in rows.tolist()],
+            self.day[rows] if day is None else day[rows], self.kind[rows],
+            self.lat[rows], self.lng[rows], self.cost[rows], self.duration[rows],
+            self.slot[rows], self.rating[rows]
+        )
+
+    def regroup(self, day: np.ndarray) -> "ItineraryColumns":
+        """Move rows to the days in ``day``, keeping rows grouped by day and kind"""
+        rows = np.lexsort((np.arange(len(self)), self.kind, day))
+        return self._take(rows, day)
+
+    def select(self, mask: np.ndarray) -> "ItineraryColumns":
+        """Keep only the rows in ``mask``"""
+        return self._take(np.flatnonzero(mask))
+
+    def _item(self, i: int):
+        """The model for row ``i`` with the row's cost and coordinates written back"""
+        item = self.items[i]
+        update = {}
+        field = 'cost' if self.kind[i] == ACTIVITY else 'price_per_person'
+        value = None if np.isnan(self.cost[i]) else float(self.cost[i])
+        if getattr(item, field) != value:
+            update[field] = value
+        if np.isnan(self.lat[i]):
+            if item.coordinates:
+                update['coordinates'] = None
+        else:
+            lat, lng = float(self.lat[i]), float(self.lng[i])
+            if not item.coordinates or (item.coordinates['lat'], item.coordinates['lng']) != (lat, lng):
+                update['coordinates'] = {'lat': lat, 'lng': lng}
+        return item.copy(update=update) if update else item
+
+    def to_days(self) -> List[Day]:
+        """Rebuild ``Day`` models; unchanged days are returned as the original objects"""
+        bounds = np.searchsorted(self.day, np.arange(len(self.days) + 1))
+        result = []
+        for d, day in enumerate(self.days):
+            rows = range(bounds[d], bounds[d + 1])
+            items = [self._item(i) for i in rows]
+            activities = [item for i, item in zip(rows, items) if self.kind[i] == ACTIVITY]
+            dining = [item for i, item in zip(rows, items) if self.kind[i] == DINING]
+
+            unchanged = (
+                len(activities) == len(day.activities) and len(dining) == len(day.dining) and
+                all(a is b for a, b in zip(activities, day.activities)) and
+                all(a is b for a, b in zip(dining, day.dining))
+            )
+            if unchanged:
+                result.append(day)
+                continue
+
+            update = {'activities': activities, 'dining': dining}
+            if day.total_cost is not None:
+                update['total_cost'] = float(np.nansum(self.cost[bounds[d]:bounds[d + 1]]))
+            result.append(day.copy(update=update))
+        return result
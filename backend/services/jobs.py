@@ -0,0 +1,221 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import logging
+from core.config import settings
+from models.itinerary import ItineraryRequest, JobStatus
+from services.planner import ItineraryPlanner
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, COMPLETED, FAILED = "queued", "running", "completed", "failed"
+
+class JobStore:
+    """SQLite table of itinerary jobs: the request, its state and the result"""
+
+    def __init__(self, path: str, table: str = "jobs"):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, request TEXT NOT NULL, "
+            "result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+            "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_status ON {table} (status, created_at)")
+        self._conn.commit()
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            self._conn.commit()
+        return cursor
+
+    def add(self, job_id: str, request: str):
+        self._execute(
+            f"INSERT INTO {self.table} (id, status, request, created_at) VALUES (?, ?, ?, ?)",
+            (job_id, QUEUED, request, time.time())
+        )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT * FROM {self.table} WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def start(self, job_id: str) -> bool:
+        """Move a queued job to running; False if it is no longer queued"""
+        cursor = self._execute(
+            f"UPDATE {self.table} SET status = ?, attempts = attempts + 1, started_at = ? "
+            "WHERE id = ? AND status = ?",
+            (RUNNING, time.time(), job_id, QUEUED)
+        )
+        return cursor.rowcount == 1
+
+    def requeue(self, job_id: str):
+        """Put a running job back in the queue without counting the start as an attempt"""
+        self._execute(
+            f"UPDATE {self.table} SET status = ?, attempts = attempts - 1, started_at = NULL "
+            "WHERE id = ? AND status = ?",
+            (QUEUED, job_id, RUNNING)
+        )
+
+    def finish(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None):
+        self._execute(
+            f"UPDATE {self.table} SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, result, error, time.time(), job_id)
+        )
+
+    def recover(self, max_attempts: int) -> List[str]:
+        """Requeue jobs a previous process left running and return the queued ids, oldest first
+
+        Jobs that were already started ``max_attempts`` times are failed
+        instead, so a request that brings the server down is not retried
+        forever.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE {self.table} SET status = ?, error = ?, finished_at = ? "
+                "WHERE status = ? AND attempts >= ?",
+                (FAILED, "Interrupted by server restarts", now, RUNNING, max_attempts)
+            )
+            self._conn.execute(
+                f"UPDATE {self.table} SET status = ? WHERE status = ?", (QUEUED, RUNNING)
+            )
+            self._conn.commit()
+            rows = self._conn.execute(
+                f"SELECT id FROM {self.table} WHERE status = ? ORDER BY created_at", (QUEUED,)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def purge_finished(self, older_than_seconds: float) -> int:
+        """Delete finished jobs older than the cutoff and return how many were removed"""
+        cursor = self._execute(
+            f"DELETE FROM {self.table} WHERE status IN (?, ?) AND finished_at < ?",
+            (COMPLETED, FAILED, time.time() - older_than_seconds)
+        )
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT status, COUNT(*) FROM {self.table} GROUP BY status"
+            ).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def _timestamp(value: Optional[float]) -> Optional[datetime]:
+    return datetime.utcfromtimestamp(value) if value is not None else None
+
+def job_status(row: Dict[str, Any]) -> JobStatus:
+    """API view of a stored job"""
+    return JobStatus(
+        job_id=row["id"],
+        status=row["status"],
+        attempts=row["attempts"],
+        created_at=_timestamp(row["created_at"]),
+        started_at=_timestamp(row["started_at"]),
+        finished_at=_timestamp(row["finished_at"]),
+        result=json.loads(row["result"]) if row["result"] else None,
+        error=row["error"]
+    )
+
+class JobQueue:
+    """Background itinerary generation with results kept in a JobStore
+
+    ``submit`` stores the request and returns at once; JOBS_MAX_CONCURRENCY
+    asyncio workers take jobs in submission order and run the planner. Jobs
+    a previous process queued or left running are picked up again by
+    ``start``; only a process that died mid-job counts towards
+    JOBS_MAX_ATTEMPTS, since ``stop`` requeues the jobs it interrupts.
+    """
+
+    def __init__(self, planner: ItineraryPlanner, store: Optional[JobStore] = None, max_concurrency: Optional[int] = None):
+        self.planner = planner
+        self.store = store or JobStore(settings.JOBS_DB_PATH)
+        self.max_concurrency = max_concurrency or settings.JOBS_MAX_CONCURRENCY
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self):
+        """Recover stored jobs and start the workers"""
+        if self.running:
+            return
+        purged = await asyncio.to_thread(self.store.purge_finished, settings.JOBS_RESULT_TTL_SECONDS)
+        pending = await asyncio.to_thread(self.store.recover, settings.JOBS_MAX_ATTEMPTS)
+        if pending or purged:
+            logger.info(f"Job queue: resuming {len(pending)} jobs, purged {purged} old results")
+
+        self._queue = asyncio.Queue()
+        for job_id in pending:
+            self._queue.put_nowait(job_id)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.max_concurrency)]
+
+    async def stop(self):
+        """Cancel the workers; jobs they were running are requeued for the next ``start``"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, request: ItineraryRequest) -> JobStatus:
+        """Queue ``request`` and return the new job"""
+        await self.start()
+        job_id = str(uuid.uuid4())
+        await asyncio.to_thread(self.store.add, job_id, request.json())
+        self._queue.put_nowait(job_id)
+        return await self.get(job_id)
+
+    async def get(self, job_id: str) -> Optional[JobStatus]:
+        row = await asyncio.to_thread(self.store.get, job_id)
+        return job_status(row) if row is not None else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "waiting": self._queue.qsize() if self._queue is not None else 0,
+            "jobs": self.store.counts(),
+        }
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        if not await asyncio.to_thread(self.store.start, job_id):
+            return
+        row = await asyncio.to_thread(self.store.get, job_id)
+        try:
+            request = ItineraryRequest(**json.loads(row["request"]))
+            response = await self.planner.build(request)
+        except asyncio.CancelledError:
+            # Stopped by a shutdown, not a failure of this job: the next start runs it again
+            await asyncio.to_thread(self.store.requeue, job_id)
+            raise
+        except Exception as e:
+            logger.warning(f"Job {job_id} failed: {e}")
+            await asyncio.to_thread(self.store.finish, job_id, FAILED, error=str(e))
+            return
+        await asyncio.to_thread(self.store.finish, job_id, COMPLETED, result=response.json())
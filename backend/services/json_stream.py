@@ -0,0 +1,152 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Trailing commas and comments are the most common ways model JSON goes wrong
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_LINE_COMMENT = re.compile(r"^\s*//.*$", re.MULTILINE)
+_BLOCK_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_DAY_KEY = re.compile(r'"day"\s*:')
+
+def loads_lenient(text: str) -> Optional[Any]:
+    """Parse JSON, retrying once with comments and trailing commas removed"""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    repaired = _BLOCK_COMMENT.sub("", text)
+    repaired = _LINE_COMMENT.sub("", repaired)
+    repaired = _TRAILING_COMMA.sub(r"\1", repaired)
+    try:
+        return json.loads(repaired)
+    except json.JSONDecodeError:
+        return None
+
+def _unwrap_days(obj: Any) -> List[Dict[str, Any]]:
+    """Return day objects from a parsed value, unwrapping {"days": [...]}-style wrappers"""
+    if not isinstance(obj, dict):
+        return []
+    if "day" in obj:
+        return [obj]
+    for value in obj.values():
+        if isinstance(value, list) and value and all(isinstance(v, dict) and "day" in v for v in value):
+            return value
+    return []
+
+class DayStreamParser:
+    """Incrementally extract complete objects from a streamed top-level JSON array
+
+    Text is fed in arbitrary chunks (as they arrive from the model). Each call
+    to ``feed`` returns the objects that became complete since the last call,
+    so a day can be processed before the rest of the array has been generated.
+
+    The parser tolerates the usual LLM noise: prose or code fences around the
+    array, brackets inside that prose, comments and trailing commas inside
+    objects, a wrapping object such as ``{"days": [...]}`` and a truncated
+    tail. Every complete object before the truncation point is recovered.
+    After the stream ends, ``complete`` says whether the closing bracket was
+    seen and ``skipped`` counts objects that could not be parsed.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.complete = False
+        self.skipped = 0
+        self._pos = 0
+        self._in_array = False
+        self._bare_object = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._start = -1
+
+    def _next_significant(self, pos: int) -> Optional[str]:
+        """Next non-whitespace character after ``pos``, or None if not received yet"""
+        for char in self.buffer[pos + 1:]:
+            if not char.isspace():
+                return char
+        return None
+
+    def _emit(self, text: str, objects: List[Dict[str, Any]]) -> bool:
+        """Parse one complete object; returns True if it wrapped the whole itinerary"""
+        value = loads_lenient(text)
+        parsed = _unwrap_days(value)
+        if parsed:
+            objects.extend(parsed)
+        else:
+            self.skipped += 1
+        return isinstance(value, dict) and "day" not in value and bool(parsed)
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self.buffer += chunk
+        objects = []
+
+        while self._pos < len(self.buffer) and not self.complete:
+            char = self.buffer[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif not self._in_array and not self._bare_object:
+                # Skip prose until a bracket that really starts an array of
+                # objects, or a brace that starts a JSON object
+                if char in "[{":
+                    following = self._next_significant(self._pos)
+                    if following is None:
+                        break  # Wait for more text to decide
+                    if char == "[" and following in "{]":
+                        self._in_array = True
+                    elif char == "{" and following == '"':
+                        self._bare_object = True
+                        self._start = self._pos
+                        self._depth = 1
+            elif char == '"':
+                self._in_string = True
+            elif (
+                char == "[" and self._bare_object and self._depth == 1 and
+                not _DAY_KEY.search(self.buffer, self._start, self._pos)
+            ):
+                # {"days": [ ... ]}: stream the inner array like a top-level one
+                following = self._next_significant(self._pos)
+                if following is None:
+                    break
+                if following in "{]":
+                    self._bare_object = False
+                    self._in_array = True
+                    self._depth = 0
+            elif char == "{":
+                if self._depth == 0:
+                    self._start = self._pos
+                self._depth += 1
+            elif char == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    wrapper = self._emit(self.buffer[self._start:self._pos + 1], objects)
+                    if self._bare_object:
+                        # A wrapper object holds the whole itinerary; a bare
+                        # day object may be followed by more of them
+                        self.complete = wrapper
+                        self._bare_object = False
+                    # Drop consumed text so the buffer stays small on long streams
+                    self.buffer = self.buffer[self._pos + 1:]
+                    self._pos = -1
+            elif char == "]" and self._depth == 0 and self._in_array:
+                self.complete = True
+            self._pos += 1
+
+        return objects
+
+def extract_days(text: str) -> Tuple[List[Dict[str, Any]], bool]:
+    """Extract every complete day object from a full model response
+
+    Returns the objects and whether the array was closed (False when the
+    response was truncated).
+    """
+    parser = DayStreamParser()
+    objects = parser.feed(text)
+    return objects, parser.complete
@@ -0,0 +1,60 @@
+import hashlib
+import json
+from typing import Any, Dict, Optional, Tuple
+from core.config import settings
+from services.cache import TieredCache
+
+def snap_to_grid(lat: float, lng: float, grid: Optional[float] = None) -> Tuple[float, float]:
+    """Snap a coordinate to the reverse-geocode grid so nearby points share a cache entry"""
+    grid = grid or settings.MAPS_REVERSE_GEOCODE_GRID_DEGREES
+    return round(round(lat / grid) * grid, 6), round(round(lng / grid) * grid, 6)
+
+class MapsCache:
+    """Response cache for the Maps gateway with per-API TTLs and counters"""
+
+    def __init__(self):
+        self.ttls: Dict[str, int] = settings.MAPS_CACHE_TTLS
+        self.store = TieredCache(
+            max_entries=settings.MAPS_CACHE_MAX_ENTRIES,
+            ttl_seconds=max(self.ttls.values(), default=0),
+            db_path=settings.MAPS_CACHE_DB_PATH,
+            table="maps_responses",
+            max_bytes=settings.MAPS_CACHE_MAX_BYTES
+        )
+        self.api_stats: Dict[str, Dict[str, int]] = {}
+
+    def is_cacheable(self, api: str) -> bool:
+        return self.ttls.get(api, 0) > 0
+
+    @staticmethod
+    def make_key(api: str, params: Dict[str, Any]) -> str:
+        payload = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+        return f"{api}:{hashlib.sha1(payload.encode()).hexdigest()}"
+
+    def _count(self, api: str, field: str):
+        counters = self.api_stats.setdefault(api, {"hits": 0, "misses": 0})
+        counters[field] += 1
+
+    async def get(self, api: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        body = await self.store.get(self.make_key(api, params))
+        self._count(api, "hits" if body is not None else "misses")
+        return body
+
+    async def set(self, api: str, params: Dict[str, Any], body: Dict[str, Any], size: Optional[int] = None):
+        await self.store.set(self.make_key(api, params), body, ttl_seconds=self.ttls[api], size=size)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Overall and per-API hit rates; every hit is an upstream call saved"""
+        stats = self.store.get_stats()
+        return {
+            **stats,
+            "upstream_calls_saved": stats["memory_hits"] + stats["disk_hits"],
+            "by_api": {
+                api: {
+                    **counters,
+                    "hit_rate": counters["hits"] / (counters["hits"] + counters["misses"])
+                    if counters["hits"] + counters["misses"] else 0.0
+                }
+                for api, counters in self.api_stats.items()
+            },
+        }
@@ -0,0 +1,218 @@
+import asyncio
+import copy
+import httpx
+from typing import Dict, Any, List, Optional, Tuple, Union
+import logging
+from core.config import settings
+from core.metrics import upstream_call
+from services.cassette import get_cassette
+from services.maps_cache import MapsCache, snap_to_grid
+from services.rate_limit import AsyncRateLimiter
+from services.single_flight import SingleFlight
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+# httpx logs full request URLs at INFO, which would leak the API key
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+LatLng = Union[Dict[str, float], Tuple[float, float], str]
+
+class MapsAPIError(Exception):
+    """Raised when the Google Maps web service returns an error status"""
+
+    def __init__(self, status: str, message: Optional[str] = None):
+        self.status = status
+        super().__init__(f"{status}: {message}" if message else status)
+
+class MapsGateway:
+    """Async Google Maps web-service client shared by the routers and the ML pipeline"""
+
+    ENDPOINTS = {
+        'geocode': '/maps/api/geocode/json',
+        'places': '/maps/api/place/textsearch/json',
+        'place': '/maps/api/place/details/json',
+        'places_nearby': '/maps/api/place/nearbysearch/json',
+        'directions': '/maps/api/directions/json',
+        'distance_matrix': '/maps/api/distancematrix/json',
+    }
+
+    # Statuses that carry a valid (possibly empty) payload
+    OK_STATUSES = {'OK', 'ZERO_RESULTS'}
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """Initialize the pooled HTTP client and per-endpoint concurrency limits"""
+        cassette = get_cassette()
+        replaying = cassette is not None and cassette.replaying
+        self.api_key = api_key or settings.GOOGLE_MAPS_API_KEY
+        if not self.api_key and not replaying:
+            raise ValueError("GOOGLE_MAPS_API_KEY is required")
+
+        limits = httpx.Limits(
+            max_connections=settings.MAPS_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.MAPS_MAX_CONNECTIONS
+        )
+        if replaying:
+            transport = cassette.transport()
+        elif cassette is not None:
+            transport = cassette.transport(transport or httpx.AsyncHTTPTransport(limits=limits))
+        self.client = httpx.AsyncClient(
+            base_url=base_url or settings.MAPS_BASE_URL,
+            timeout=httpx.Timeout(settings.MAPS_TIMEOUT_SECONDS),
+            limits=limits,
+            transport=transport
+        )
+        self._semaphores = {
+            api: asyncio.Semaphore(
+                settings.MAPS_CONCURRENCY_LIMITS.get(api, settings.MAPS_DEFAULT_CONCURRENCY)
+            )
+            for api in self.ENDPOINTS
+        }
+        self._rate = AsyncRateLimiter(settings.MAPS_REQUESTS_PER_SECOND, settings.MAPS_RATE_BURST)
+        # Per-API quotas; like the process-wide rate they only apply to calls that reach the API
+        api_rates = {'geocode': (settings.GEOCODE_RATE_PER_SECOND, settings.GEOCODE_RATE_BURST)}
+        self._api_rates = {api: AsyncRateLimiter(*api_rates.get(api, (0, 1))) for api in self.ENDPOINTS}
+        self.cache = MapsCache() if settings.MAPS_CACHE_ENABLED else None
+        self.inflight = SingleFlight() if settings.MAPS_COALESCE_REQUESTS else None
+
+    async def _request(self, api: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a single request to a Maps endpoint, served from cache or a matching in-flight call when possible"""
+        params = {k: v for k, v in params.items() if v is not None}
+        params.setdefault('language', settings.MAPS_LANGUAGE)
+
+        use_cache = self.cache is not None and self.cache.is_cacheable(api)
+        if use_cache:
+            cached = await self.cache.get(api, params)
+            if cached is not None:
+                return copy.deepcopy(cached)
+
+        if self.inflight is None:
+            body, shared = await self._fetch(api, params, use_cache), False
+        else:
+            body, shared = await self.inflight.do(
+                MapsCache.make_key(api, params), lambda: self._fetch(api, params, use_cache)
+            )
+        # The cache and the other callers of a shared call hold the same body, so callers get their own copy
+        return copy.deepcopy(body) if shared or use_cache else body
+
+    async def _fetch(self, api: str, params: Dict[str, Any], use_cache: bool) -> Dict[str, Any]:
+        """Call the endpoint and cache the response"""
+        async with self._semaphores[api], self._rate, self._api_rates[api]:
+            with upstream_call('maps', api):
+                response = await self.client.get(
+                    self.ENDPOINTS[api], params={**params, 'key': self.api_key}
+                )
+
+                response.raise_for_status()
+                body = response.json()
+
+                status = body.get('status', 'OK')
+                if status not in self.OK_STATUSES:
+                    raise MapsAPIError(status, body.get('error_message'))
+
+        if use_cache:
+            await self.cache.set(api, params, body, size=len(response.content))
+
+        return body
+
+    @staticmethod
+    def _format_latlng(location: LatLng) -> str:
+        """Format a coordinate as the 'lat,lng' string the web service expects"""
+        if isinstance(location, str):
+            return location
+        if isinstance(location, dict):
+            return f"{location['lat']},{location['lng']}"
+        return f"{location[0]},{location[1]}"
+
+    async def geocode(self, address: str, bounds: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Convert an address to a list of geocoding results, optionally biased to a viewport"""
+        body = await self._request('geocode', {
+            'address': address,
+            'region': settings.MAPS_REGION.lower(),
+            'bounds': bounds
+        })
+        return body.get('results', [])
+
+    async def reverse_geocode(self, latlng: LatLng) -> List[Dict[str, Any]]:
+        """Convert coordinates to a list of address results, snapped to the cache grid"""
+        lat, lng = (float(v) for v in self._format_latlng(latlng).split(','))
+        body = await self._request('geocode', {'latlng': self._format_latlng(snap_to_grid(lat, lng))})
+        return body.get('results', [])
+
+    async def places(
+        self,
+        query: str,
+        location: Optional[LatLng] = None,
+        radius: Optional[int] = None,
+        type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Text search for places"""
+        return await self._request('places', {
+            'query': query,
+            'location': self._format_latlng(location) if location else None,
+            'radius': radius,
+            'type': type
+        })
+
+    async def place(self, place_id: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Get details for a single place"""
+        return await self._request('place', {
+            'place_id': place_id,
+            'fields': ','.join(fields) if fields else None
+        })
+
+    async def places_nearby(
+        self,
+        location: LatLng,
+        radius: int,
+        type: Optional[str] = None,
+        price_level: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Search for places around a coordinate"""
+        return await self._request('places_nearby', {
+            'location': self._format_latlng(location),
+            'radius': radius,
+            'type': type,
+            'minprice': price_level,
+            'maxprice': price_level
+        })
+
+    async def directions(self, origin: str, destination: str, mode: str = "driving") -> List[Dict[str, Any]]:
+        """Get routes between two locations"""
+        body = await self._request('directions', {
+            'origin': origin,
+            'destination': destination,
+            'mode': mode
+        })
+        return body.get('routes', [])
+
+    async def distance_matrix(
+        self,
+        origins: List[LatLng],
+        destinations: List[LatLng],
+        mode: str = "driving"
+    ) -> Dict[str, Any]:
+        """Get travel distances and durations for every origin/destination pair"""
+        return await self._request('distance_matrix', {
+            'origins': '|'.join(self._format_latlng(o) for o in origins),
+            'destinations': '|'.join(self._format_latlng(d) for d in destinations),
+            'mode': mode
+        })
+
+    async def aclose(self):
+        """Close pooled connections"""
+        await self.client.aclose()
+
+_gateway: Optional[MapsGateway] = None
+
+def get_maps_gateway() -> MapsGateway:
+    """Return the process-wide Maps gateway, creating it on first use"""
+    global _gateway
+    if _gateway is None:
+        _gateway = MapsGateway()
+    return _gateway
@@ -1,12 +1,22 @@
+import asyncio
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional
+from scipy.optimize import linear_sum_assignment
 import logging
 from models.itinerary import Day, Activity, Dining, RouteOptimization
-import googlemaps
 from core.config import settings
+from core.profiling import is_profiling, to_thread
+from services.maps_client import MapsGateway, get_maps_gateway
+from services.budget import fit_columns_to_budget
+from services.itinerary_columns import ACTIVITY, DINING, ItineraryColumns
+from services.clustering import ClusteringEngine, balanced_assign, project_local
+from services.routing import haversine_km, haversine_matrix, route_legs, solve_route
+from services.scheduler import schedule_day
+from services.travel_time import TravelTimeProvider
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,194 +25,231 @@ logger = logging.getLogger(__name__)
 class MLPipeline:
     """ML pipeline for route optimization and attraction clustering"""
     
-    def __init__(self):
-        """Initialize the ML pipeline with Google Maps client"""
-        if not settings.GOOGLE_MAPS_API_KEY:
-            raise ValueError("GOOGLE_MAPS_API_KEY is required")
+    def __init__(self, maps_gateway: Optional[MapsGateway] = None):
+        """Initialize the ML pipeline with the shared Google Maps gateway"""
+        self.gmaps = maps_gateway or get_maps_gateway()
+        self.clustering = ClusteringEngine()
+        self.travel_times = TravelTimeProvider(
+            self.gmaps if settings.TRAVEL_TIME_SOURCE == "distance_matrix" else None
+        )
         
-        self.gmaps = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
-        self.scaler = StandardScaler()
+        # Worker processes for CPU-bound route solving; 0 solves inline
+        self._executor = None
+        if settings.ROUTE_OPTIMIZER_WORKERS > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=settings.ROUTE_OPTIMIZER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+    
+    def close(self):
+        """Shut down route solver worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
         
-    async def optimize_daily_routes(self, days: List[Day]) -> List[RouteOptimization]:
-        """Optimize routes for each day to minimize travel time"""
-        optimized_days = []
+    async def optimize_daily_routes(
+        self,
+        days: List[Day],
+        columns: Optional[ItineraryColumns] = None
+    ) -> List[RouteOptimization]:
+        """Optimize routes for each day to minimize travel time
         
-        for day in days:
-            try:
-                # Get all locations for the day
-                locations = self._extract_locations(day)
-                
-                if len(locations) < 2:
-                    # No optimization needed for single location
-                    optimized_days.append(RouteOptimization(
-                        day=day.day,
-                        activities=day.activities,
-                        dining=day.dining,
-                        optimized_route=[],
-                        total_travel_time=0,
-                        total_distance=0
-                    ))
-                    continue
-                
-                # Optimize route using TSP-like approach
-                optimized_route = await self._optimize_route(locations)
-                
-                # Calculate total travel time and distance
-                total_time, total_distance = self._calculate_route_metrics(optimized_route)
-                
-                # Create optimized day
-                optimized_day = RouteOptimization(
-                    day=day.day,
-                    activities=day.activities,
-                    dining=day.dining,
-                    optimized_route=optimized_route,
-                    total_travel_time=total_time,
-                    total_distance=total_distance
-                )
-                
-                optimized_days.append(optimized_day)
-                logger.info(f"Optimized route for day {day.day}")
-                
-            except Exception as e:
-                logger.error(f"Error optimizing day {day.day}: {str(e)}")
-                # Return unoptimized day if optimization fails
-                optimized_days.append(RouteOptimization(
+        Days are independent, so they are optimized concurrently; results keep
+        the order of ``days`` and match a day-by-day run exactly. Stops are
+        read from the itinerary's ``columns`` (rows for ``days`` in the same
+        order), built from ``days`` when not given.
+        """
+        if columns is None:
+            columns = ItineraryColumns.from_days(days)
+        return list(await asyncio.gather(*(
+            self._optimize_day(day, columns, d) for d, day in enumerate(days)
+        )))
+    
+    async def _optimize_day(self, day: Day, columns: ItineraryColumns, d: int) -> RouteOptimization:
+        """Optimize the route of a single day, at position ``d`` in ``columns``"""
+        try:
+            # Get all located stops for the day
+            rows = columns.located_rows(d)
+            
+            if len(rows) < 2:
+                # No optimization needed for single location
+                return RouteOptimization(
                     day=day.day,
                     activities=day.activities,
                     dining=day.dining,
                     optimized_route=[],
                     total_travel_time=0,
                     total_distance=0
-                ))
-        
-        return optimized_days
-    
-    def _extract_locations(self, day: Day) -> List[Dict[str, Any]]:
-        """Extract all locations from a day's activities and dining"""
-        locations = []
-        
-        # Add activities
-        for activity in day.activities:
-            if activity.coordinates:
-                locations.append({
-                    'name': activity.place,
-                    'type': 'activity',
-                    'coordinates': activity.coordinates,
-                    'duration': activity.duration_minutes or 60,
-                    'time_slot': activity.time
-                })
-        
-        # Add dining
-        for dining in day.dining:
-            if dining.coordinates:
-                locations.append({
-                    'name': dining.name,
-                    'type': 'dining',
-                    'coordinates': dining.coordinates,
-                    'duration': 90,  # Default dining duration
-                    'time_slot': 'meal'
-                })
-        
-        return locations
+                )
+            
+            # Pairwise distances, computed once and reused by every step below
+            lat, lng = columns.lat[rows], columns.lng[rows]
+            matrix = haversine_matrix(lat, lng)
+            travel_minutes = await self.travel_times.matrix(lat, lng, matrix)
+            
+            schedule = None
+            if settings.SCHEDULE_TIME_WINDOWS:
+                # Order by time windows and timestamp each stop
+                schedule = await self._run_solver(
+                    schedule_day, columns.slot_names(rows), columns.duration[rows], travel_minutes,
+                    settings.SCHEDULE_WINDOWS, settings.SCHEDULE_MAX_EVALUATIONS, settings.ROUTE_SOLVER_MAX_PASSES
+                )
+                order = schedule['order']
+            else:
+                # Optimize route using TSP-like approach
+                order = await self._run_solver(solve_route, matrix, settings.ROUTE_SOLVER_MAX_PASSES)
+            
+            # Stop dicts are only built for the response, in visit order
+            optimized_route = columns.locations(rows[order])
+            feasible, violations = None, None
+            if schedule is not None:
+                for stop, times in zip(optimized_route, schedule['times']):
+                    stop.update(times)
+                violations = [
+                    f"{stop['name']} starts {stop['late_minutes']} min after its {stop['window']} window"
+                    for stop in (optimized_route[k] for k in schedule['late'])
+                ]
+                feasible = not violations
+            
+            # Calculate total travel time and distance
+            total_time, total_distance = self._calculate_route_metrics(order, matrix, travel_minutes)
+            
+            logger.info(f"Optimized route for day {day.day}")
+            
+            # Create optimized day
+            return RouteOptimization(
+                day=day.day,
+                activities=day.activities,
+                dining=day.dining,
+                optimized_route=optimized_route,
+                total_travel_time=total_time,
+                total_distance=total_distance,
+                feasible=feasible,
+                schedule_violations=violations
+            )
+            
+        except Exception as e:
+            logger.error(f"Error optimizing day {day.day}: {str(e)}")
+            # Return unoptimized day if optimization fails
+            return RouteOptimization(
+                day=day.day,
+                activities=day.activities,
+                dining=day.dining,
+                optimized_route=[],
+                total_travel_time=0,
+                total_distance=0
+            )
     
-    async def _optimize_route(self, locations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Optimize route using nearest neighbor algorithm with time constraints"""
-        if len(locations) <= 1:
-            return locations
-        
-        # Start with the first location
-        unvisited = locations[1:]
-        current = locations[0]
-        route = [current]
+    async def plan_days(self, days: List[Day], city: Optional[str] = None) -> List[Day]:
+        """Regroup activities and dining into geographically compact days
         
-        while unvisited:
-            # Find nearest unvisited location
-            nearest = self._find_nearest(current, unvisited)
-            route.append(nearest)
-            unvisited.remove(nearest)
-            current = nearest
-        
-        return route
+        Returns new Day objects; the input is not modified. See
+        ``plan_columns``.
+        """
+        columns = await self.plan_columns(ItineraryColumns.from_days(days), city)
+        return columns.to_days()
     
-    def _find_nearest(self, current: Dict[str, Any], candidates: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Find the nearest location from current position"""
-        if not candidates:
-            return None
+    async def plan_columns(self, columns: ItineraryColumns, city: Optional[str] = None) -> ItineraryColumns:
+        """Regroup an itinerary's rows into geographically compact days
         
-        min_distance = float('inf')
-        nearest = candidates[0]
+        All located activities are pooled and clustered into one group per
+        day, with no group above MAX_DAILY_ACTIVITIES (or an even share, if
+        that is larger). Groups are matched to the existing days so each day
+        keeps as many of its own activities (and its summary) as possible.
+        Dining options then go to the nearest day with room, up to
+        MAX_DAILY_DINING. Rows without coordinates stay where they were.
+        """
+        n_days = len(columns.days)
+        located = columns.located
+        activities = np.flatnonzero(located & (columns.kind == ACTIVITY))
+        if n_days < 2 or len(activities) <= n_days:
+            return columns
         
-        for candidate in candidates:
-            distance = self._calculate_distance(
-                current['coordinates'],
-                candidate['coordinates']
+        try:
+            capacity = max(settings.MAX_DAILY_ACTIVITIES, math.ceil(len(activities) / n_days))
+            labels, centroids = await to_thread(
+                self.clustering.fit,
+                columns.lat[activities], columns.lng[activities],
+                n_days, city, capacity
             )
             
-            if distance < min_distance:
-                min_distance = distance
-                nearest = candidate
+            # Match clusters to days by how many activities they already share
+            overlap = np.zeros((n_days, n_days))
+            np.add.at(overlap, (labels, columns.day[activities]), 1)
+            clusters, targets = linear_sum_assignment(overlap, maximize=True)
+            day_of_cluster = np.empty(n_days, dtype=int)
+            day_of_cluster[clusters] = targets
+            
+            day = columns.day.copy()
+            day[activities] = day_of_cluster[labels]
+            
+            # Dining to the nearest day with room
+            meals = np.flatnonzero(located & (columns.kind == DINING))
+            if len(meals):
+                centers = np.empty_like(centroids)
+                centers[day_of_cluster] = centroids
+                origin = (float(centers[:, 0].mean()), float(centers[:, 1].mean()))
+                points, _ = project_local(columns.lat[meals], columns.lng[meals], origin)
+                center_points, _ = project_local(centers[:, 0], centers[:, 1], origin)
+                room = max(settings.MAX_DAILY_DINING, math.ceil(len(meals) / n_days))
+                day[meals] = balanced_assign(points, center_points, room)
+            
+            logger.info(f"Planned {n_days} days from {len(activities)} located activities")
+            return columns.regroup(day)
+            
+        except Exception as e:
+            logger.error(f"Error planning days: {str(e)}")
+            return columns  # Keep the model's day assignment if planning fails
+    
+    async def _run_solver(self, solver, stops_or_matrix, *args):
+        """Run a route solver or scheduler on one day's data off the event loop
+        
+        Large days are solved in a worker process when a pool is configured;
+        everything else runs in a thread, which is cheaper than shipping small
+        days across processes. Profiled requests stay in a thread so the
+        solver shows up in the profile.
+        """
+        if (self._executor is not None and len(stops_or_matrix) >= settings.ROUTE_PARALLEL_MIN_STOPS
+                and not is_profiling()):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, solver, stops_or_matrix, *args)
         
-        return nearest
+        return await to_thread(solver, stops_or_matrix, *args)
     
     def _calculate_distance(self, coord1: Dict[str, float], coord2: Dict[str, float]) -> float:
         """Calculate distance between two coordinates using Haversine formula"""
-        lat1, lon1 = coord1['lat'], coord1['lng']
-        lat2, lon2 = coord2['lat'], coord2['lng']
-        
-        # Convert to radians
-        lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
-        
-        # Haversine formula
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
-        c = 2 * np.arcsin(np.sqrt(a))
-        
-        # Earth's radius in kilometers
-        r = 6371
-        
-        return r * c
+        return haversine_km(coord1, coord2)
     
-    def _calculate_route_metrics(self, route: List[Dict[str, Any]]) -> Tuple[int, float]:
+    def _calculate_route_metrics(self, order: List[int], matrix: np.ndarray, travel_minutes: np.ndarray) -> Tuple[int, float]:
         """Calculate total travel time and distance for a route"""
-        total_time = 0
-        total_distance = 0
+        # Whole minutes per leg
+        total_time = int(np.sum(route_legs(order, travel_minutes).astype(int)))
         
-        for i in range(len(route) - 1):
-            current = route[i]
-            next_loc = route[i + 1]
-            
-            # Calculate distance
-            distance = self._calculate_distance(
-                current['coordinates'],
-                next_loc['coordinates']
-            )
-            total_distance += distance
-            
-            # Estimate travel time (assuming 30 km/h average speed)
-            travel_time = int((distance / 30) * 60)  # Convert to minutes
-            total_time += travel_time
-        
-        return total_time, total_distance
+        return total_time, float(np.sum(route_legs(order, matrix)))
     
-    async def cluster_attractions(self, attractions: List[Dict[str, Any]], n_clusters: int = 3) -> List[List[Dict[str, Any]]]:
-        """Cluster attractions by location for better daily distribution"""
+    async def cluster_attractions(
+        self,
+        attractions: List[Dict[str, Any]],
+        n_clusters: int = 3,
+        city: Optional[str] = None,
+        capacity: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Cluster attractions by location for better daily distribution
+        
+        With ``capacity`` no cluster gets more than that many attractions.
+        Passing ``city`` warm-starts from that city's previous centroids.
+        """
         if len(attractions) <= n_clusters:
             return [attractions]
         
         try:
-            # Extract coordinates
-            coords = np.array([
-                [attraction['coordinates']['lat'], attraction['coordinates']['lng']]
-                for attraction in attractions
-            ])
-            
-            # Scale coordinates
-            coords_scaled = self.scaler.fit_transform(coords)
+            lats = [attraction['coordinates']['lat'] for attraction in attractions]
+            lngs = [attraction['coordinates']['lng'] for attraction in attractions]
             
-            # Perform clustering
-            kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-            cluster_labels = kmeans.fit_predict(coords_scaled)
+            # Perform clustering off the event loop
+            cluster_labels, _ = await to_thread(
+                self.clustering.fit, lats, lngs, n_clusters, city, capacity
+            )
             
             # Group attractions by cluster
             clusters = [[] for _ in range(n_clusters)]
@@ -216,42 +263,37 @@ class MLPipeline:
             return [attractions]  # Return single cluster if clustering fails
     
     async def optimize_budget_allocation(self, days: List[Day], total_budget: float) -> List[Day]:
-        """Optimize budget allocation across activities and dining"""
+        """Optimize budget allocation across activities and dining
+        
+        Returns new Day objects; the input is not modified. See
+        ``optimize_budget_columns``.
+        """
+        columns = await self.optimize_budget_columns(ItineraryColumns.from_days(days), total_budget)
+        return columns.to_days()
+    
+    async def optimize_budget_columns(self, columns: ItineraryColumns, total_budget: float) -> ItineraryColumns:
+        """Keep or drop each priced item
+        
+        The total is brought within the budget while keeping as much value
+        as possible.
+        """
         try:
             # Calculate current total cost
-            current_total = sum(
-                sum(activity.cost or 0 for activity in day.activities) +
-                sum(dining.price_per_person or 0 for dining in day.dining)
-                for day in days
-            )
+            current_total = columns.total_cost()
             
             if current_total <= total_budget:
                 # Budget is sufficient, no optimization needed
-                return days
-            
-            # Calculate budget deficit
-            deficit = current_total - total_budget
+                return columns
             
-            # Optimize by reducing costs proportionally
-            for day in days:
-                # Optimize activities
-                for activity in day.activities:
-                    if activity.cost and activity.cost > 0:
-                        reduction_factor = 1 - (deficit / current_total) * 0.5
-                        activity.cost = max(activity.cost * reduction_factor, 5)  # Minimum $5
-                
-                # Optimize dining
-                for dining in day.dining:
-                    if dining.price_per_person and dining.price_per_person > 0:
-                        reduction_factor = 1 - (deficit / current_total) * 0.5
-                        dining.price_per_person = max(dining.price_per_person * reduction_factor, 10)  # Minimum $10
+            # Large itineraries take a noticeable time to solve, so keep the event loop free
+            optimized, summary = await to_thread(fit_columns_to_budget, columns, total_budget)
             
-            logger.info(f"Budget optimized: reduced by ${deficit:.2f}")
-            return days
+            logger.info(f"Budget optimized: ${current_total:.2f} -> ${summary['cost_after']:.2f} ({summary})")
+            return optimized
             
         except Exception as e:
             logger.error(f"Error in budget optimization: {str(e)}")
-            return days  # Return original if optimization fails
+            return columns  # Return original if optimization fails
     
     async def get_travel_recommendations(self, city: str, budget: float, days: int) -> List[str]:
         """Get AI-powered travel recommendations based on city and constraints"""
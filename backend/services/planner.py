@@ -0,0 +1,82 @@
+import uuid
+from datetime import datetime
+import logging
+from models.itinerary import ItineraryRequest, ItineraryResponse
+from core.config import settings
+from core.metrics import span
+from services.ai_service import AIService
+from services.geocoding import GeocodingStage
+from services.itinerary_columns import ItineraryColumns
+from services.ml_pipeline import MLPipeline
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ItineraryPlanner:
+    """Runs the full generation chain for one request
+
+    Generation, geocoding, day planning, budget and route optimization, as
+    served by /generate-itinerary and reused by batch and background jobs.
+    """
+
+    def __init__(self, ai_service: AIService, ml_pipeline: MLPipeline, geocoding_stage: GeocodingStage):
+        self.ai_service = ai_service
+        self.ml_pipeline = ml_pipeline
+        self.geocoding_stage = geocoding_stage
+
+    async def build(self, request: ItineraryRequest) -> ItineraryResponse:
+        """Generate and optimize a complete itinerary, timing every stage into the response and the metrics"""
+        timings = {}
+
+        # Generate itinerary using AI service
+        with span('generation') as stage:
+            days = await self.ai_service.generate_itinerary(request)
+        timings['generation'] = stage.elapsed_ms
+
+        # Locate the generated places so routes can be optimized
+        if settings.GEOCODE_ITINERARY_PLACES:
+            with span('geocoding') as stage:
+                await self.geocoding_stage.geocode_days(days, request.city)
+            timings['geocoding'] = stage.elapsed_ms
+
+        # Columnar view shared by the remaining stages
+        columns = ItineraryColumns.from_days(days)
+
+        # Regroup activities so each day stays in one part of the city
+        if settings.PLAN_DAYS_BY_LOCATION:
+            with span('day_planning') as stage:
+                columns = await self.ml_pipeline.plan_columns(columns, request.city)
+                days = columns.to_days()
+            timings['day_planning'] = stage.elapsed_ms
+
+        # Optimize budget allocation, so routes only visit what the budget keeps
+        with span('budget') as stage:
+            columns = await self.ml_pipeline.optimize_budget_columns(columns, request.budget)
+            optimized_days = columns.to_days()
+        timings['budget'] = stage.elapsed_ms
+
+        # Optimize routes using ML pipeline
+        with span('route_optimization') as stage:
+            optimized_routes = await self.ml_pipeline.optimize_daily_routes(optimized_days, columns)
+        timings['route_optimization'] = stage.elapsed_ms
+
+        # Calculate total cost
+        total_cost = columns.total_cost()
+
+        return ItineraryResponse(
+            id=str(uuid.uuid4()),
+            city=request.city,
+            total_budget=request.budget,
+            days=request.days,
+            generated_at=datetime.utcnow(),
+            itinerary=optimized_days,
+            summary=f"AI-generated {request.days}-day itinerary for {request.city}",
+            total_cost=total_cost,
+            savings=max(0, request.budget - total_cost),
+            recommendations=await self.ml_pipeline.get_travel_recommendations(
+                request.city, request.budget, request.days
+            ),
+            timings_ms=timings,
+            routes=optimized_routes
+        )
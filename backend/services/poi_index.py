@@ -0,0 +1,336 @@
+import asyncio
+import json
+import math
+import re
+import time
+import uuid
+from collections import OrderedDict
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+from core.config import settings
+from services.cache import SQLiteStore
+from services.maps_client import MapsGateway, get_maps_gateway
+from services.routing import EARTH_RADIUS_KM
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Results per page of a Places search; a full page may have more behind it
+PLACES_PAGE_SIZE = 20
+
+CoverageKey = Tuple[Optional[str], Optional[str], Optional[int]]
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"\w+", text.casefold())
+
+class POIIndex:
+    """In-process store of places with grid-bucket spatial lookup
+
+    Places come from Places API responses and from imported datasets. An
+    upstream search that returned every match (a partial page with no next
+    page token), or a dataset, also records the circle it covered along with
+    the type, keyword and price level searched, so a later query for the
+    same thing inside a fresh covered circle is answered from the index
+    without calling Google. Queries outside any covered circle, or whose
+    covering search is older than the TTL, go upstream and their results
+    are added to the index. A new circle replaces the older circles of the
+    same search that it contains, and at most POI_INDEX_MAX_COVERED_AREAS
+    are kept, oldest dropped first.
+    """
+
+    def __init__(self, maps_gateway: Optional[MapsGateway] = None, db_path: Optional[str] = None):
+        self.gmaps = maps_gateway
+        self.cell = settings.POI_INDEX_CELL_DEGREES
+        self.places: Dict[str, Dict[str, Any]] = {}
+        self.buckets: Dict[Tuple[int, int], set] = {}
+        # Covered circles grouped by (type, query, price level), and all of their ids oldest first
+        self.coverage: Dict[CoverageKey, List[Dict[str, Any]]] = {}
+        self._coverage_order: "OrderedDict[str, CoverageKey]" = OrderedDict()
+        self.stats = {"index_hits": 0, "misses": 0, "stale": 0}
+
+        db_path = db_path or settings.POI_INDEX_DB_PATH
+        self._places_store = SQLiteStore(db_path, table="pois") if db_path else None
+        self._coverage_store = SQLiteStore(db_path, table="poi_coverage") if db_path else None
+        if self._places_store is not None:
+            for _, place in self._places_store.items():
+                self._add_place(place)
+            areas = [{**area, 'id': area_id} for area_id, area in self._coverage_store.items()]
+            dropped = []
+            for area in sorted(areas, key=lambda area: area['fetched_at']):
+                dropped += self._add_coverage(area)
+            if dropped:
+                self._coverage_store.delete_many(dropped)
+        for path in settings.POI_INDEX_DATASETS:
+            self.load_dataset(path)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell)), int(math.floor(lng / self.cell))
+
+    def _add_place(self, place: Dict[str, Any], fetched_at: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        place_id = place.get('place_id')
+        location = (place.get('geometry') or {}).get('location')
+        if not place_id or not location:
+            return None
+
+        previous = self.places.get(place_id)
+        if previous is not None:
+            self.buckets[self._cell(*previous['_lat_lng'])].discard(place_id)
+
+        place = {**place, '_lat_lng': (location['lat'], location['lng'])}
+        place['_fetched_at'] = fetched_at or place.get('_fetched_at') or time.time()
+        self.places[place_id] = place
+        self.buckets.setdefault(self._cell(location['lat'], location['lng']), set()).add(place_id)
+        return place
+
+    def _add_coverage(self, area: Dict[str, Any]) -> List[str]:
+        """Record a covered circle; returns the ids of the circles it replaced or pushed out"""
+        key = (area['type'], area['query'], area['price_level'])
+        areas = self.coverage.get(key, [])
+        dropped = []
+        if areas:
+            distances = self._distances(*area['center'], [other['center'] for other in areas])
+            dropped = [
+                other['id'] for other, distance in zip(areas, distances)
+                if distance + other['radius'] <= area['radius'] and other['fetched_at'] <= area['fetched_at']
+            ]
+            for area_id in dropped:
+                self._drop_coverage(area_id)
+        self.coverage.setdefault(key, []).append(area)
+        self._coverage_order[area['id']] = key
+
+        while len(self._coverage_order) > settings.POI_INDEX_MAX_COVERED_AREAS:
+            area_id = next(iter(self._coverage_order))
+            self._drop_coverage(area_id)
+            dropped.append(area_id)
+        return dropped
+
+    def _drop_coverage(self, area_id: str):
+        key = self._coverage_order.pop(area_id)
+        areas = [area for area in self.coverage[key] if area['id'] != area_id]
+        if areas:
+            self.coverage[key] = areas
+        else:
+            del self.coverage[key]
+
+    def _index(
+        self,
+        places: List[Dict[str, Any]],
+        center: Optional[Tuple[float, float]],
+        radius: Optional[float],
+        type: Optional[str],
+        price_level: Optional[int],
+        query: Optional[str],
+        fetched_at: Optional[float]
+    ):
+        """Add places and their covered area in memory; returns what to persist"""
+        fetched_at = fetched_at or time.time()
+        indexed = [place for place in (self._add_place(p, fetched_at) for p in places) if place is not None]
+        area, dropped = None, []
+        if center is not None and radius:
+            area = {
+                'id': str(uuid.uuid4()),
+                'center': list(center),
+                'radius': float(radius),
+                'type': type,
+                'price_level': price_level,
+                'query': ' '.join(_tokens(query)) if query else None,
+                'fetched_at': fetched_at,
+            }
+            dropped = self._add_coverage(area)
+        return indexed, area, dropped
+
+    def _persist(self, indexed: List[Dict[str, Any]], area: Optional[Dict[str, Any]], dropped: List[str]):
+        if self._places_store is None:
+            return
+        ttl = settings.POI_INDEX_TTL_SECONDS
+        self._places_store.set_many([(place['place_id'], place) for place in indexed], ttl)
+        if dropped:
+            self._coverage_store.delete_many(dropped)
+        if area is not None:
+            self._coverage_store.set_many([(area['id'], {k: v for k, v in area.items() if k != 'id'})], ttl)
+
+    async def add_places(
+        self,
+        places: List[Dict[str, Any]],
+        center: Optional[Tuple[float, float]] = None,
+        radius: Optional[float] = None,
+        type: Optional[str] = None,
+        price_level: Optional[int] = None,
+        query: Optional[str] = None,
+        fetched_at: Optional[float] = None
+    ):
+        """Index places, and the area they cover when given; pass a center only for complete result sets"""
+        persisted = self._index(places, center, radius, type, price_level, query, fetched_at)
+        if self._places_store is not None:
+            await asyncio.to_thread(self._persist, *persisted)
+
+    def load_dataset(self, path: str):
+        """Import places from a JSON file
+
+        The file holds ``{"city", "center": {"lat", "lng"}, "radius",
+        "fetched_at", "places": [...]}`` with places in Places API format.
+        Its circle counts as covered for every type and query.
+        """
+        with open(path) as f:
+            dataset = json.load(f)
+        center = dataset['center']
+        self._persist(*self._index(
+            dataset['places'], (center['lat'], center['lng']), dataset['radius'],
+            '*', None, None, dataset.get('fetched_at')
+        ))
+        logger.info(f"Imported {len(dataset['places'])} places for {dataset.get('city', path)}")
+
+    def _covered(self, lat: float, lng: float, radius: float, type: Optional[str],
+                 price_level: Optional[int], query: Optional[str]) -> Optional[bool]:
+        """True if a fresh search covered the area, False if only a stale one did, else None"""
+        keys = [('*', None, None), (type, query, price_level)]
+        if price_level is not None:
+            keys.append((type, query, None))  # A search without a price filter covers every price level
+        areas = [area for key in keys for area in self.coverage.get(key, ())]
+        if not areas:
+            return None
+
+        distances = self._distances(lat, lng, [area['center'] for area in areas])
+        now = time.time()
+        found = None
+        for area, distance in zip(areas, distances):
+            if distance + radius > area['radius']:
+                continue
+            if now - area['fetched_at'] <= settings.POI_INDEX_TTL_SECONDS:
+                return True
+            found = False
+        return found
+
+    @staticmethod
+    def _distances(lat: float, lng: float, points) -> np.ndarray:
+        """Meters from (lat, lng) to each (lat, lng) in points"""
+        points = np.radians(np.asarray(points, dtype=float).reshape(-1, 2))
+        lat, lng = np.radians(lat), np.radians(lng)
+        a = (np.sin((points[:, 0] - lat) / 2) ** 2 +
+             np.cos(lat) * np.cos(points[:, 0]) * np.sin((points[:, 1] - lng) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * 1000 * np.arcsin(np.sqrt(a))
+
+    def within(self, lat: float, lng: float, radius: float) -> List[Tuple[Dict[str, Any], float]]:
+        """Indexed places within ``radius`` meters, with their distance"""
+        lat_span = radius / 111_320
+        lng_span = radius / (111_320 * max(math.cos(math.radians(lat)), 0.01))
+        lat_lo, lng_lo = self._cell(lat - lat_span, lng - lng_span)
+        lat_hi, lng_hi = self._cell(lat + lat_span, lng + lng_span)
+
+        candidates = [
+            self.places[place_id]
+            for i in range(lat_lo, lat_hi + 1)
+            for j in range(lng_lo, lng_hi + 1)
+            for place_id in self.buckets.get((i, j), ())
+        ]
+        if not candidates:
+            return []
+        distances = self._distances(lat, lng, [p['_lat_lng'] for p in candidates])
+        return [(p, d) for p, d in zip(candidates, distances) if d <= radius]
+
+    @staticmethod
+    def _public(place: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in place.items() if not k.startswith('_')}
+
+    def _rank(self, matches: List[Tuple[Dict[str, Any], float]]) -> Dict[str, Any]:
+        """Best rated first, nearest first among equals, in Places API response shape"""
+        matches.sort(key=lambda m: (-(m[0].get('rating') or 0), m[1]))
+        return {
+            'status': 'OK',
+            'results': [self._public(p) for p, _ in matches[:settings.POI_INDEX_MAX_RESULTS]],
+        }
+
+    @staticmethod
+    def _complete(body: Dict[str, Any]) -> bool:
+        """Whether a search returned every match, so its circle can be answered from the index"""
+        return 'next_page_token' not in body and len(body.get('results', [])) < PLACES_PAGE_SIZE
+
+    def _count_upstream(self, covered: Optional[bool]):
+        self.stats["stale" if covered is False else "misses"] += 1
+
+    async def nearby(
+        self,
+        location: Tuple[float, float],
+        radius: int,
+        type: Optional[str] = None,
+        price_level: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """places_nearby served from the index when the area is covered"""
+        lat, lng = location
+        covered = self._covered(lat, lng, radius, type, price_level, None)
+        if covered:
+            self.stats["index_hits"] += 1
+            matches = [
+                (p, d) for p, d in self.within(lat, lng, radius)
+                if (type is None or type in (p.get('types') or [])) and
+                (price_level is None or p.get('price_level') == price_level)
+            ]
+            return self._rank(matches)
+
+        self._count_upstream(covered)
+        body = await self.gmaps.places_nearby(location, radius, type=type, price_level=price_level)
+        center = (lat, lng) if self._complete(body) else None
+        await self.add_places(body.get('results', []), center, radius, type, price_level)
+        return body
+
+    async def search(
+        self,
+        query: str,
+        location: Optional[Dict[str, float]] = None,
+        radius: Optional[int] = None,
+        type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Text search served from the index when the area is covered
+
+        A location is needed to scope the search; without one the query
+        always goes upstream. Indexed places match when every query word
+        appears in their name, types or address.
+        """
+        tokens = _tokens(query)
+        covered = None
+        if location is not None:
+            lat, lng = location['lat'], location['lng']
+            # Text search treats the location as a bias, so only the center must be covered
+            covered = self._covered(lat, lng, 0, type, None, ' '.join(tokens))
+            if covered:
+                matches = []
+                for place, distance in self.within(lat, lng, radius or settings.POI_INDEX_TEXT_RADIUS_METERS):
+                    if type is not None and type not in (place.get('types') or []):
+                        continue
+                    text = set(_tokens(' '.join([
+                        place.get('name') or '',
+                        ' '.join(place.get('types') or []).replace('_', ' '),
+                        place.get('formatted_address') or place.get('vicinity') or ''
+                    ])))
+                    if all(token in text for token in tokens):
+                        matches.append((place, distance))
+                if matches:
+                    self.stats["index_hits"] += 1
+                    return self._rank(matches)
+                covered = None
+
+        self._count_upstream(covered)
+        body = await self.gmaps.places(query, location=location, radius=radius, type=type)
+        center = (location['lat'], location['lng']) if location is not None and self._complete(body) else None
+        await self.add_places(body.get('results', []), center, radius, type, None, query)
+        return body
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["index_hits"] + self.stats["misses"] + self.stats["stale"]
+        return {
+            **self.stats,
+            "places": len(self.places),
+            "covered_areas": len(self._coverage_order),
+            "hit_rate": self.stats["index_hits"] / lookups if lookups else 0.0,
+        }
+
+_index: Optional[POIIndex] = None
+
+def get_poi_index(maps_gateway: Optional[MapsGateway] = None) -> POIIndex:
+    """Return the process-wide POI index"""
+    global _index
+    if _index is None:
+        _index = POIIndex(maps_gateway or get_maps_gateway())
+    return _index
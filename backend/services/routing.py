@@ -0,0 +1,203 @@
+"""
+Route solvers used by the ML pipeline.
+
+Everything here is a plain module-level function over plain data so that it
+can run inline or be shipped to a worker process by the pipeline.
+"""
+
+import numpy as np
+from typing import List, Dict, Any, Sequence, Tuple
+
+# Earth's radius in kilometers
+EARTH_RADIUS_KM = 6371
+
+# Minimum gain for a local search move, so float noise cannot cause cycling
+_EPSILON = 1e-9
+
+def haversine_km(coord1: Dict[str, float], coord2: Dict[str, float]) -> float:
+    """Calculate distance between two coordinates using Haversine formula"""
+    lat1, lon1 = coord1['lat'], coord1['lng']
+    lat2, lon2 = coord2['lat'], coord2['lng']
+    
+    # Convert to radians
+    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
+    
+    # Haversine formula
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
+    c = 2 * np.arcsin(np.sqrt(a))
+    
+    return EARTH_RADIUS_KM * c
+
+def haversine_matrix(lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Pairwise Haversine distances in kilometers between all points, as an n x n matrix"""
+    lat = np.radians(np.asarray(lats, dtype=float))
+    lng = np.radians(np.asarray(lngs, dtype=float))
+    
+    dlat = lat[:, None] - lat[None, :]
+    dlng = lng[:, None] - lng[None, :]
+    cos_lat = np.cos(lat)
+    a = np.sin(dlat / 2) ** 2 + np.outer(cos_lat, cos_lat) * np.sin(dlng / 2) ** 2
+    
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def location_distance_matrix(locations: List[Dict[str, Any]]) -> np.ndarray:
+    """Distance matrix for a day's extracted locations, computed once and shared by every step"""
+    lats = np.fromiter((loc['coordinates']['lat'] for loc in locations), dtype=float, count=len(locations))
+    lngs = np.fromiter((loc['coordinates']['lng'] for loc in locations), dtype=float, count=len(locations))
+    return haversine_matrix(lats, lngs)
+
+def nearest_neighbour_order(matrix: np.ndarray, start: int = 0) -> List[int]:
+    """Visit order from the nearest neighbor heuristic over a distance matrix"""
+    n = len(matrix)
+    if n == 0:
+        return []
+    
+    visited = np.zeros(n, dtype=bool)
+    order = [start]
+    visited[start] = True
+    current = start
+    
+    for _ in range(n - 1):
+        # Nearest unvisited location; ties go to the lowest index
+        distances = np.where(visited, np.inf, matrix[current])
+        current = int(np.argmin(distances))
+        visited[current] = True
+        order.append(current)
+    
+    return order
+
+def route_legs(order: List[int], matrix: np.ndarray) -> np.ndarray:
+    """Distance of each consecutive leg of a route"""
+    order = np.asarray(order, dtype=int)
+    return matrix[order[:-1], order[1:]]
+
+def route_length(order: Sequence[int], matrix: np.ndarray) -> float:
+    """Total length of an open route (no return to the start)"""
+    return float(np.sum(route_legs(order, matrix))) if len(order) > 1 else 0.0
+
+def multi_start_nearest_neighbour(matrix: np.ndarray, starts: int = 8) -> List[int]:
+    """Shortest nearest neighbor route over up to ``starts`` evenly spaced start points"""
+    n = len(matrix)
+    candidates = sorted(set(np.linspace(0, n - 1, min(starts, n)).astype(int).tolist()))
+    routes = [nearest_neighbour_order(matrix, start) for start in candidates]
+    return min(routes, key=lambda order: route_length(order, matrix))
+
+def two_opt(order: List[int], matrix: np.ndarray, max_passes: int) -> Tuple[List[int], int]:
+    """Improve an open route by reversing segments until no reversal shortens it
+    
+    Stops after ``max_passes`` sweeps over the route; returns the route and
+    the sweeps used.
+    """
+    route = np.asarray(order, dtype=int)
+    n = len(route)
+    improved = True
+    passes = 0
+    
+    while improved and passes < max_passes:
+        improved = False
+        passes += 1
+        for i in range(n - 1):
+            # Gain of reversing route[i..j] for every j > i at once
+            js = np.arange(i + 1, n)
+            has_next = js < n - 1
+            nxt = route[np.minimum(js + 1, n - 1)]
+            
+            removed = np.where(has_next, matrix[route[js], nxt], 0.0)
+            added = np.where(has_next, matrix[route[i], nxt], 0.0)
+            if i > 0:
+                removed = removed + matrix[route[i - 1], route[i]]
+                added = added + matrix[route[i - 1], route[js]]
+            
+            delta = added - removed
+            best = int(np.argmin(delta))
+            if delta[best] < -_EPSILON:
+                j = int(js[best])
+                route[i:j + 1] = route[i:j + 1][::-1].copy()
+                improved = True
+    
+    return route.tolist(), passes
+
+def or_opt(order: List[int], matrix: np.ndarray, max_passes: int, max_segment: int = 3) -> Tuple[List[int], int]:
+    """Improve an open route by moving short segments (optionally reversed) elsewhere
+    
+    Stops after ``max_passes`` sweeps over the route; returns the route and
+    the sweeps used.
+    """
+    route = list(order)
+    n = len(route)
+    improved = True
+    passes = 0
+    
+    while improved and passes < max_passes:
+        improved = False
+        passes += 1
+        for length in range(1, min(max_segment, n - 1) + 1):
+            i = 0
+            while i + length <= n:
+                segment = route[i:i + length]
+                first, last = segment[0], segment[-1]
+                prev = route[i - 1] if i > 0 else None
+                nxt = route[i + length] if i + length < n else None
+                
+                # Length saved by cutting the segment out and closing the gap
+                gain = 0.0
+                if prev is not None:
+                    gain += matrix[prev, first]
+                if nxt is not None:
+                    gain += matrix[last, nxt]
+                if prev is not None and nxt is not None:
+                    gain -= matrix[prev, nxt]
+                
+                rest = np.asarray(route[:i] + route[i + length:], dtype=int)
+                # Insertion between rest[k-1] and rest[k]; k = 0 and k = len(rest) are the ends
+                u = rest[:-1]
+                v = rest[1:]
+                forward = np.concatenate((
+                    [matrix[last, rest[0]]],
+                    matrix[u, first] + matrix[last, v] - matrix[u, v],
+                    [matrix[rest[-1], first]]
+                ))
+                backward = np.concatenate((
+                    [matrix[first, rest[0]]],
+                    matrix[u, last] + matrix[first, v] - matrix[u, v],
+                    [matrix[rest[-1], last]]
+                ))
+                
+                costs = np.minimum(forward, backward)
+                k = int(np.argmin(costs))
+                if costs[k] < gain - _EPSILON:
+                    moved = segment if forward[k] <= backward[k] else segment[::-1]
+                    rest_list = rest.tolist()
+                    route = rest_list[:k] + moved + rest_list[k:]
+                    improved = True
+                i += 1
+    
+    return route, passes
+
+def solve_route(matrix: np.ndarray, max_passes: int = 40) -> List[int]:
+    """Order a day's locations as a short open route
+    
+    Nearest neighbor from several starts seeds the tour, then 2-opt and
+    Or-opt local search alternate until neither improves it or they have
+    swept the route ``max_passes`` times between them. The budget counts
+    sweeps rather than time, so the same matrix always gives the same route.
+    """
+    n = len(matrix)
+    if n <= 2:
+        return list(range(n))
+    
+    order = multi_start_nearest_neighbour(matrix)
+    remaining = max_passes
+    
+    while remaining > 0:
+        length = route_length(order, matrix)
+        order, used = two_opt(order, matrix, remaining)
+        remaining -= used
+        order, used = or_opt(order, matrix, remaining)
+        remaining -= used
+        if route_length(order, matrix) >= length - _EPSILON:
+            break
+    
+    return order
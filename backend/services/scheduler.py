@@ -0,0 +1,169 @@
+"""
+Time-window scheduling of a day's stops.
+
+Like the route solvers, this is plain data in and out so the pipeline can run
+it inline or in a worker process.
+"""
+
+import numpy as np
+from typing import List, Dict, Any, Tuple, Sequence
+
+from services.routing import solve_route
+
+# Meal windows assigned to a day's dining options, by how many there are
+MEAL_SEQUENCES = {
+    1: ["dinner"],
+    2: ["lunch", "dinner"],
+    3: ["breakfast", "lunch", "dinner"],
+}
+
+def parse_clock(value: str) -> int:
+    """'HH:MM' to minutes after midnight"""
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+def format_clock(minutes: float) -> str:
+    """Minutes after midnight to 'HH:MM' (past midnight wraps around)"""
+    minutes = int(round(minutes))
+    return f"{(minutes // 60) % 24:02d}:{minutes % 60:02d}"
+
+def assign_windows(
+    slots: Sequence[str],
+    durations: Sequence[int],
+    windows: Dict[str, Sequence[str]]
+) -> List[Tuple[int, int, str]]:
+    """Return (earliest start, latest start, window name) for every stop
+
+    ``slots`` holds each stop's TimeOfDay value, or 'meal' for dining. Dining
+    options become breakfast, lunch and dinner in the order the itinerary
+    lists them. A stop should start early enough to finish inside its window
+    when it fits.
+    """
+    n_meals = sum(1 for slot in slots if slot == 'meal')
+    meals = iter(MEAL_SEQUENCES.get(n_meals, ["breakfast", "lunch", "dinner"] + ["dinner"] * n_meals))
+
+    result = []
+    for slot, duration in zip(slots, durations):
+        name = next(meals) if slot == 'meal' else getattr(slot, 'value', slot)
+        opens, closes = (parse_clock(t) for t in windows[name])
+        latest = max(opens, closes - int(duration))
+        result.append((opens, latest, name))
+    return result
+
+class _Evaluator:
+    """Simulates a visit order and scores it as (lateness, finish time, travel)"""
+
+    def __init__(self, travel: np.ndarray, opens: List[int], latest: List[int], durations: List[int]):
+        self.travel = travel.tolist()
+        self.opens = opens
+        self.latest = latest
+        self.durations = durations
+
+    def score(self, order: Sequence[int]) -> Tuple[float, float, float]:
+        travel, opens, latest, durations = self.travel, self.opens, self.latest, self.durations
+        t = opens[order[0]]
+        late = 0.0
+        moving = 0.0
+        prev = None
+        for stop in order:
+            if prev is not None:
+                leg = travel[prev][stop]
+                moving += leg
+                t += leg
+            start = t if t > opens[stop] else opens[stop]
+            if start > latest[stop]:
+                late += start - latest[stop]
+            t = start + durations[stop]
+            prev = stop
+        return late, t, moving
+
+def schedule_day(
+    slots: Sequence[str],
+    durations: Sequence[int],
+    travel_minutes: np.ndarray,
+    windows: Dict[str, Sequence[str]],
+    max_evaluations: int = 5_000,
+    max_passes: int = 40
+) -> Dict[str, Any]:
+    """Order a day's stops to respect their time windows, then timestamp them
+
+    Stops are seeded in window order, each window's stops routed by
+    ``solve_route`` (up to ``max_passes`` 2-opt/Or-opt sweeps) and entered
+    from the end nearer the previous stop, then relocated one at a time while that reduces lateness, finish time or
+    travel time, scoring at most ``max_evaluations`` candidate orders. The
+    budget counts evaluations rather than time, so the result is the same
+    on every run. Returns the visit order, each visited stop's window and
+    arrival/start/departure times in that order, and the positions in the
+    order of stops that start late.
+    """
+    n = len(slots)
+    durations = [int(d) for d in durations]
+    assigned = assign_windows(slots, durations, windows)
+    opens = [a[0] for a in assigned]
+    latest = [a[1] for a in assigned]
+    evaluator = _Evaluator(travel_minutes, opens, latest, durations)
+
+    # Seed: group by window, shortest route inside each group
+    order: List[int] = []
+    groups: Dict[Tuple[int, str], List[int]] = {}
+    for i in sorted(range(n), key=lambda i: (opens[i], assigned[i][2])):
+        groups.setdefault((opens[i], assigned[i][2]), []).append(i)
+    for members in groups.values():
+        path = [members[k] for k in solve_route(travel_minutes[np.ix_(members, members)], max_passes)]
+        if order and travel_minutes[order[-1], path[-1]] < travel_minutes[order[-1], path[0]]:
+            path.reverse()
+        order += path
+
+    # Improve: relocate single stops, first improvement
+    best = evaluator.score(order)
+    evaluations = 0
+    improved = True
+    while improved and evaluations < max_evaluations:
+        improved = False
+        for i in range(n):
+            for j in range(n):
+                if i == j:
+                    continue
+                candidate = order[:i] + order[i + 1:]
+                candidate.insert(j, order[i])
+                score = evaluator.score(candidate)
+                evaluations += 1
+                if score < best:
+                    order, best = candidate, score
+                    improved = True
+                    break
+                if evaluations >= max_evaluations:
+                    break
+            if improved or evaluations >= max_evaluations:
+                break
+
+    # Timestamp the final order
+    times = []
+    late_stops = []
+    t = opens[order[0]]
+    prev = None
+    for position, stop in enumerate(order):
+        leg = 0.0 if prev is None else float(travel_minutes[prev, stop])
+        arrival = t + leg
+        start = max(arrival, opens[stop])
+        late = max(0.0, start - latest[stop])
+        departure = start + durations[stop]
+
+        times.append({
+            'window': assigned[stop][2],
+            'travel_minutes': int(round(leg)),
+            'arrival': format_clock(arrival),
+            'start': format_clock(start),
+            'departure': format_clock(departure),
+            'late_minutes': int(round(late)),
+        })
+        if late >= 1:
+            late_stops.append(position)
+        t = departure
+        prev = stop
+
+    return {
+        'order': order,
+        'times': times,
+        'late': late_stops,
+    }
@@ -0,0 +1,71 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+class _Call:
+    __slots__ = ("task", "waiters", "callers")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0  # Callers currently awaiting the task
+        self.callers = 0  # Callers that joined over its lifetime
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution
+
+    The first caller for a key starts ``fn()`` as a task; callers arriving
+    while it runs await the same task and get the same result or exception.
+    A caller that is cancelled stops waiting without affecting the others;
+    the task itself is cancelled only when every caller has gone. Once the
+    task finishes the key is released, so results are never served after
+    the fact (that is the caches' job).
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0, "abandoned": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return ``fn()``'s result and whether it was shared with other callers"""
+        self.stats["calls"] += 1
+        call = self._calls.get(key)
+        if call is None:
+            self.stats["executions"] += 1
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._finish(key, call, task))
+        else:
+            self.stats["coalesced"] += 1
+
+        call.waiters += 1
+        call.callers += 1
+        try:
+            result = await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # Last one waiting: nobody needs the result any more
+                self.stats["abandoned"] += 1
+                self._release(key, call)
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+        return result, call.callers > 1
+
+    def _release(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _finish(self, key: str, call: _Call, task: asyncio.Task):
+        self._release(key, call)
+        if not task.cancelled() and task.exception() is not None:
+            self.stats["errors"] += 1
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "in_flight": len(self._calls),
+            "coalesced_rate": self.stats["coalesced"] / self.stats["calls"] if self.stats["calls"] else 0.0,
+        }
@@ -0,0 +1,174 @@
+import asyncio
+import time
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+import logging
+from core.config import settings
+from services.cache import TieredCache
+from services.maps_client import MapsGateway
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Distance Matrix API request limits
+MAX_ORIGINS = 25
+MAX_DESTINATIONS = 25
+MAX_ELEMENTS = 100
+
+def plan_batches(origins: List[int], destinations: List[int]) -> List[Tuple[List[int], List[int]]]:
+    """Split an origins x destinations block into as few API-sized requests as possible"""
+    if not origins or not destinations:
+        return []
+    dest_chunk = min(len(destinations), MAX_DESTINATIONS)
+    origin_chunk = max(1, min(MAX_ORIGINS, MAX_ELEMENTS // dest_chunk))
+    return [
+        (origins[i:i + origin_chunk], destinations[j:j + dest_chunk])
+        for i in range(0, len(origins), origin_chunk)
+        for j in range(0, len(destinations), dest_chunk)
+    ]
+
+class TravelTimeProvider:
+    """Travel times between stops from batched Distance Matrix calls
+
+    Each origin/destination pair is cached under its rounded coordinates
+    and travel mode, so only unseen pairs are requested. When the API is
+    unavailable, times come from a haversine model whose speed is
+    calibrated against the API results seen so far.
+    """
+
+    def __init__(self, maps_gateway: Optional[MapsGateway] = None):
+        self.gmaps = maps_gateway
+        self.cache = TieredCache(
+            max_entries=settings.TRAVEL_TIME_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.TRAVEL_TIME_CACHE_TTL_SECONDS,
+            db_path=settings.TRAVEL_TIME_CACHE_DB_PATH,
+            table="travel_times"
+        )
+        # Observed minutes per straight-line km, per mode
+        self._calibration: Dict[str, Tuple[float, int]] = {}
+        self._offline_until = 0.0
+        self.stats = {"api_calls": 0, "api_elements": 0, "fallback_pairs": 0}
+
+    def _point_key(self, lat: float, lng: float) -> str:
+        precision = settings.TRAVEL_TIME_COORD_PRECISION
+        return f"{round(lat, precision)},{round(lng, precision)}"
+
+    def _pair_key(self, origin: str, destination: str, mode: str) -> str:
+        return f"{mode}:{origin}|{destination}"
+
+    def minutes_per_km(self, mode: str) -> float:
+        """Calibrated minutes per straight-line km, or the configured default"""
+        observed = self._calibration.get(mode)
+        if observed and observed[1] >= settings.TRAVEL_TIME_MIN_CALIBRATION_SAMPLES:
+            return observed[0]
+        speed = settings.TRAVEL_FALLBACK_SPEEDS_KMH.get(mode, 30)
+        return settings.TRAVEL_DETOUR_FACTOR * 60 / speed
+
+    def estimate_minutes(self, distance_km: np.ndarray, mode: Optional[str] = None) -> np.ndarray:
+        """Offline travel-time model over a distance matrix"""
+        return np.asarray(distance_km) * self.minutes_per_km(mode or settings.TRAVEL_MODE)
+
+    def _calibrate(self, mode: str, minutes: float, distance_km: float):
+        if distance_km < 0.2:
+            return
+        rate, count = self._calibration.get(mode, (0.0, 0))
+        count += 1
+        self._calibration[mode] = (rate + (minutes / distance_km - rate) / count, count)
+
+    async def matrix(
+        self,
+        lat: np.ndarray,
+        lng: np.ndarray,
+        distance_km: np.ndarray,
+        mode: Optional[str] = None
+    ) -> np.ndarray:
+        """Travel minutes between every pair of points"""
+        mode = mode or settings.TRAVEL_MODE
+        lat, lng = np.asarray(lat, dtype=float).tolist(), np.asarray(lng, dtype=float).tolist()
+        n = len(lat)
+        keys = [self._point_key(a, b) for a, b in zip(lat, lng)]
+        minutes = np.full((n, n), np.nan)
+        np.fill_diagonal(minutes, 0.0)
+
+        # Cached pairs, looked up together
+        pairs = []
+        for i in range(n):
+            for j in range(n):
+                if keys[i] == keys[j]:
+                    minutes[i, j] = 0.0
+                else:
+                    pairs.append((i, j))
+        pair_keys = [self._pair_key(keys[i], keys[j], mode) for i, j in pairs]
+        cached = await self.cache.get_many(pair_keys)
+        missing = []
+        for (i, j), key in zip(pairs, pair_keys):
+            value = cached.get(key)
+            if value is None:
+                missing.append((i, j))
+            else:
+                minutes[i, j] = value
+
+        if missing and self.gmaps is not None and time.monotonic() >= self._offline_until:
+            try:
+                await self._fetch(lat, lng, keys, missing, distance_km, minutes, mode)
+            except Exception as e:
+                # Skip the API for a while rather than paying for a failure on every call
+                self._offline_until = time.monotonic() + settings.TRAVEL_TIME_OFFLINE_RETRY_SECONDS
+                logger.warning(f"Distance Matrix unavailable, using estimated travel times: {str(e)}")
+
+        unresolved = np.isnan(minutes)
+        if unresolved.any():
+            self.stats["fallback_pairs"] += int(unresolved.sum())
+            minutes[unresolved] = self.estimate_minutes(distance_km, mode)[unresolved]
+
+        return minutes
+
+    async def _fetch(
+        self,
+        lat: List[float],
+        lng: List[float],
+        keys: List[str],
+        missing: List[Tuple[int, int]],
+        distance_km: np.ndarray,
+        minutes: np.ndarray,
+        mode: str
+    ):
+        """Fill missing pairs with as few batched Distance Matrix requests as possible"""
+        # Deduplicate points so repeated coordinates are requested once
+        unique: Dict[str, int] = {}
+        for index, key in enumerate(keys):
+            unique.setdefault(key, index)
+        origins = sorted({unique[keys[i]] for i, _ in missing})
+        destinations = sorted({unique[keys[j]] for _, j in missing})
+
+        batches = plan_batches(origins, destinations)
+        responses = await asyncio.gather(*(
+            self.gmaps.distance_matrix(
+                [{'lat': lat[i], 'lng': lng[i]} for i in batch_origins],
+                [{'lat': lat[j], 'lng': lng[j]} for j in batch_destinations],
+                mode=mode
+            )
+            for batch_origins, batch_destinations in batches
+        ))
+        self.stats["api_calls"] += len(batches)
+
+        fetched: Dict[Tuple[str, str], float] = {}
+        for (batch_origins, batch_destinations), response in zip(batches, responses):
+            for i, row in zip(batch_origins, response.get('rows', [])):
+                for j, element in zip(batch_destinations, row.get('elements', [])):
+                    self.stats["api_elements"] += 1
+                    if element.get('status') != 'OK' or 'duration' not in element:
+                        continue
+                    value = element['duration']['value'] / 60
+                    fetched[(keys[i], keys[j])] = value
+                    self._calibrate(mode, value, float(distance_km[i, j]))
+        await self.cache.set_many([
+            (self._pair_key(origin, destination, mode), value)
+            for (origin, destination), value in fetched.items()
+        ])
+
+        for i, j in missing:
+            value = fetched.get((keys[i], keys[j]))
+            if value is not None:
+                minutes[i, j] = value
@@ -0,0 +1,9 @@
+"""
+Shared test setup.
+
+Like the benchmarks, the tests run against fake upstream services:
+importing ``benchmarks.fakes`` first sets placeholder API keys and keeps
+travel times and geocoding offline before any service reads its settings.
+"""
+
+import benchmarks.fakes  # noqa: F401
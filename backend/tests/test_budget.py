@@ -0,0 +1,61 @@
+"""Budget fitting keeps itineraries within budget without changing prices"""
+
+import numpy as np
+import pytest
+
+from benchmarks.budget import priced_days
+from services.budget import fit_columns_to_budget, solve_knapsack
+from services.itinerary_columns import ItineraryColumns
+
+
+@pytest.mark.parametrize("items", [8, 50, 200])
+@pytest.mark.parametrize("fraction", [0.0, 0.1, 0.5, 0.9])
+def test_fit_stays_within_budget(items, fraction):
+    columns = ItineraryColumns.from_days(priced_days(items, seed=items))
+    budget = columns.total_cost() * fraction
+
+    fitted, summary = fit_columns_to_budget(columns, budget)
+
+    assert fitted.total_cost() <= budget + 1e-9
+    assert summary["cost_after"] == pytest.approx(fitted.total_cost())
+    assert summary["keep"] + summary["drop"] == int(np.sum(columns.cost > 0))
+
+
+def test_kept_items_keep_their_prices():
+    columns = ItineraryColumns.from_days(priced_days(50, seed=1))
+    fitted, _ = fit_columns_to_budget(columns, columns.total_cost() / 2)
+
+    original = {id(item): cost for item, cost in zip(columns.items, columns.cost)}
+    assert all(original[id(item)] == cost for item, cost in zip(fitted.items, fitted.cost))
+    assert all(item is original_item for item, original_item in zip(
+        (a for day in fitted.to_days() for a in day.activities + day.dining),
+        fitted.items
+    ))
+
+
+def test_itinerary_within_budget_is_kept_whole():
+    # Whole-dollar prices, since the solver rounds each cost up to its cost step
+    columns = ItineraryColumns.from_days(priced_days(50, seed=2))
+    columns.cost = np.ceil(columns.cost)
+    fitted, summary = fit_columns_to_budget(columns, columns.total_cost())
+
+    assert summary["drop"] == 0
+    assert len(fitted) == len(columns)
+
+
+def test_knapsack_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        costs = rng.integers(1, 50, size=8).astype(float)
+        values = rng.uniform(0.5, 3, size=8)
+        capacity = float(rng.uniform(0, costs.sum()))
+
+        keep = solve_knapsack(costs, values, capacity)
+
+        best = max(
+            values[mask].sum()
+            for mask in (np.array([(m >> i) & 1 for i in range(8)], dtype=bool) for m in range(256))
+            if costs[mask].sum() <= capacity
+        )
+        assert costs[keep].sum() <= capacity
+        assert values[keep].sum() == pytest.approx(best)
@@ -0,0 +1,37 @@
+"""Day extraction from malformed and truncated model output"""
+
+import json
+import random
+
+import pytest
+
+from benchmarks.fakes import build_fake_days
+from benchmarks.json_extraction import CORPUS, expected_after_truncation, parse_chunked
+from services.json_stream import extract_days
+
+with open(CORPUS) as f:
+    CASES = json.load(f)
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case["name"] for case in CASES])
+def test_corpus_whole_response(case):
+    objects, complete = extract_days(case["text"])
+    assert [o["day"] for o in objects] == case["expected_days"]
+    assert complete == case["complete"]
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case["name"] for case in CASES])
+def test_corpus_streamed_in_chunks(case):
+    objects, complete = parse_chunked(case["text"], random.Random(0))
+    assert [o["day"] for o in objects] == case["expected_days"]
+    assert complete == case["complete"]
+
+
+def test_truncated_response_keeps_every_closed_day():
+    rng = random.Random(0)
+    for _ in range(200):
+        days = build_fake_days(rng.randint(1, 10))
+        text = json.dumps(days, indent=2)
+        cut = rng.randint(0, len(text))
+        objects, _ = parse_chunked(text[:cut], rng)
+        assert [o["day"] for o in objects] == expected_after_truncation(days, cut)
@@ -0,0 +1,82 @@
+"""MapsGateway against the in-process stub Maps server"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from benchmarks import stub_maps
+from services.maps_client import MapsAPIError, MapsGateway
+
+
+@pytest.fixture(autouse=True)
+def stub():
+    stub_maps.configure(latency=0.01, jitter=0, error_rate=0, seed=0)
+    stub_maps.app.state.calls = 0
+    yield stub_maps.app.state
+    stub_maps.configure(error_rate=0)
+
+
+def run(scenario):
+    """Run ``scenario(gateway)`` against the stub and close the gateway afterwards"""
+    async def main():
+        gateway = MapsGateway(base_url="http://stub-maps", transport=httpx.ASGITransport(app=stub_maps.app))
+        try:
+            return await scenario(gateway)
+        finally:
+            await gateway.aclose()
+    return asyncio.run(main())
+
+
+def test_geocode_returns_the_stub_location(stub):
+    async def scenario(gateway):
+        results = await gateway.geocode("Louvre Museum, Paris")
+        assert results[0]["geometry"]["location"] == stub_maps.fake_coordinates("Louvre Museum, Paris")
+
+    run(scenario)
+    assert stub.calls == 1
+
+
+def test_repeated_calls_are_cached_and_return_copies(stub):
+    async def scenario(gateway):
+        first = await gateway.geocode("Eiffel Tower")
+        first[0]["geometry"]["location"]["lat"] = 0.0
+        second = await gateway.geocode("Eiffel Tower")
+        assert second[0]["geometry"]["location"] == stub_maps.fake_coordinates("Eiffel Tower")
+
+    run(scenario)
+    assert stub.calls == 1
+
+
+def test_concurrent_identical_calls_reach_upstream_once(stub):
+    async def scenario(gateway):
+        results = await asyncio.gather(*(gateway.geocode("Notre-Dame") for _ in range(10)))
+        assert all(r == results[0] for r in results)
+
+    run(scenario)
+    assert stub.calls == 1
+
+
+def test_error_status_raises():
+    stub_maps.configure(error_rate=1)
+
+    async def scenario(gateway):
+        with pytest.raises(MapsAPIError) as error:
+            await gateway.geocode("Arc de Triomphe")
+        assert error.value.status == stub_maps.ERROR_STATUS
+
+    run(scenario)
+
+
+def test_distance_matrix_has_an_element_per_pair():
+    origins = [{"lat": 48.86, "lng": 2.33}, {"lat": 48.85, "lng": 2.35}]
+    destinations = origins + [{"lat": 48.87, "lng": 2.30}]
+
+    async def scenario(gateway):
+        body = await gateway.distance_matrix(origins, destinations)
+        rows = body["rows"]
+        assert [len(row["elements"]) for row in rows] == [3, 3]
+        assert rows[0]["elements"][0]["duration"]["value"] == 0
+        assert rows[0]["elements"][1]["duration"]["value"] > 0
+
+    run(scenario)
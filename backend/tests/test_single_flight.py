@@ -0,0 +1,112 @@
+"""Coalescing of concurrent identical calls"""
+
+import asyncio
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+class Upstream:
+    """Counts executions; each call waits until released"""
+
+    def __init__(self, result="body", error=None):
+        self.result = result
+        self.error = error
+        self.executions = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.executions += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight, upstream = SingleFlight(), Upstream()
+        callers = [asyncio.ensure_future(flight.do("key", upstream)) for _ in range(5)]
+        await settle()
+        upstream.release.set()
+        results = await asyncio.gather(*callers)
+
+        assert upstream.executions == 1
+        assert results == [("body", True)] * 5
+        assert len(flight) == 0
+        assert flight.get_stats()["coalesced"] == 4
+
+    asyncio.run(scenario())
+
+
+def test_different_keys_and_later_calls_execute_again():
+    async def scenario():
+        flight, upstream = SingleFlight(), Upstream()
+        upstream.release.set()
+        first, second = await asyncio.gather(flight.do("a", upstream), flight.do("b", upstream))
+        later = await flight.do("a", upstream)
+
+        assert upstream.executions == 3
+        assert first == second == later == ("body", False)
+
+    asyncio.run(scenario())
+
+
+def test_error_reaches_every_caller_and_releases_the_key():
+    async def scenario():
+        flight, upstream = SingleFlight(), Upstream(error=ValueError("upstream failed"))
+        callers = [asyncio.ensure_future(flight.do("key", upstream)) for _ in range(3)]
+        await settle()
+        upstream.release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+
+        assert upstream.executions == 1
+        assert all(isinstance(r, ValueError) for r in results)
+        assert len(flight) == 0
+        assert flight.get_stats()["errors"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def scenario():
+        flight, upstream = SingleFlight(), Upstream()
+        leaving = asyncio.ensure_future(flight.do("key", upstream))
+        staying = asyncio.ensure_future(flight.do("key", upstream))
+        await settle()
+        leaving.cancel()
+        await settle()
+        upstream.release.set()
+
+        assert await staying == ("body", True)
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        assert flight.get_stats()["abandoned"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_call_is_cancelled_when_every_caller_leaves():
+    async def scenario():
+        flight, upstream = SingleFlight(), Upstream()
+        callers = [asyncio.ensure_future(flight.do("key", upstream)) for _ in range(2)]
+        await settle()
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await settle()
+
+        assert len(flight) == 0
+        assert flight.get_stats()["abandoned"] == 1
+        # Nothing is left in flight, so the next caller starts a new execution
+        upstream.release.set()
+        assert await flight.do("key", upstream) == ("body", False)
+        assert upstream.executions == 2
+
+    asyncio.run(scenario())